@@ -0,0 +1,234 @@
+import argparse                                                                                    #
+import glob                                                                                        #
+import hashlib                                                                                     #
+import importlib                                                                                   #
+import inspect                                                                                     #
+import os                                                                                          #
+import subprocess                                                                                  #
+import sys                                                                                         #
+import time                                                                                        #
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))                                     #
+                                                                                                   #
+import numpy as np                                                                                 #
+####################################################################################################
+
+
+
+###### SCENARIO REGISTRY ###########################################################################
+# The runner core (override parsing, result cache, startup check) is mirrored in
+# Project_2_Sound_in_Aero_Space/cli.py on purpose: the projects are installed and run
+# independently, so neither imports the other. Keep the shared parts in step.
+
+SCENARIOS = [
+    "flutter_simulation",
+    "convergence_simulation",
+    "velocity_impact_simulation",
+    "flutter_animation_simulation",
+    "flutter_stability_simulation",
+    "flutter_map_simulation",
+]
+
+# Modules that must not be imported before a render is requested
+HEAVY_MODULES = ["matplotlib"]
+
+# Model code shared by all scenarios; any change here invalidates every cached result
+MODEL_SOURCES = ["flutter_model.py", "flutter_stability.py", "flutter_sweep.py", "flutter_fast.py"]
+
+# Cached results live next to the figures; large float arrays are stored as float32
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results", ".cache")
+CACHE_FLOAT32_SIZE = 100_000
+
+# Default wall-clock budget for "python cli.py startup" (interpreter + CLI + all scenarios)
+STARTUP_BUDGET = 0.5
+
+
+def load_scenario(name):
+    """
+    Imports simulations/<name>.py, which provides simulate(**params) -> dict of arrays
+    and render(result, show=False).
+    """
+    if name not in SCENARIOS:
+        raise SystemExit(f"unknown scenario '{name}' (see 'python cli.py list')")
+    return importlib.import_module(f"simulations.{name}")
+
+
+def parse_overrides(pairs):
+    """
+    Converts ["U=40", "t_end=2.5"] into {"U": 40, "t_end": 2.5} for simulate().
+    """
+    overrides = {}
+    for pair in pairs or []:
+        key, _, value = pair.partition("=")
+        number = float(value)
+        overrides[key] = int(number) if number.is_integer() and "." not in value else number
+    return overrides
+
+
+
+###### RESULT CACHE ################################################################################
+def cache_key(name, scenario, overrides):
+    """
+    Hashes everything that determines the result of simulate(): the scenario name, the full
+    simulate() arguments (defaults included), the scenario source without render(), and the
+    shared model sources. Editing render() keeps the key, so figures can be redrawn from
+    the cache.
+    """
+    bound = inspect.signature(scenario.simulate).bind(**overrides)
+    bound.apply_defaults()
+
+    source = inspect.getsource(scenario).split("\n")
+    render_lines, start = inspect.getsourcelines(scenario.render)
+    del source[start - 1:start - 1 + len(render_lines)]
+
+    digest = hashlib.sha256()
+    digest.update(name.encode())
+    digest.update(repr(sorted(bound.arguments.items())).encode())
+    digest.update("\n".join(line.rstrip() for line in source).encode())
+
+    root = os.path.dirname(os.path.abspath(__file__))
+    for pattern in MODEL_SOURCES:
+        for path in sorted(glob.glob(os.path.join(root, pattern))):
+            digest.update(os.path.relpath(path, root).encode())
+            with open(path, "rb") as f:
+                digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def cache_path(name, key):
+    return os.path.join(CACHE_DIR, f"{name}-{key}.npz")
+
+
+def store_result(path, result):
+    """
+    Writes a simulate() result as a compressed .npz; float64 arrays of CACHE_FLOAT32_SIZE
+    elements or more (fields, frames, long trajectories) are stored as float32.
+    """
+    arrays = {}
+    for key, value in result.items():
+        value = np.asarray(value)
+        if value.dtype == np.float64 and value.size >= CACHE_FLOAT32_SIZE:
+            value = value.astype(np.float32)
+        arrays[key] = value
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    np.savez_compressed(path, **arrays)
+
+
+def load_result(path):
+    """
+    Reads a stored result back into a dict; 0-d arrays are returned as plain scalars.
+    """
+    with np.load(path) as data:
+        return {key: data[key][()] if data[key].ndim == 0 else data[key] for key in data.files}
+
+
+
+###### COMMANDS ####################################################################################
+def cmd_list(args):
+    for name in SCENARIOS:
+        print(name)
+
+
+def cmd_run(args):
+    scenario = load_scenario(args.scenario)
+    overrides = parse_overrides(args.set)
+    path = cache_path(args.scenario, cache_key(args.scenario, scenario, overrides))
+
+    if not args.no_cache and os.path.exists(path):
+        result = load_result(path)
+        print(f"[{args.scenario}] loaded cached result {os.path.basename(path)}")
+    else:
+        t0 = time.perf_counter()
+        result = scenario.simulate(**overrides)
+        print(f"[{args.scenario}] simulated in {time.perf_counter() - t0:.2f} s")
+        if not args.no_cache:
+            store_result(path, result)
+
+    if args.save:
+        np.savez_compressed(args.save, **result)
+        print(f"[{args.scenario}] saved result arrays to {args.save}")
+
+    if args.render:
+        render_result(args.scenario, scenario, result)
+
+
+def cmd_render(args):
+    """
+    Redraws the figures of a previous run from the cache without simulating.
+    """
+    scenario = load_scenario(args.scenario)
+    path = cache_path(args.scenario, cache_key(args.scenario, scenario, parse_overrides(args.set)))
+    if not os.path.exists(path):
+        raise SystemExit(f"no cached result for {args.scenario} with these parameters "
+                         f"(run 'python cli.py run {args.scenario}' first)")
+    render_result(args.scenario, scenario, load_result(path))
+
+
+def render_result(name, scenario, result):
+    import matplotlib
+    matplotlib.use("Agg")
+    t0 = time.perf_counter()
+    scenario.render(result, show=False)
+    print(f"[{name}] rendered in {time.perf_counter() - t0:.2f} s")
+
+
+def cmd_startup(args):
+    """
+    Measures the cold start of the compute path in a fresh interpreter: importing this CLI
+    and every scenario module, without running anything. Fails if it exceeds the budget or
+    if a plotting library was imported.
+    """
+    probe = (
+        "import sys, time; t0 = time.perf_counter(); "
+        f"sys.path.insert(0, {os.path.dirname(os.path.abspath(__file__))!r}); "
+        "import cli; [cli.load_scenario(s) for s in cli.SCENARIOS]; "
+        "print(time.perf_counter() - t0); "
+        "print(','.join(m for m in cli.HEAVY_MODULES if m in sys.modules))"
+    )
+    t0 = time.perf_counter()
+    out = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True, check=True)
+    wall = time.perf_counter() - t0
+    import_time, loaded = out.stdout.split("\n")[:2]
+
+    print(f"imports: {float(import_time):.3f} s, total with interpreter: {wall:.3f} s "
+          f"(budget {args.budget:.3f} s)")
+    if loaded:
+        raise SystemExit(f"startup imported render-only modules: {loaded}")
+    if wall > args.budget:
+        raise SystemExit("startup budget exceeded")
+
+
+
+###### ENTRY POINT #################################################################################
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless runner for the wing flutter simulations.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("list", help="list available scenarios").set_defaults(func=cmd_list)
+
+    run = sub.add_parser("run", help="run a scenario (compute only unless --render is given)")
+    run.add_argument("scenario")
+    run.add_argument("--set", action="append", metavar="KEY=VALUE",
+                     help="override a simulate() parameter, e.g. --set U=40")
+    run.add_argument("--save", metavar="PATH.npz", help="write the result arrays to a .npz file")
+    run.add_argument("--render", action="store_true", help="draw and save the figures")
+    run.add_argument("--no-cache", action="store_true",
+                     help="always simulate and do not write to results/.cache")
+    run.set_defaults(func=cmd_run)
+
+    render = sub.add_parser("render", help="redraw the figures from a cached run")
+    render.add_argument("scenario")
+    render.add_argument("--set", action="append", metavar="KEY=VALUE",
+                        help="simulate() parameters of the cached run")
+    render.set_defaults(func=cmd_render)
+
+    startup = sub.add_parser("startup", help="measure the compute-path startup time")
+    startup.add_argument("--budget", type=float, default=STARTUP_BUDGET,
+                         help="maximum allowed seconds (default %(default)s)")
+    startup.set_defaults(func=cmd_startup)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,352 @@
+import numpy as np
+
+from flutter_model import rk45_solver, DP_C, DP_A, DP_E
+from flutter_stability import wing_flutter_state_matrix
+
+# Numba is optional: with it the integration loops run as compiled code, without it the same
+# functions fall back to NumPy (the RK4 propagator) or to the pure-Python rk45_solver
+try:
+    import numba
+except ImportError:
+    numba = None
+
+HAVE_NUMBA = numba is not None
+
+def _jit(function):
+    return numba.njit(cache=True)(function) if HAVE_NUMBA else function
+
+def make_rhs(params):
+    """
+    Build a right-hand side specialized to one parameter set.
+
+    The pitch-plunge system is linear in the state, so every parameter lookup and product of
+    wing_flutter_rhs collapses into the eight nonzero coefficients of the state matrix A,
+    computed once here. The result is a drop-in replacement for wing_flutter_rhs in
+    rk4_solver / rk45_solver (the params argument is ignored).
+
+    Parameters:
+        params (dict): Scalar parameters as for wing_flutter_rhs.
+
+    Returns:
+        rhs (function): rhs(t, y, params=None) -> dydt, with the state matrix as rhs.A.
+    """
+
+    A = wing_flutter_state_matrix(params)
+    a10, a11, a12, a13 = A[1]
+    a30, a31, a32, a33 = A[3]
+
+    def rhs(t, y, params=None):
+        h, h_dot, theta, theta_dot = y
+        return np.array([h_dot, a10*h + a11*h_dot + a12*theta + a13*theta_dot,
+                         theta_dot, a30*h + a31*h_dot + a32*theta + a33*theta_dot])
+
+    rhs.A = A
+    return rhs
+
+def rk4_time_grid(t_span, h):
+    """
+    Time points visited by rk4_solver: t += h until tf, with the last step shortened to land
+    on tf. The sum is accumulated in the same order, so the grid matches bit for bit.
+    """
+
+    t0, tf = t_span
+    n_max = int(np.ceil((tf - t0) / h)) + 1
+    ts = np.cumsum(np.concatenate(([t0], np.full(n_max, h))))
+    k = np.searchsorted(ts, tf, side='left')
+    if ts[k] > tf:
+        ts[k] = ts[k - 1] + (tf - ts[k - 1])
+    return ts[:k + 1]
+
+def rk4_propagator(A, h):
+    """
+    One RK4 step of the linear system dy/dt = A y as a matrix: y_next = P y with
+    P = I + hA + (hA)^2/2 + (hA)^3/6 + (hA)^4/24. A may be a stack of matrices.
+    """
+
+    hA = h * A
+    P = np.eye(A.shape[-1])
+    term = np.eye(A.shape[-1])
+    for k in range(1, 5):
+        term = term @ hA / k
+        P = P + term
+    return P
+
+@_jit
+def _rk4_loop(A, y0, ts, save_every):
+    n = len(ts) - 1
+    n_out = n // save_every + 2 if save_every > 0 else 1
+    t_out = np.empty(n_out)
+    y_out = np.empty((n_out, 4))
+    y = y0.copy()
+    k1 = np.empty(4)
+    k2 = np.empty(4)
+    k3 = np.empty(4)
+    k4 = np.empty(4)
+    tmp = np.empty(4)
+    m = 0
+    if save_every > 0:
+        t_out[0] = ts[0]
+        y_out[0] = y
+        m = 1
+
+    for i in range(n):
+        h = ts[i + 1] - ts[i]
+        for r in range(4):
+            k1[r] = A[r, 0]*y[0] + A[r, 1]*y[1] + A[r, 2]*y[2] + A[r, 3]*y[3]
+        for r in range(4):
+            tmp[r] = y[r] + h/2 * k1[r]
+        for r in range(4):
+            k2[r] = A[r, 0]*tmp[0] + A[r, 1]*tmp[1] + A[r, 2]*tmp[2] + A[r, 3]*tmp[3]
+        for r in range(4):
+            tmp[r] = y[r] + h/2 * k2[r]
+        for r in range(4):
+            k3[r] = A[r, 0]*tmp[0] + A[r, 1]*tmp[1] + A[r, 2]*tmp[2] + A[r, 3]*tmp[3]
+        for r in range(4):
+            tmp[r] = y[r] + h * k3[r]
+        for r in range(4):
+            k4[r] = A[r, 0]*tmp[0] + A[r, 1]*tmp[1] + A[r, 2]*tmp[2] + A[r, 3]*tmp[3]
+        for r in range(4):
+            y[r] += (h / 6.0) * (k1[r] + 2*k2[r] + 2*k3[r] + k4[r])
+        if save_every > 0 and (i + 1) % save_every == 0:
+            t_out[m] = ts[i + 1]
+            y_out[m] = y
+            m += 1
+
+    if save_every == 0 or n % save_every != 0:
+        t_out[m] = ts[n]
+        y_out[m] = y
+        m += 1
+    return t_out[:m], y_out[:m]
+
+def _propagate(P, P_last, y0, ts, save_every, block=1024):
+    """
+    Advance y_{k+1} = P y_k over the grid ts (the last step uses P_last if it is shorter) and
+    return the samples kept by save_every, as rk4_solver would. P may be a stack S + (4, 4)
+    acting on y0 of shape S + (4,), one propagator per trajectory; size-1 axes of S share
+    one propagator across the states of that axis.
+    """
+
+    n = len(ts) - 1
+    last_partial = P_last is not None
+    n_full = n - 1 if last_partial else n
+    shape = y0.shape
+
+    # Saved samples on the full steps: every save_every-th state, i.e. powers of P^save_every,
+    # applied in blocks (the block shrinks with the batch size to bound memory)
+    stride = save_every if save_every > 0 else max(n_full, 1)
+    P_stride = np.linalg.matrix_power(P, stride)
+    n_saved = n_full // stride
+    y_saved = np.empty((n_saved + 1,) + shape)
+    y_saved[0] = y0
+    block = max(1, min(block, 2**16 // max(y0.size // 4, 1), n_saved))
+    powers = np.empty((block,) + P.shape)
+    powers[0] = P_stride
+    for k in range(1, block):
+        powers[k] = P_stride @ powers[k - 1]
+    for i in range(0, n_saved, block):
+        b = min(block, n_saved - i)
+        y_saved[i + 1:i + 1 + b] = (powers[:b] @ y_saved[i][..., None])[..., 0]
+
+    t_saved = ts[:n_saved * stride + 1:stride]
+    y_end = (np.linalg.matrix_power(P, n_full - n_saved * stride) @ y_saved[-1][..., None])[..., 0]
+    if last_partial:
+        y_end = (P_last @ y_end[..., None])[..., 0]
+
+    if save_every == 0:
+        return ts[n:], y_end[None]
+    if n % save_every == 0 and not last_partial:
+        return t_saved, y_saved
+    return np.append(t_saved, ts[n]), np.concatenate((y_saved, y_end[None]))
+
+def _step_sizes(ts):
+    # Regular step and, if the grid ends on a shortened step, its length (else None)
+    n = len(ts) - 1
+    h = ts[1] - ts[0] if n else 0.0
+    h_last = ts[n] - ts[n - 1] if n > 1 and ts[n] - ts[n - 1] != h else None
+    return h, h_last
+
+def rk4_fast(params, t_span, y0, h, save_every=1, use_numba=None):
+    """
+    RK4 integration of the pitch-plunge system for one parameter set, without the Python
+    step loop.
+
+    Takes the same steps as rk4_solver(wing_flutter_rhs, ...). With Numba the whole loop runs
+    as compiled code; otherwise the steps are applied as the RK4 propagator matrix P (exact
+    for this linear system), in blocks of precomputed powers P^1..P^B so each block of states
+    is one vectorized product. Results agree with rk4_solver to rounding.
+
+    Parameters:
+        params (dict): Scalar parameters as for wing_flutter_rhs.
+        t_span (tuple): (t0, tf).
+        y0 (ndarray): Initial state [h, h_dot, theta, theta_dot].
+        h (float): Fixed step size.
+        save_every (int): Keep every save_every-th step and the final state; 0 keeps only
+            the final state (computed with O(log n) matrix products).
+        use_numba (bool): Force (True) or skip (False) the compiled loop; None uses it if
+            Numba is installed.
+
+    Returns:
+        t_values (ndarray): Time points.
+        y_values (ndarray): States, shape (len(t_values), 4).
+    """
+
+    if use_numba and not HAVE_NUMBA:
+        raise ImportError("use_numba=True requires numba")
+    A = wing_flutter_state_matrix(params)
+    y0 = np.array(y0, dtype=float)
+    ts = rk4_time_grid(t_span, h)
+    if HAVE_NUMBA if use_numba is None else use_numba:
+        return _rk4_loop(A, y0, ts, save_every)
+    h, h_last = _step_sizes(ts)
+    P_last = None if h_last is None else rk4_propagator(A, h_last)
+    return _propagate(rk4_propagator(A, h), P_last, y0, ts, save_every)
+
+@_jit
+def _rk45_loop(A, y0, t0, tf, h, rtol, atol, max_steps, h_min, h_max, c, a, e):
+    t_out = np.empty(max_steps + 1)
+    y_out = np.empty((max_steps + 1, 4))
+    K = np.empty((7, 4))
+    y = y0.copy()
+    y_new = np.empty(4)
+    stage = np.empty(4)
+    t = t0
+    t_out[0] = t
+    y_out[0] = y
+    m = 1
+
+    safety, beta = 0.9, 0.04
+    alpha = 0.2 - 0.75 * beta
+    err_prev = 1e-4
+
+    for r in range(4):
+        K[0, r] = A[r, 0]*y[0] + A[r, 1]*y[1] + A[r, 2]*y[2] + A[r, 3]*y[3]
+
+    for _ in range(max_steps):
+        if t >= tf:
+            break
+        if t + h > tf:
+            h = tf - t
+
+        for i in range(1, 7):
+            for r in range(4):
+                acc = 0.0
+                for j in range(i):
+                    acc += a[i, j] * K[j, r]
+                stage[r] = y[r] + h * acc
+            if i == 6:
+                y_new[:] = stage
+            for r in range(4):
+                K[i, r] = A[r, 0]*stage[0] + A[r, 1]*stage[1] + A[r, 2]*stage[2] + A[r, 3]*stage[3]
+
+        err = 0.0
+        for r in range(4):
+            y_err = 0.0
+            for j in range(7):
+                y_err += e[j] * K[j, r]
+            scale = atol + rtol * max(abs(y[r]), abs(y_new[r]))
+            err += (h * y_err / scale) ** 2
+        err = np.sqrt(err / 4)
+
+        if err <= 1.0:
+            t += h
+            y[:] = y_new
+            K[0] = K[6]
+            t_out[m] = t
+            y_out[m] = y
+            m += 1
+            if err == 0:
+                factor = 5.0
+            else:
+                factor = min(max(safety * err**(-alpha) * err_prev**beta, 0.2), 5.0)
+            err_prev = max(err, 1e-4)
+        else:
+            factor = max(safety * err**(-0.2), 0.2)
+        h = max(min(h * factor, h_max), h_min)
+
+    return t_out[:m], y_out[:m]
+
+def rk45_fast(params, t_span, y0, h_init=1e-2, rtol=1e-4, atol=1e-6, max_steps=100000,
+              h_min=1e-6, h_max=0.2, use_numba=None):
+    """
+    Adaptive Dormand-Prince integration of the pitch-plunge system for one parameter set.
+
+    Same method, controller and step sequence as rk45_solver. With Numba the loop is
+    compiled; otherwise rk45_solver runs with the specialized RHS from make_rhs.
+
+    Parameters:
+        params (dict): Scalar parameters as for wing_flutter_rhs.
+        t_span, y0, h_init, rtol, atol, max_steps, h_min, h_max: As for rk45_solver.
+        use_numba (bool): Force (True) or skip (False) the compiled loop; None uses it if
+            Numba is installed.
+
+    Returns:
+        t_values (ndarray): Accepted step times.
+        y_values (ndarray): States, shape (len(t_values), 4).
+    """
+
+    if use_numba and not HAVE_NUMBA:
+        raise ImportError("use_numba=True requires numba")
+    if HAVE_NUMBA if use_numba is None else use_numba:
+        A = wing_flutter_state_matrix(params)
+        return _rk45_loop(A, np.array(y0, dtype=float), float(t_span[0]), float(t_span[1]),
+                          h_init, rtol, atol, max_steps, h_min, h_max, DP_C, DP_A, DP_E)
+    return rk45_solver(make_rhs(params), t_span, y0, params, h_init=h_init, rtol=rtol,
+                       atol=atol, max_steps=max_steps, h_min=h_min, h_max=h_max)
+
+def expm_propagator(params, h):
+    """
+    Exact step matrix of the pitch-plunge system: y(t + h) = exp(A h) y(t).
+
+    Parameters:
+        params (dict): Parameters as for wing_flutter_state_matrix (scalars or arrays of shape S).
+        h (float): Step size.
+
+    Returns:
+        P (ndarray): Propagator, shape S + (4, 4).
+    """
+
+    from scipy.linalg import expm
+
+    return expm(wing_flutter_state_matrix(params) * h)
+
+def expm_solver(params, t_span, y0, h, save_every=1):
+    """
+    Exact integration of the pitch-plunge system by its matrix exponential.
+
+    Since wing_flutter_rhs is linear in the state, one step is the constant matrix
+    exp(A h), computed once per parameter set (Pade approximation with scaling and squaring,
+    scipy.linalg.expm); the trajectory is then only matrix products, applied in blocks of
+    powers as in rk4_fast. The states carry no truncation error at any step size, so h only
+    sets where the solution is sampled, and a final-state-only run is a single exponential
+    over the whole span. The grid is the one rk4_solver would use for the same h.
+
+    Parameters:
+        params (dict): Parameters with scalar values, or arrays of shape (N,) (e.g. from
+            flutter_model.batch_params) to advance N trajectories together.
+        t_span (tuple): (t0, tf).
+        y0 (ndarray): Initial state [h, h_dot, theta, theta_dot], or states of shape (N, 4).
+            Parameters and states broadcast against each other: one state for N parameter
+            sets, N states for one parameter set (one propagator for all), or N of each.
+        h (float): Output step size.
+        save_every (int): Keep every save_every-th step and the final state; 0 keeps only
+            the final state.
+
+    Returns:
+        t_values (ndarray): Time points, shape (M,).
+        y_values (ndarray): States, shape (M, 4), or (M, N, 4) for batched params or states.
+    """
+
+    from scipy.linalg import expm
+
+    A = wing_flutter_state_matrix(params)
+    y0 = np.asarray(y0, dtype=float)
+    batch = np.broadcast_shapes(A.shape[:-2], y0.shape[:-1])
+    # Propagators stay unbroadcast (one expm per parameter set), with leading axes of size 1
+    A = A.reshape((1,) * (len(batch) - (A.ndim - 2)) + A.shape)
+    y0 = np.array(np.broadcast_to(y0, batch + (4,)))
+    ts = rk4_time_grid(t_span, h)
+    if save_every == 0:
+        return ts[-1:], (expm(A * (ts[-1] - ts[0])) @ y0[..., None])[..., 0][None]
+    h, h_last = _step_sizes(ts)
+    P_last = None if h_last is None else expm(A * h_last)
+    return _propagate(expm(A * h), P_last, y0, ts, save_every)
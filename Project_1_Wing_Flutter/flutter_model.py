@@ -34,6 +34,435 @@ def wing_flutter_rhs(t, y, params):
 
     return np.array([h_dot, h_ddot, theta_dot, theta_ddot])
 
+def wing_flutter_rhs_batch(t, Y, params):
+    """
+    Vectorized right-hand side of the pitch-plunge system for N parameter sets at once.
+
+    Parameters:
+        t (float): Current time (unused, for generality).
+        Y (ndarray): States, shape (N, 4), rows [h, h_dot, theta, theta_dot].
+        params (dict): Same keys as wing_flutter_rhs; each value is a scalar or an array of
+            shape (N,), e.g. from batch_params().
+
+    Returns:
+        dYdt (ndarray): Derivatives, shape (N, 4).
+    """
+
+    h, h_dot, theta, theta_dot = Y.T
+    rho, U, b = params['rho'], params['U'], params['b']
+    m, I_alpha, S_alpha = params['m'], params['I_alpha'], params['S_alpha']
+    k_h, k_theta = params['k_h'], params['k_theta']
+    CL_alpha, CM_alpha = params['CL_alpha'], params['CM_alpha']
+
+    alpha_eff = theta + h_dot / U
+    L = rho * U**2 * b * CL_alpha * alpha_eff
+    M = rho * U**2 * b**2 * CM_alpha * alpha_eff
+
+    h_ddot = (L - S_alpha * theta_dot - k_h * h) / m
+    theta_ddot = (M - S_alpha * h_ddot - k_theta * theta) / I_alpha
+
+    return np.stack([h_dot, h_ddot, theta_dot, theta_ddot], axis=-1)
+
+def batch_params(base_params, **sweeps):
+    """
+    Build a parameter dictionary for wing_flutter_rhs_batch.
+
+    Parameters:
+        base_params (dict): Scalar parameters shared by every member of the batch.
+        **sweeps: Parameters that vary across the batch, as sequences of equal length N
+            (e.g. U=np.linspace(1, 100, 100)).
+
+    Returns:
+        params (dict): Copy of base_params with the swept entries as float arrays of shape (N,).
+    """
+    params = dict(base_params)
+    for key, values in sweeps.items():
+        params[key] = np.asarray(values, dtype=float)
+    return params
+
+def wing_energy(y, params):
+    """
+    Total mechanical energy of the pitch-plunge system (kinetic plus elastic, no coupling term).
+
+    Parameters:
+        y (ndarray): States [h, h_dot, theta, theta_dot], shape (..., 4).
+        params (dict): Scalar or batched parameters broadcasting against y[..., 0].
+
+    Returns:
+        E (ndarray): Energy, shape y.shape[:-1].
+    """
+    h, h_dot, theta, theta_dot = y[..., 0], y[..., 1], y[..., 2], y[..., 3]
+    m, I, k_h, k_t = params['m'], params['I_alpha'], params['k_h'], params['k_theta']
+    return 0.5 * m * h_dot**2 + 0.5 * k_h * h**2 + 0.5 * I * theta_dot**2 + 0.5 * k_t * theta**2
+
+class Trajectory:
+    """
+    Preallocated, growable store for the (t, y) samples of an integration.
+
+    Samples are written into NumPy arrays whose capacity doubles when full, instead of Python
+    lists converted at the end. With a sink, the buffer is instead handed over in chunks of
+    `capacity` samples and reused, so memory stays bounded however long the run is.
+
+    Parameters:
+        state_shape (tuple): Shape of one state, e.g. (4,) or (N, 4).
+        capacity (int): Initial number of samples (or chunk size when streaming).
+        save_every (int): Keep every save_every-th step (the final state is always kept);
+            0 keeps only the final state.
+        sink (callable): Optional sink(t_chunk, y_chunk) receiving the samples in order,
+            e.g. a MemmapSink. When given, the solver returns only the final sample.
+    """
+
+    def __init__(self, state_shape, capacity=1024, save_every=1, sink=None):
+        if save_every < 0:
+            raise ValueError("save_every must be >= 0")
+        self.t = np.empty(max(int(capacity), 1))
+        self.y = np.empty((len(self.t),) + tuple(state_shape))
+        self.n = 0
+        self.steps = 0
+        self.save_every = save_every
+        self.sink = sink
+        self.last = None
+
+    def add(self, t, y):
+        """Store one sample unconditionally."""
+        if self.n == len(self.t):
+            self._make_room()
+        self.t[self.n] = t
+        self.y[self.n] = y
+        self.n += 1
+        self.last = self.n
+
+    def add_many(self, t, y):
+        """Store several samples, t shape (M,), y shape (M,) + state_shape."""
+        i = 0
+        while i < len(t):
+            if self.n == len(self.t):
+                self._make_room()
+            m = min(len(t) - i, len(self.t) - self.n)
+            self.t[self.n:self.n + m] = t[i:i + m]
+            self.y[self.n:self.n + m] = y[i:i + m]
+            self.n += m
+            i += m
+        if len(t):
+            self.last = self.n
+
+    def start(self, t, y):
+        """Store the initial state unless only the final state is kept."""
+        if self.save_every:
+            self.add(t, y)
+
+    def step(self, t, y):
+        """Count one solver step and store it if it falls on the save_every grid."""
+        self.steps += 1
+        if self.save_every and self.steps % self.save_every == 0:
+            self.add(t, y)
+
+    def finish(self, t, y):
+        """Store the final state if it was not saved by step(), then return the samples."""
+        if not self.save_every or self.steps % self.save_every:
+            self.add(t, y)
+        return self.result()
+
+    def result(self):
+        """
+        Returns:
+            t_values (ndarray): Stored times (only the last one when streaming to a sink).
+            y_values (ndarray): Corresponding states.
+        """
+        if self.sink is None:
+            # Trim by copying only if a large part of the buffer is unused
+            if 4 * self.n < 3 * len(self.t):
+                return self.t[:self.n].copy(), self.y[:self.n].copy()
+            return self.t[:self.n], self.y[:self.n]
+        if self.last is None:
+            return self.t[:0].copy(), self.y[:0].copy()
+        k = self.last - 1
+        t_last, y_last = self.t[k:k + 1].copy(), self.y[k:k + 1].copy()
+        self._flush()
+        return t_last, y_last
+
+    def _make_room(self):
+        if self.sink is not None:
+            self._flush()
+            return
+        t, y = self.t, self.y
+        self.t = np.empty(2 * len(t))
+        self.y = np.empty((2 * len(t),) + y.shape[1:])
+        self.t[:len(t)] = t
+        self.y[:len(t)] = y
+
+    def _flush(self):
+        if self.n:
+            self.sink(self.t[:self.n], self.y[:self.n])
+        self.n = 0
+        self.last = None
+
+def trajectory_capacity(n_steps, save_every=1, sink=None, chunk=4096):
+    """
+    Number of samples to preallocate for a run of n_steps fixed steps.
+
+    Returns the exact count of saved samples (plus slack for the rounding of the last step),
+    a single slot when only the final state is kept, and the chunk size when streaming.
+    """
+    if sink is not None:
+        return chunk
+    if not save_every:
+        return 1
+    return n_steps // save_every + 2
+
+class MemmapSink:
+    """
+    Trajectory sink writing samples to a .npy file on disk through a memory map.
+
+    Each row holds [t, y.ravel()]. The file is created with room for `capacity` rows; `count`
+    tracks how many have been written, so np.load(path, mmap_mode='r')[:count] reads them back.
+
+    Parameters:
+        path (str): Output .npy file.
+        capacity (int): Maximum number of samples.
+        state_shape (tuple): Shape of one state.
+    """
+
+    def __init__(self, path, capacity, state_shape):
+        width = 1 + int(np.prod(state_shape))
+        self.data = np.lib.format.open_memmap(path, mode='w+', dtype=float, shape=(capacity, width))
+        self.count = 0
+
+    def __call__(self, t, y):
+        m = len(t)
+        if self.count + m > len(self.data):
+            raise ValueError("MemmapSink capacity exceeded")
+        self.data[self.count:self.count + m, 0] = t
+        self.data[self.count:self.count + m, 1:] = y.reshape(m, -1)
+        self.count += m
+        self.data.flush()
+
+def amplitude_event(index, limit, terminal=True):
+    """
+    Event that fires when |y[index]| reaches limit (e.g. index 2, a pitch bound in radians).
+
+    Event functions follow the scipy convention: event(t, y, params) -> float (an array for
+    batched states), with optional attributes `terminal` (stop the integration) and
+    `direction` (+1: only - to + crossings, -1: only + to -, 0: both).
+    """
+    def event(t, y, params):
+        return limit - np.abs(y[..., index])
+    event.terminal = terminal
+    event.direction = -1
+    return event
+
+def energy_event(y0, params, factor, terminal=True):
+    """
+    Event that fires when the energy exceeds factor times the energy of the initial state y0.
+    """
+    E0 = wing_energy(np.asarray(y0, dtype=float), params)
+    def event(t, y, params):
+        return np.log(wing_energy(y, params) / (factor * E0))
+    event.terminal = terminal
+    event.direction = 1
+    return event
+
+class GrowthRateEvent:
+    """
+    Terminal event on an online estimate of the amplitude growth rate.
+
+    Every accepted step updates running least-squares sums of log(energy) against t (after
+    t_min, to skip the initial transient); the estimate sigma is half the fitted slope, and
+    the event fires once sigma exceeds threshold (1/s) over a fit of at least min_span
+    seconds. The state lives in the event, so it is located at step resolution (exact =
+    False) and one instance serves one integration.
+
+    Parameters:
+        threshold (float): Growth rate marking flutter, in 1/s.
+        t_min (float): Start of the fit window in s.
+        min_span (float): Length of fitted history required before the estimate is used.
+    """
+
+    terminal = True
+    direction = 1
+    exact = False
+
+    def __init__(self, threshold, t_min=1.0, min_span=1.0):
+        self.threshold = threshold
+        self.t_min = t_min
+        self.min_span = min_span
+        self.t_first = None
+        self.t_last = -np.inf
+        self.sums = [0, 0.0, 0.0, 0.0, 0.0]
+        self.value = None
+
+    def sigma(self):
+        """Current growth-rate estimate (NaN until min_span seconds are in the fit)."""
+        n, St, Stt, Sl, Stl = self.sums
+        if self.t_first is None or self.t_last - self.t_first < self.min_span:
+            return np.full(np.shape(Sl), np.nan)
+        return 0.5 * (n * Stl - St * Sl) / (n * Stt - St**2)
+
+    def __call__(self, t, y, params):
+        if t > self.t_last:
+            self.t_last = t
+            log_E = np.log(wing_energy(y, params))
+            if t >= self.t_min:
+                if self.t_first is None:
+                    self.t_first = t
+                self.sums[0] += 1
+                self.sums[1] += t
+                self.sums[2] += t * t
+                self.sums[3] = self.sums[3] + log_E
+                self.sums[4] = self.sums[4] + t * log_E
+            sigma = np.broadcast_to(self.sigma(), np.shape(log_E))
+            self.value = np.where(np.isnan(sigma), -np.inf, sigma - self.threshold)
+        return self.value
+
+def crossed(event, g_old, g_new):
+    """Sign changes of an event between two evaluations, honouring event.direction."""
+    direction = getattr(event, 'direction', 0)
+    up = (g_old < 0) & (g_new >= 0)
+    down = (g_old > 0) & (g_new <= 0)
+    if direction > 0:
+        return up
+    if direction < 0:
+        return down
+    return up | down
+
+def locate_event(event, interp, t_a, t_b, g_a, g_b, params, tol=1e-12, max_iter=60):
+    """
+    Find the root of event(t, interp(t), params) in [t_a, t_b] by Illinois regula falsi.
+
+    Parameters:
+        event (callable): Event function with g_a and g_b of opposite sign (or g_b = 0).
+        interp (callable): Continuous solution t -> y on the step.
+        t_a, t_b (float): Step bounds.
+        g_a, g_b (float): Event values at the bounds.
+        params (dict): Parameters passed to the event.
+        tol (float): Relative tolerance on t.
+
+    Returns:
+        t_root (float): Event time.
+    """
+    side = 0
+    t_root = t_b
+    for _ in range(max_iter):
+        if g_b == g_a or t_b - t_a <= tol * max(1.0, abs(t_b)):
+            break
+        t_root = (t_a * g_b - t_b * g_a) / (g_b - g_a)
+        g = float(event(t_root, interp(t_root), params))
+        if g == 0:
+            break
+        if np.sign(g) == np.sign(g_b):
+            t_b, g_b = t_root, g
+            if side == -1:
+                g_a /= 2
+            side = -1
+        else:
+            t_a, g_a = t_root, g
+            if side == 1:
+                g_b /= 2
+            side = 1
+    return t_root
+
+def step_events(events, g_old, t_old, t_new, y_new, interp, params, log):
+    """
+    Evaluate the events at the end of an accepted step and locate any crossings in it.
+
+    Occurrences are appended to log (one list of (t, y) per event) in time order, up to the
+    first terminal one.
+
+    Returns:
+        g_new (list): Event values at t_new.
+        stop (tuple): (t, y, index) of the first terminal event in the step, or None.
+    """
+    g_new = [float(e(t_new, y_new, params)) for e in events]
+    hits = []
+    for i, e in enumerate(events):
+        if crossed(e, g_old[i], g_new[i]):
+            if getattr(e, 'exact', True):
+                t_root = locate_event(e, interp, t_old, t_new, g_old[i], g_new[i], params)
+                hits.append((t_root, i, interp(t_root)))
+            else:
+                hits.append((t_new, i, y_new.copy()))
+
+    for t_root, i, y_root in sorted(hits, key=lambda hit: hit[0]):
+        log[i].append((t_root, y_root))
+        if getattr(events[i], 'terminal', False):
+            return g_new, (t_root, y_root, i)
+    return g_new, None
+
+def event_summary(log):
+    """
+    Returns:
+        info (dict): 't_events' and 'y_events', one array per event (empty if it never fired).
+    """
+    return {'t_events': [np.array([t for t, _ in occ]) for occ in log],
+            'y_events': [np.array([y for _, y in occ]) for occ in log]}
+
+# Dormand-Prince 5(4) tableau. Row 6 of DP_A is the 5th-order weights, so the last stage is
+# f(t + h, y_new) and is reused as the first stage of the next step (FSAL).
+DP_C = np.array([0, 1/5, 3/10, 4/5, 8/9, 1, 1])
+DP_A = np.array([
+    [0, 0, 0, 0, 0, 0, 0],
+    [1/5, 0, 0, 0, 0, 0, 0],
+    [3/40, 9/40, 0, 0, 0, 0, 0],
+    [44/45, -56/15, 32/9, 0, 0, 0, 0],
+    [19372/6561, -25360/2187, 64448/6561, -212/729, 0, 0, 0],
+    [9017/3168, -355/33, 46732/5247, 49/176, -5103/18656, 0, 0],
+    [35/384, 0, 500/1113, 125/192, -2187/6784, 11/84, 0]])
+# Difference between the 5th- and embedded 4th-order weights (error estimate)
+DP_E = np.array([71/57600, 0, -71/16695, 71/1920, -17253/339200, 22/525, -1/40])
+# Dense output: y(t + theta*h) = y + h * K^T @ DP_P @ [theta, theta^2, theta^3, theta^4]
+DP_P = np.array([
+    [1, -8048581381/2820520608, 8663915743/2820520608, -12715105075/11282082432],
+    [0, 0, 0, 0],
+    [0, 131558114200/32700410799, -68118460800/10900136933, 87487479700/32700410799],
+    [0, -1754552775/470086768, 14199869525/1410260304, -10690763975/1880347072],
+    [0, 127303824393/49829197408, -318862633887/49829197408, 701980252875/199316789632],
+    [0, -282668133/205662961, 2019193451/616988883, -1453857185/822651844],
+    [0, 40617522/29380423, -110615467/29380423, 69997945/29380423]])
+
+def dopri_step(fun, t, y, h, params, K):
+    """
+    Advance one Dormand-Prince step in place of the stage matrix K.
+
+    Parameters:
+        fun (function): RHS function of the ODE system.
+        t (float): Current time.
+        y (ndarray): Current state.
+        h (float): Step size.
+        params (dict): Parameters passed to the RHS function.
+        K (ndarray): Stage matrix, shape (7,) + y.shape, with K[0] = fun(t, y, params) on entry.
+            Stages 1-6 are overwritten; K[6] is fun(t + h, y_new, params).
+
+    Returns:
+        y_new (ndarray): Fifth-order estimate of the next state.
+        y_err (ndarray): Local error estimate (5th- minus 4th-order solution).
+    """
+
+    Kf = K.reshape(7, -1)
+    for i in range(1, 6):
+        K[i] = fun(t + DP_C[i] * h, y + h * (DP_A[i, :i] @ Kf[:i]).reshape(y.shape), params)
+    y_new = y + h * (DP_A[6, :6] @ Kf[:6]).reshape(y.shape)
+    K[6] = fun(t + h, y_new, params)
+    return y_new, h * (DP_E @ Kf).reshape(y.shape)
+
+def dopri_dense(y, h, K, theta):
+    """
+    Evaluate the Dormand-Prince continuous extension inside a completed step.
+
+    Parameters:
+        y (ndarray): State at the start of the step.
+        h (float): Step size.
+        K (ndarray): Stage matrix of the step, as filled by dopri_step.
+        theta (ndarray): Fractions of the step in [0, 1], shape (M,).
+
+    Returns:
+        y_theta (ndarray): States at t + theta*h, shape (M,) + y.shape.
+    """
+
+    theta = np.asarray(theta, dtype=float)
+    powers = theta[:, None] ** np.arange(1, 5)
+    Q = DP_P.T @ K.reshape(7, -1)
+    return y + h * (powers @ Q).reshape((len(theta),) + y.shape)
+
 def rk45_step_scaled(fun, t, y, h, params, rtol, atol):
     """
     Perform a single adaptive RK45 (Dormand-Prince) integration step.
@@ -52,35 +481,28 @@ def rk45_step_scaled(fun, t, y, h, params, rtol, atol):
         err (float): RMS scaled error between 5th- and 4th-order estimates.
     """
 
-    a = [[],
-         [1/5],
-         [3/40, 9/40],
-         [44/45, -56/15, 32/9],
-         [19372/6561, -25360/2187, 64448/6561, -212/729],
-         [9017/3168, -355/33, 46732/5247, 49/176, -5103/18656]]
-    
-    c = [0, 1/5, 3/10, 4/5, 8/9, 1]
-    b5 = [35/384, 0, 500/1113, 125/192, -2187/6784, 11/84]
-    b4 = [5179/57600, 0, 7571/16695, 393/640, -92097/339200, 187/2100]
-
-    k = []
-    for i in range(6):
-        yi = y.copy()
-        for j in range(i):
-            yi += h * a[i][j] * k[j]
-        k.append(fun(t + c[i] * h, yi, params))
-
-    y5 = y + h * sum(bi * ki for bi, ki in zip(b5, k))
-    y4 = y + h * sum(bi * ki for bi, ki in zip(b4, k))
+    y = np.asarray(y, dtype=float)
+    K = np.empty((7,) + y.shape)
+    K[0] = fun(t, y, params)
+    y5, y_err = dopri_step(fun, t, y, h, params, K)
 
     scale = atol + rtol * np.maximum(np.abs(y), np.abs(y5))
-    err = np.sqrt(np.mean(((y5 - y4) / scale) ** 2))
+    err = np.sqrt(np.mean((y_err / scale) ** 2))
     return y5, err
 
-def rk45_solver(fun, t_span, y0, params, h_init=1e-2, rtol=1e-4, atol=1e-6, max_steps=100000, h_min=1e-6, h_max=0.2):
+def rk45_solver(fun, t_span, y0, params, h_init=1e-2, rtol=1e-4, atol=1e-6, max_steps=100000, h_min=1e-6, h_max=0.2, t_eval=None,
+                save_every=1, sink=None, events=None):
     """
     Integrate an ODE system using an adaptive RK45 method (Dormand-Prince).
 
+    The last stage of an accepted step is reused as the first stage of the next one (FSAL), so
+    an accepted step costs 6 RHS evaluations. The step size follows a PI controller on the
+    scaled error of the current and previous accepted steps; after a rejection the step is
+    only allowed to shrink.
+
+    With t_eval the solver still takes its own adaptive steps, and the solution is sampled at
+    exactly the requested times with the 4th-order Dormand-Prince interpolant.
+
     Parameters:
         fun (function): RHS function of the ODE system.
         t_span (tuple): Tuple (t0, tf) defining the integration time interval.
@@ -92,18 +514,50 @@ def rk45_solver(fun, t_span, y0, params, h_init=1e-2, rtol=1e-4, atol=1e-6, max_
         max_steps (int): Maximum number of steps before stopping.
         h_min (float): Minimum allowable step size.
         h_max (float): Maximum allowable step size.
+        t_eval (ndarray): Optional increasing output times within t_span. If None, every
+            save_every-th accepted step is returned.
+        save_every (int): Keep every save_every-th accepted step and the final state (ignored
+            with t_eval); 0 returns only the final state.
+        sink (callable): Optional sink(t_chunk, y_chunk) streaming the samples (see
+            Trajectory); the return value is then only the final sample.
+        events (list): Optional event functions (see amplitude_event). Crossings are located
+            on the dense output; a terminal event ends the run at the event time.
 
     Returns:
-        t_values (ndarray): Array of time values.
+        t_values (ndarray): Array of time values (t_eval up to where integration stopped).
         y_values (ndarray): Array of state vectors corresponding to t_values.
+        event_info (dict): Only when events are given; see event_summary, plus 'terminated'
+            (index of the terminal event that stopped the run, or None).
     """
     t0, tf = t_span
     t = t0
     y = np.array(y0, dtype=float)
     h = h_init
 
-    t_values = [t]
-    y_values = [y.copy()]
+    if t_eval is None:
+        out = Trajectory(y.shape, 1024, save_every, sink)
+        out.start(t, y)
+    else:
+        t_eval = np.asarray(t_eval, dtype=float)
+        if np.any(np.diff(t_eval) < 0) or (len(t_eval) and (t_eval[0] < t0 or t_eval[-1] > tf)):
+            raise ValueError("t_eval must be increasing and lie within t_span")
+        out = Trajectory(y.shape, len(t_eval) if sink is None else 1024, 1, sink)
+        n_out = np.searchsorted(t_eval, t0, side='right')
+        for t_out in t_eval[:n_out]:
+            out.add(t_out, y)
+
+    # PI controller exponents (Hairer & Wanner, beta = 0.04 for order 5)
+    safety, beta = 0.9, 0.04
+    alpha = 0.2 - 0.75 * beta
+    err_prev = 1e-4
+
+    K = np.empty((7,) + y.shape)
+    K[0] = fun(t, y, params)
+
+    if events:
+        g = [float(e(t, y, params)) for e in events]
+        log = [[] for _ in events]
+    stop = None
 
     for _ in range(max_steps):
         if t >= tf:
@@ -112,54 +566,204 @@ def rk45_solver(fun, t_span, y0, params, h_init=1e-2, rtol=1e-4, atol=1e-6, max_
         if t + h > tf:
             h = tf - t
 
-        y_next, err = rk45_step_scaled(fun, t, y, h, params, rtol, atol)
+        y_next, y_err = dopri_step(fun, t, y, h, params, K)
+        scale = atol + rtol * np.maximum(np.abs(y), np.abs(y_next))
+        err = np.sqrt(np.mean((y_err / scale) ** 2))
 
         if err <= 1.0:
+            t_end = t + h
+            if events:
+                interp = lambda tau, t=t, y=y, h=h: dopri_dense(y, h, K, [(tau - t) / h])[0]
+                g, stop = step_events(events, g, t, t + h, y_next, interp, params, log)
+                if stop is not None:
+                    t_end = stop[0]
+
+            if t_eval is None:
+                out.step(t_end, y_next if stop is None else stop[1])
+            else:
+                n_next = np.searchsorted(t_eval, t_end, side='right')
+                if n_next > n_out:
+                    t_out = t_eval[n_out:n_next]
+                    out.add_many(t_out, dopri_dense(y, h, K, (t_out - t) / h))
+                    n_out = n_next
+
+            if stop is not None:
+                t, y, _ = stop
+                break
             t += h
             y = y_next
-            t_values.append(t)
-            y_values.append(y.copy())
+            K[0] = K[6]
 
-        # Step size adaptation
-        safety = 0.9
-        if err == 0:
-            h_new = h * 2
+            # Step size adaptation
+            if err == 0:
+                factor = 5.0
+            else:
+                factor = min(max(safety * err**(-alpha) * err_prev**beta, 0.2), 5.0)
+            err_prev = max(err, 1e-4)
         else:
-            h_new = h * min(max(safety * err**(-0.2), 0.2), 5.0)
-        h = max(min(h_new, h_max), h_min)
+            factor = max(safety * err**(-0.2), 0.2)
+        h = max(min(h * factor, h_max), h_min)
 
-    return np.array(t_values), np.array(y_values)
+    t_values, y_values = out.finish(t, y) if t_eval is None else out.result()
+    if not events:
+        return t_values, y_values
+    info = event_summary(log)
+    info['terminated'] = None if stop is None else stop[2]
+    return t_values, y_values, info
 
-def rk4_solver(fun, t_span, y0, h, params):
+def hermite_interp(t0, y0, f0, t1, y1, fun, params):
+    """
+    Cubic Hermite interpolant of a fixed step (4th-order accurate, matching RK4).
+
+    f(t1, y1) is only evaluated the first time the interpolant is used, so steps without an
+    event crossing cost no extra RHS call.
+    """
+    h = t1 - t0
+    f1 = []
+    def interp(t):
+        if not f1:
+            f1.append(fun(t1, y1, params))
+        s = (t - t0) / h
+        return ((2*s**3 - 3*s**2 + 1) * y0 + (s**3 - 2*s**2 + s) * h * f0
+                + (3*s**2 - 2*s**3) * y1 + (s**3 - s**2) * h * f1[0])
+    return interp
+
+def rk4_solver(fun, t_span, y0, h, params, save_every=1, sink=None, events=None):
     """
     Classic fixed-step Runge-Kutta 4th order integrator.
 
     Parameters:
-        fun     -- RHS function: dy/dt = f(t, y, params)
-        t_span  -- Tuple (t0, tf): time range to integrate over
-        y0      -- Initial state vector
-        h       -- Fixed time step size
-        params  -- Dictionary of system parameters
+        fun        -- RHS function: dy/dt = f(t, y, params)
+        t_span     -- Tuple (t0, tf): time range to integrate over
+        y0         -- Initial state vector
+        h          -- Fixed time step size
+        params     -- Dictionary of system parameters
+        save_every -- Keep every save_every-th step and the final state; 0 keeps only the final
+                      state (e.g. for a fine reference solution)
+        sink       -- Optional sink(t_chunk, y_chunk) streaming the samples (see Trajectory);
+                      only the final sample is then returned
+        events     -- Optional event functions (see amplitude_event), located on a cubic
+                      Hermite interpolant of each step; a terminal event ends the run there
 
     Returns:
         t_values, y_values: Arrays of time points and state vectors
+        event_info: Only when events are given; see event_summary, plus 'terminated'
+                    (index of the terminal event that stopped the run, or None)
     """
     t0, tf = t_span
-    t_vals = [t0]
-    y_vals = [np.array(y0, dtype=float)]
     t = t0
     y = np.array(y0, dtype=float)
+    n_steps = int(np.ceil((tf - t0) / h)) + 1
+    out = Trajectory(y.shape, trajectory_capacity(n_steps, save_every, sink), save_every, sink)
+    out.start(t, y)
+
+    if events:
+        g = [float(e(t, y, params)) for e in events]
+        log = [[] for _ in events]
+    stop = None
 
     while t < tf:
         if t + h > tf:
             h = tf - t
+        if events:
+            t_old, y_old = t, y.copy()
         k1 = fun(t, y, params)
         k2 = fun(t + h/2, y + h/2 * k1, params)
         k3 = fun(t + h/2, y + h/2 * k2, params)
         k4 = fun(t + h, y + h * k3, params)
         y += (h / 6.0) * (k1 + 2*k2 + 2*k3 + k4)
         t += h
-        t_vals.append(t)
-        y_vals.append(y.copy())
+        if events:
+            interp = hermite_interp(t_old, y_old, k1, t, y.copy(), fun, params)
+            g, stop = step_events(events, g, t_old, t, y, interp, params, log)
+            if stop is not None:
+                t, y, _ = stop
+                out.step(t, y)
+                break
+        out.step(t, y)
+
+    t_values, y_values = out.finish(t, y)
+    if not events:
+        return t_values, y_values
+    info = event_summary(log)
+    info['terminated'] = None if stop is None else stop[2]
+    return t_values, y_values, info
+
+def rk4_solver_batch(fun, t_span, Y0, h, params, save_every=1, sink=None, events=None):
+    """
+    Fixed-step RK4 integrator advancing N independent systems together.
+
+    Takes exactly the same steps as rk4_solver, but every stage is one vectorized call
+    fun(t, Y, params) on the whole (N, 4) state, so a parameter sweep costs about as many
+    Python-level operations as a single run.
+
+    Parameters:
+        fun     -- Batched RHS: dY/dt = f(t, Y, params), e.g. wing_flutter_rhs_batch
+        t_span  -- Tuple (t0, tf): time range to integrate over
+        Y0      -- Initial states, shape (N, 4) (a single state is broadcast to all N; N states
+                   with scalar params integrate N trajectories of one parameter set)
+        h       -- Fixed time step size
+        params  -- Dictionary of parameters with scalar or (N,) array values
+        save_every, sink -- Output decimation and streaming, as in rk4_solver
+        events  -- Optional batched event functions event(t, Y, params) -> (N,), checked at
+                   the end of every step. A member whose terminal event fires is frozen at
+                   that state and no longer integrated (the RHS is only evaluated on the
+                   active members). The time grid still spans t_span so that members stay
+                   aligned; once all are frozen the remaining steps only record their states.
+
+    Returns:
+        t_values -- Array of time points, shape (M,)
+        Y_values -- States, shape (M, N, 4)
+        event_info -- Only when events are given: 't_events' (first firing time per event and
+                      member, NaN if none, shape (n_events, N)) and 'terminated' (bool, (N,))
+    """
+    t0, tf = t_span
+    n_batch = max([np.size(v) for v in params.values()] + list(np.shape(Y0)[:-1]))
+    Y = np.array(np.broadcast_to(np.asarray(Y0, dtype=float), (n_batch, 4)))
+    t = t0
+    n_steps = int(np.ceil((tf - t0) / h)) + 1
+    out = Trajectory(Y.shape, trajectory_capacity(n_steps, save_every, sink), save_every, sink)
+    out.start(t, Y)
+
+    # Members still being integrated (all of them unless a terminal event froze some)
+    idx, sub_params = slice(None), params
+    if events:
+        g = [np.asarray(e(t, Y, params), dtype=float) for e in events]
+        t_events = np.full((len(events), n_batch), np.nan)
+        active = np.ones(n_batch, dtype=bool)
+
+    while t < tf:
+        if t + h > tf:
+            h = tf - t
+        if events and not active.any():
+            t += h
+            out.step(t, Y)
+            continue
+        Ya = Y[idx]
+        k1 = fun(t, Ya, sub_params)
+        k2 = fun(t + h/2, Ya + h/2 * k1, sub_params)
+        k3 = fun(t + h/2, Ya + h/2 * k2, sub_params)
+        k4 = fun(t + h, Ya + h * k3, sub_params)
+        Ya += (h / 6.0) * (k1 + 2*k2 + 2*k3 + k4)
+        Y[idx] = Ya
+        t += h
+        out.step(t, Y)
+
+        if events:
+            frozen = np.zeros(n_batch, dtype=bool)
+            for i, e in enumerate(events):
+                g_new = np.asarray(e(t, Y, params), dtype=float)
+                hit = crossed(e, g[i], g_new) & active & np.isnan(t_events[i])
+                t_events[i, hit] = t
+                if getattr(e, 'terminal', False):
+                    frozen |= hit
+                g[i] = g_new
+            if frozen.any():
+                active &= ~frozen
+                idx = np.nonzero(active)[0]
+                sub_params = {k: v[idx] if np.ndim(v) else v for k, v in params.items()}
 
-    return np.array(t_vals), np.array(y_vals)
\ No newline at end of file
+    t_values, Y_values = out.finish(t, Y)
+    if not events:
+        return t_values, Y_values
+    return t_values, Y_values, {'t_events': t_events, 'terminated': ~active}
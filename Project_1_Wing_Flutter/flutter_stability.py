@@ -0,0 +1,174 @@
+import itertools
+
+import numpy as np
+
+def wing_flutter_state_matrix(params):
+    """
+    Build the state matrix A of the linear pitch-plunge system dy/dt = A y.
+
+    The entries are read off wing_flutter_rhs term by term (quasi-steady lift and moment on
+    alpha_eff = theta + h_dot / U, with theta_ddot using the coupled h_ddot), so A @ y equals
+    wing_flutter_rhs(t, y, params) for every state y.
+
+    Parameters:
+        params (dict): Same keys as wing_flutter_rhs. Values may be scalars or arrays of equal
+            shape S (e.g. from flutter_model.batch_params) to build many matrices at once.
+
+    Returns:
+        A (ndarray): State matrix, shape S + (4, 4), acting on [h, h_dot, theta, theta_dot].
+    """
+
+    rho, U, b = params['rho'], params['U'], params['b']
+    m, I_alpha, S_alpha = params['m'], params['I_alpha'], params['S_alpha']
+    k_h, k_theta = params['k_h'], params['k_theta']
+    CL_alpha, CM_alpha = params['CL_alpha'], params['CM_alpha']
+
+    shape = np.broadcast(rho, U, b, m, I_alpha, S_alpha, k_h, k_theta, CL_alpha, CM_alpha).shape
+    A = np.zeros(shape + (4, 4))
+
+    # Lift and moment per unit alpha_eff
+    q_L = rho * U**2 * b * CL_alpha
+    q_M = rho * U**2 * b**2 * CM_alpha
+
+    # h_ddot = (q_L * (theta + h_dot / U) - S_alpha * theta_dot - k_h * h) / m
+    hdd = np.stack(np.broadcast_arrays(-k_h / m, q_L / (U * m), q_L / m, -S_alpha / m), axis=-1)
+
+    # theta_ddot = (q_M * (theta + h_dot / U) - S_alpha * h_ddot - k_theta * theta) / I_alpha
+    own = np.stack(np.broadcast_arrays(0.0 * U, q_M / U, q_M - k_theta, 0.0 * U), axis=-1)
+    thdd = (own - np.expand_dims(S_alpha, -1) * hdd) / np.expand_dims(I_alpha, -1)
+
+    A[..., 0, 1] = 1.0
+    A[..., 1, :] = hdd
+    A[..., 2, 3] = 1.0
+    A[..., 3, :] = thdd
+    return A
+
+def sort_modes(lam):
+    """
+    Order eigenvalues so that the omega >= 0 member of each complex pair comes first, by
+    increasing frequency, followed by the conjugates.
+
+    Parameters:
+        lam (ndarray): Eigenvalues, shape (..., 4).
+
+    Returns:
+        lam (ndarray): Reordered eigenvalues; [..., :2] are the two aeroelastic modes.
+    """
+
+    key = np.where(lam.imag >= 0, 0, 1) * 1e12 + np.abs(lam.imag)
+    return np.take_along_axis(lam, np.argsort(key, axis=-1), axis=-1)
+
+def track_modes(modes):
+    """
+    Reorder modal eigenvalues along a parameter scan so each column follows one branch.
+
+    sort_modes orders by frequency at every point, so where two branches cross in frequency
+    the columns swap branches. Here each row is instead matched to the previous one by the
+    permutation with the smallest total eigenvalue change.
+
+    Parameters:
+        modes (ndarray): Eigenvalues along the scan, shape (N, k), e.g. sort_modes(...)[:, :2].
+
+    Returns:
+        modes (ndarray): The same eigenvalues with each row permuted, shape (N, k).
+    """
+
+    modes = np.array(modes)
+    perms = np.array(list(itertools.permutations(range(modes.shape[1]))))
+    for n in range(1, len(modes)):
+        cost = np.abs(modes[n][perms] - modes[n - 1]).sum(axis=1)
+        modes[n] = modes[n][perms[np.argmin(cost)]]
+    return modes
+
+def modal_analysis(params, U_values):
+    """
+    Compute modal frequencies and damping of the aeroelastic system across velocities.
+
+    For each U the eigenvalues lambda = sigma + i*omega of A(U) give the V-f and V-g data:
+    frequency f = |omega| / (2*pi) and damping ratio zeta = -sigma / |lambda| (negative zeta
+    means a growing mode). Column 0 is the lower-frequency (plunge-dominated) mode and
+    column 1 the pitch-dominated mode.
+
+    Parameters:
+        params (dict): Base parameters (U is overwritten).
+        U_values (ndarray): Freestream velocities, shape (N,).
+
+    Returns:
+        result (dict):
+            'U' (ndarray): The velocities, shape (N,).
+            'eigenvalues' (ndarray): Complex eigenvalues, shape (N, 4), see sort_modes.
+            'frequency' (ndarray): Modal frequencies in Hz, shape (N, 2).
+            'damping' (ndarray): Damping ratios, shape (N, 2).
+            'growth_rate' (ndarray): Modal real parts sigma in 1/s, shape (N, 2).
+    """
+
+    U_values = np.asarray(U_values, dtype=float)
+    lam = sort_modes(np.linalg.eigvals(wing_flutter_state_matrix(dict(params, U=U_values))))
+
+    modes = lam[:, :2]
+    return {
+        'U': U_values,
+        'eigenvalues': lam,
+        'frequency': np.abs(modes.imag) / (2 * np.pi),
+        'damping': -modes.real / np.maximum(np.abs(modes), 1e-300),
+        'growth_rate': modes.real,
+    }
+
+def flutter_speed(params, U_min=1.0, U_max=200.0, n_scan=200, tol=1e-8):
+    """
+    Locate the flutter onset speed, where a mode's eigenvalue crosses into Re(lambda) > 0.
+
+    A coarse modal scan over [U_min, U_max] brackets the first velocity at which a mode that was
+    stable becomes unstable, then bisection on that mode's real part narrows the bracket to tol.
+    The mode is followed by continuity (track_modes along the scan, then the eigenvalue nearest
+    to the one at the stable end of the bracket at each bisection step), so a frequency crossing
+    of the two modes cannot switch the bisection to the other branch. Modes that are already
+    unstable at U_min (for this quasi-steady model the pitch mode has negative aerodynamic
+    damping at any U > 0) are reported in info instead of being taken as the onset.
+
+    Parameters:
+        params (dict): Base parameters (U is overwritten).
+        U_min (float): Lower end of the search range (must be > 0).
+        U_max (float): Upper end of the search range.
+        n_scan (int): Number of velocities in the bracketing scan.
+        tol (float): Width of the final bracket in m/s.
+
+    Returns:
+        U_f (float): Flutter speed in m/s, or None if no mode crosses on the range.
+        info (dict):
+            'mode' (int): Index of the crossing mode (0 = plunge, 1 = pitch), or None.
+            'frequency' (float): Frequency of the crossing mode at U_f in Hz, or None.
+            'unstable_at_U_min' (list): Modes already growing at U_min.
+            'iterations' (int): Number of bisection steps.
+    """
+
+    def nearest_mode(U, lam_ref):
+        lam = sort_modes(np.linalg.eigvals(wing_flutter_state_matrix(dict(params, U=U))))[:2]
+        return lam[np.argmin(np.abs(lam - lam_ref))]
+
+    U_scan = np.linspace(U_min, U_max, n_scan)
+    modes = track_modes(modal_analysis(params, U_scan)['eigenvalues'][:, :2])
+    sigma = modes.real
+    info = {'mode': None, 'frequency': None,
+            'unstable_at_U_min': [int(k) for k in np.nonzero(sigma[0] > 0)[0]], 'iterations': 0}
+
+    crossing = (sigma[:-1] <= 0) & (sigma[1:] > 0)
+    if not crossing.any():
+        return None, info
+    i, mode = np.argwhere(crossing)[0]
+
+    lo, hi = U_scan[i], U_scan[i + 1]
+    lam_lo = modes[i, mode]
+    while hi - lo > tol:
+        mid = 0.5 * (lo + hi)
+        lam_mid = nearest_mode(mid, lam_lo)
+        if lam_mid.real > 0:
+            hi = mid
+        else:
+            lo, lam_lo = mid, lam_mid
+        info['iterations'] += 1
+
+    U_f = 0.5 * (lo + hi)
+    info['mode'] = int(mode)
+    info['frequency'] = float(abs(nearest_mode(U_f, lam_lo).imag) / (2 * np.pi))
+    return U_f, info
@@ -0,0 +1,331 @@
+import glob
+import hashlib
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from flutter_model import wing_flutter_rhs_batch, batch_params, rk4_solver_batch, wing_energy
+
+# Full parameter vector of one grid point, in cache key order
+PARAM_NAMES = ('rho', 'U', 'b', 'm', 'I_alpha', 'S_alpha', 'k_h', 'k_theta', 'CL_alpha', 'CM_alpha')
+
+# Per-point results stored in the cache and assembled into N-D arrays
+METRICS = ('max_theta', 'max_h', 'flutter')
+
+# Code that determines a point's result; any change here invalidates the point cache
+SOURCES = ['flutter_model.py', 'flutter_sweep.py']
+
+POINT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results', '.cache', 'points')
+
+def flutter_metrics(y_vals, params):
+    """
+    Compute the amplitude and energy-growth flutter criteria of a batched RK4 run.
+
+    Parameters:
+        y_vals (ndarray): States from rk4_solver_batch, shape (M, N, 4).
+        params (dict): Batched parameters of the run (scalars or (N,) arrays).
+
+    Returns:
+        metrics (dict):
+            'max_theta' (ndarray): max |theta(t)| per member, shape (N,).
+            'max_h' (ndarray): max |h(t)| per member, shape (N,).
+            'flutter' (ndarray): True where the energy grew by orders of magnitude.
+    """
+
+    max_theta_values = np.max(np.abs(y_vals[:, :, 2]), axis=0)
+    max_h_values = np.max(np.abs(y_vals[:, :, 0]), axis=0)
+
+    energy = wing_energy(y_vals, params)
+
+    initial = np.mean(energy[:10], axis=0)
+    mid = np.mean(energy[len(energy)//2 : len(energy)//2 + 10], axis=0)
+    final = np.mean(energy[-10:], axis=0)
+
+    energy_growth_flags = (
+        (final > 1e6 * initial) &
+        (mid > 1e5 * initial) &
+        (max_theta_values > 60)
+    )
+
+    return {'max_theta': max_theta_values, 'max_h': max_h_values, 'flutter': energy_growth_flags}
+
+def evaluate_points(points, y0, t_end, h):
+    """
+    Integrate a chunk of grid points as one RK4 batch and evaluate the flutter metrics.
+
+    Parameters:
+        points (ndarray): Parameter vectors, shape (n, len(PARAM_NAMES)).
+        y0 (list): Initial state [h, h_dot, theta, theta_dot].
+        t_end (float): End time of the integration.
+        h (float): RK4 step size.
+
+    Returns:
+        metrics (dict): As from flutter_metrics, each of shape (n,).
+    """
+
+    params = {name: points[:, i] for i, name in enumerate(PARAM_NAMES)}
+    _, y_vals = rk4_solver_batch(wing_flutter_rhs_batch, (0, t_end), y0, h, params)
+    return flutter_metrics(y_vals, params)
+
+def settings_key(y0, t_end, h):
+    """
+    Hash the solver settings and the model sources that every cached point depends on.
+
+    Returns:
+        key (str): 16 hex digits naming the point cache directory for these settings.
+    """
+
+    digest = hashlib.sha256()
+    digest.update(repr((list(map(float, y0)), float(t_end), float(h))).encode())
+    root = os.path.dirname(os.path.abspath(__file__))
+    for path in SOURCES:
+        with open(os.path.join(root, path), 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+def point_key(point):
+    """
+    Cache key of one parameter vector: every value rounded to 12 significant digits, so grids
+    that produce the same points up to round-off (e.g. np.linspace with another endpoint or
+    count) hit the same entries.
+    """
+
+    return tuple(float(f'{v:.12g}') for v in point)
+
+def load_point_cache(directory):
+    """
+    Read every stored chunk of a point cache directory. Unreadable chunks (e.g. left by an
+    interrupted write) are skipped; their points are simply computed again.
+
+    Returns:
+        cache (dict): point_key of the parameter vector -> tuple of metric values in METRICS order.
+    """
+
+    cache = {}
+    for path in sorted(glob.glob(os.path.join(directory, '*.npz'))):
+        if '.tmp' in os.path.basename(path):
+            continue
+        try:
+            with np.load(path) as data:
+                values = list(zip(*(data[name] for name in METRICS)))
+                keys = list(map(point_key, data['points']))
+        except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile):
+            continue
+        cache.update(zip(keys, values))
+    return cache
+
+def store_point_chunk(directory, points, metrics):
+    """
+    Write one computed chunk to the point cache, named by a hash of its points. The chunk is
+    written to a .tmp file first and renamed when complete, so readers never see a partial
+    .npz.
+    """
+
+    os.makedirs(directory, exist_ok=True)
+    name = hashlib.sha256(points.tobytes()).hexdigest()[:16]
+    tmp = os.path.join(directory, f'{name}.npz.tmp')
+    with open(tmp, 'wb') as f:
+        np.savez(f, points=points, **metrics)
+    os.replace(tmp, os.path.join(directory, f'{name}.npz'))
+
+def flutter_map(base_params, axes, y0, t_end=10.0, h=0.01, n_workers=None, chunk_size=256,
+                cache_dir=POINT_CACHE_DIR):
+    """
+    Evaluate the RK4 flutter criteria on the full grid spanned by several parameter axes.
+
+    The grid points missing from the per-point cache are split into chunks of chunk_size
+    points, each integrated as one batched RK4 run, and the chunks are distributed over a
+    process pool. Every finished chunk is stored at once, keyed by the full parameter vector
+    of each point and the solver settings, so an interrupted, repeated or extended sweep
+    (more values on an axis, a new axis) only computes the points it has not seen.
+
+    Parameters:
+        base_params (dict): Parameters shared by all points (the swept ones are overwritten).
+        axes (dict): Ordered mapping name -> 1D values, e.g. {'U': ..., 'S_alpha': ...}.
+        y0 (list): Initial state [h, h_dot, theta, theta_dot].
+        t_end (float): End time of each integration.
+        h (float): RK4 step size.
+        n_workers (int): Worker processes; None uses every CPU, 1 runs in this process.
+        chunk_size (int): Grid points per task.
+        cache_dir (str): Root of the point cache, or None to disable caching.
+
+    Returns:
+        result (dict):
+            'dims' (tuple): Axis names, in the order of the array dimensions.
+            'coords' (dict): Axis name -> values.
+            'max_theta', 'max_h', 'flutter' (ndarray): Metrics on the grid, shape of the axes.
+            'computed' (int): Number of points integrated in this call.
+            'cached' (int): Number of points read from the cache.
+    """
+
+    unknown = set(axes) - set(PARAM_NAMES)
+    if unknown:
+        raise ValueError(f"Unknown parameter axes: {sorted(unknown)}")
+
+    dims = tuple(axes)
+    coords = {name: np.asarray(values, dtype=float) for name, values in axes.items()}
+    shape = tuple(len(coords[name]) for name in dims)
+
+    grid = np.meshgrid(*(coords[name] for name in dims), indexing='ij')
+    points = np.empty((int(np.prod(shape)), len(PARAM_NAMES)))
+    for i, name in enumerate(PARAM_NAMES):
+        points[:, i] = grid[dims.index(name)].ravel() if name in coords else base_params[name]
+
+    directory = None if cache_dir is None else os.path.join(cache_dir, settings_key(y0, t_end, h))
+    cache = {} if directory is None else load_point_cache(directory)
+    keys = list(map(point_key, points))
+    todo = np.array([k not in cache for k in keys])
+
+    # Unique missing points only (axes may contain repeated values)
+    first = {}
+    for i in np.nonzero(todo)[0]:
+        first.setdefault(keys[i], i)
+    missing = points[sorted(first.values())]
+    chunks = [missing[i:i + chunk_size] for i in range(0, len(missing), chunk_size)]
+
+    def collect(chunk, metrics):
+        if directory is not None:
+            store_point_chunk(directory, chunk, metrics)
+        values = zip(*(metrics[name] for name in METRICS))
+        cache.update(zip(map(point_key, chunk), values))
+
+    n_workers = os.cpu_count() if n_workers is None else n_workers
+    if n_workers <= 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            collect(chunk, evaluate_points(chunk, y0, t_end, h))
+    else:
+        with ProcessPoolExecutor(max_workers=min(n_workers, len(chunks))) as pool:
+            futures = {pool.submit(evaluate_points, chunk, y0, t_end, h): chunk for chunk in chunks}
+            for future in as_completed(futures):
+                collect(futures[future], future.result())
+
+    result = {'dims': dims, 'coords': coords, 'computed': len(missing),
+              'cached': int(np.count_nonzero(~todo))}
+    for j, name in enumerate(METRICS):
+        values = np.array([cache[k][j] for k in keys])
+        result[name] = values.reshape(shape)
+    return result
+
+def flutter_boundary(result, axis='U'):
+    """
+    Reduce a flutter map to the onset value along one axis.
+
+    Parameters:
+        result (dict): Output of flutter_map.
+        axis (str): Axis along which to find the first flagged point (typically 'U').
+
+    Returns:
+        onset (ndarray): First axis value flagged as flutter (the lowest, for an increasing
+            axis) for every combination of the other axes, NaN where none is, with that axis
+            removed from the shape.
+    """
+
+    k = result['dims'].index(axis)
+    flags = np.moveaxis(result['flutter'], k, -1)
+    values = result['coords'][axis]
+    first = np.argmax(flags, axis=-1)
+    return np.where(flags.any(axis=-1), values[first], np.nan)
+
+def growth_rate(base_params, U_values, y0, t_end=3.0, h=0.01, skip=0.2):
+    """
+    Estimate the amplitude growth rate of short RK4 integrations at several velocities.
+
+    The system energy (wing_energy) grows like exp(2*sigma*t) once the fastest
+    growing mode dominates, so sigma is half the slope of a least-squares line through
+    log(energy) after the first `skip` fraction of the run. All velocities are integrated
+    together as one batch.
+
+    Parameters:
+        base_params (dict): Shared parameters (U is overwritten).
+        U_values (ndarray): Velocities, shape (N,).
+        y0 (list): Initial state [h, h_dot, theta, theta_dot].
+        t_end (float): Length of each integration (a few periods of the pitch mode).
+        h (float): RK4 step size.
+        skip (float): Fraction of the run discarded as the initial transient.
+
+    Returns:
+        sigma (ndarray): Growth rates in 1/s, shape (N,); negative for decaying motion.
+    """
+
+    params = batch_params(base_params, U=np.atleast_1d(U_values))
+    t_vals, y_vals = rk4_solver_batch(wing_flutter_rhs_batch, (0, t_end), y0, h, params)
+
+    energy = wing_energy(y_vals, params)
+
+    k = int(skip * len(t_vals))
+    slope = np.polyfit(t_vals[k:], np.log(energy[k:]), 1)[0]
+    return 0.5 * slope
+
+def search_flutter_onset(base_params, y0, threshold, U_min=1.0, U_max=100.0, tol=0.01, n_coarse=21,
+                         t_end=3.0, h=0.01, max_iter=50):
+    """
+    Locate the velocity at which the growth rate reaches `threshold`, with few integrations.
+
+    n_coarse evenly spaced velocities (one batched integration) bracket the first crossing of
+    growth_rate(U) = threshold; the bracket is then refined by regula falsi with the Illinois
+    modification (one short integration per iteration) until successive estimates agree to
+    tol. The growth rate is not monotonic over the whole range (it peaks and falls again at
+    high speed), so it is assumed to increase with U up to the onset: a ValueError is raised
+    if the coarse samples up to the bracket (or up to their maximum when the threshold is not
+    reached) decrease, since an earlier crossing could then lie between two of them. A
+    threshold only exceeded within one coarse spacing of a peak can still be missed.
+
+    Parameters:
+        base_params (dict): Shared parameters (U is overwritten).
+        y0 (list): Initial state [h, h_dot, theta, theta_dot].
+        threshold (float): Growth rate defining the onset, in 1/s.
+        U_min, U_max (float): Search range in m/s.
+        tol (float): Tolerance on the onset speed in m/s.
+        n_coarse (int): Velocities in the bracketing pass.
+        t_end, h (float): Integration length and RK4 step of each growth-rate estimate.
+        max_iter (int): Maximum refinement iterations.
+
+    Returns:
+        U_f (float): Onset speed in m/s, or None if the threshold is not reached on the range
+            (U_min itself if it is already exceeded there).
+        info (dict): 'integrations' (batched integrations run), 'evaluations' (velocities
+            integrated) and 'bracket' (final bracket).
+    """
+
+    U_coarse = np.linspace(U_min, U_max, n_coarse)
+    g_coarse = growth_rate(base_params, U_coarse, y0, t_end, h) - threshold
+    info = {'integrations': 1, 'evaluations': n_coarse, 'bracket': (U_min, U_max)}
+
+    above = np.nonzero(g_coarse > 0)[0]
+    last = above[0] if len(above) else np.argmax(g_coarse)
+    if np.any(np.diff(g_coarse[:last + 1]) <= 0):
+        raise ValueError("Growth rate is not increasing below the onset; increase n_coarse")
+    if len(above) == 0:
+        return None, info
+    if above[0] == 0:
+        info['bracket'] = (U_min, U_min)
+        return U_min, info
+
+    lo, hi = float(U_coarse[above[0] - 1]), float(U_coarse[above[0]])
+    g_lo, g_hi = g_coarse[above[0] - 1], g_coarse[above[0]]
+    U_new, side = hi, 0
+    for _ in range(max_iter):
+        U_prev = U_new
+        U_new = float((lo * g_hi - hi * g_lo) / (g_hi - g_lo))
+        g_new = growth_rate(base_params, [U_new], y0, t_end, h)[0] - threshold
+        info['integrations'] += 1
+        info['evaluations'] += 1
+
+        if g_new > 0:
+            hi, g_hi = U_new, g_new
+            if side == -1:
+                g_lo /= 2
+            side = -1
+        else:
+            lo, g_lo = U_new, g_new
+            if side == 1:
+                g_hi /= 2
+            side = 1
+
+        if abs(U_new - U_prev) < tol or hi - lo < tol:
+            break
+
+    info['bracket'] = (lo, hi)
+    return U_new, info
@@ -1,10 +1,10 @@
 import sys                                                                                         #
 import os                                                                                          #
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))                 #
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'results')            #
                                                                                                    #
-from flutter_model import wing_flutter_rhs, rk4_solver                                             #
+from flutter_fast import rk4_fast, expm_solver                                                     #
 import numpy as np                                                                                 #
-import matplotlib.pyplot as plt                                                                    #
 ####################################################################################################
 
 
@@ -33,30 +33,56 @@ t_span = (0, 2.0)
 
 
 # ###### RUN SIMULATION ##############################################################################
-# --- Reference Solution
-_, y_ref = rk4_solver(wing_flutter_rhs, t_span, y0, 1e-5, params)
-y_ref_final = y_ref[-1]
-
-# --- Run for different h
-hs = [0.2, 0.1, 0.05, 0.025, 0.0125]
-errors = []
-
-for h in hs:
-    _, y_vals = rk4_solver(wing_flutter_rhs, t_span, y0, h, params)
-    y_final = y_vals[-1]
-    err = np.linalg.norm(y_final - y_ref_final) / np.linalg.norm(y_ref_final)
-    errors.append(err)
-
-# --- Plot error vs h
-plt.figure(figsize=(10, 6))
-plt.loglog(hs, errors, 'o-', label='RK4 error')
-plt.loglog(hs, [e * (hs[0]/h)**4 for h, e in zip(hs, errors)], 's--', label='$\mathcal{O}(h^4)$')
-plt.xlabel('Time Step Size h', fontsize=14)
-plt.ylabel('Relative Error', fontsize=14)
-plt.title('RK4 Convergence for Wing Flutter Model')
-plt.grid(True, which='both')
-plt.xticks(hs, [h for h in hs])
-plt.legend(fontsize=14)
-plt.tight_layout()
-plt.show()
-plt.savefig("../results/convergence.png", dpi=300)
\ No newline at end of file
+def simulate(hs=(0.2, 0.1, 0.05, 0.025, 0.0125)):
+    """
+    Runs the RK4 step size convergence study and returns the relative final-state error per h.
+    """
+    # --- Reference Solution: the exact final state exp(A (tf - t0)) y0 of the linear model
+    _, y_ref = expm_solver(params, t_span, y0, t_span[1] - t_span[0], save_every=0)
+    y_ref_final = y_ref[-1]
+
+    # --- Run for different h
+    errors = []
+
+    for h in hs:
+        # rk4_fast takes the same steps as rk4_solver without the Python step loop
+        _, y_vals = rk4_fast(params, t_span, y0, h, save_every=0)
+        y_final = y_vals[-1]
+        err = np.linalg.norm(y_final - y_ref_final) / np.linalg.norm(y_ref_final)
+        errors.append(err)
+
+    return {"hs": np.array(hs), "errors": np.array(errors)}
+
+
+
+###### PLOT ########################################################################################
+def render(result, show=False):
+    """
+    Plots the error against h from the result of simulate().
+    """
+    import matplotlib.pyplot as plt
+
+    hs, errors = result["hs"], result["errors"]
+
+    # --- Plot error vs h
+    plt.figure(figsize=(10, 6))
+    plt.loglog(hs, errors, 'o-', label='RK4 error')
+    plt.loglog(hs, [e * (hs[0]/h)**4 for h, e in zip(hs, errors)], 's--', label=r'$\mathcal{O}(h^4)$')
+    plt.xlabel('Time Step Size h', fontsize=14)
+    plt.ylabel('Relative Error', fontsize=14)
+    plt.title('RK4 Convergence for Wing Flutter Model')
+    plt.grid(True, which='both')
+    plt.xticks(hs, [h for h in hs])
+    plt.legend(fontsize=14)
+    plt.tight_layout()
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    plt.savefig(os.path.join(RESULTS_DIR, "convergence.png"), dpi=300)
+
+    if show:
+        plt.show()
+
+
+
+###### ENTRY POINT #################################################################################
+if __name__ == "__main__":
+    render(simulate(), show=True)
@@ -1,12 +1,10 @@
 import sys                                                                                         #
 import os                                                                                          #
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))                 #
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'results')            #
                                                                                                    #
-from flutter_model import wing_flutter_rhs, rk4_solver                                             #
+from flutter_model import wing_flutter_rhs, rk45_solver                                            #
 import numpy as np                                                                                 #
-import matplotlib.pyplot as plt                                                                    #
-import matplotlib.animation as animation                                                           #
-from matplotlib.animation import PillowWriter                                                      #
 ####################################################################################################
 
 
@@ -29,77 +27,102 @@ params = {
 # --- Initial Conditions
 y0 = [0.01, 0.0, 0.05, 0.0]
 
-# --- 
-t_vals, y_vals = rk4_solver(wing_flutter_rhs, (0, 5), y0, h=0.01, params=params)
-h_vals = y_vals[:, 0]
-theta_vals = y_vals[:, 2]
-
 # --- Airfoil Geometry
 chord = 1.0
 x_airfoil = np.array([0, chord])
 y_base = np.array([0, 0])
 
+# --- Times of the six-frame figure
+capture_times = [0.0, 0.5, 1.0, 1.5, 2.0, 2.5]
 
 
-###### ANIMATION ###################################################################################
-# --- Plot Setup
-fig, ax = plt.subplots(figsize=(8, 4))
-ax.set_xlim(-0.2, 1.2)
-ax.set_ylim(-0.5, 0.5)
-ax.set_aspect('equal')
-ax.grid(True)
-line, = ax.plot([], [], 'k-', lw=3)
-time_text = ax.text(0.02, 0.9, '', transform=ax.transAxes)
-
-# --- Frame Update
-def update(frame):
-    h = h_vals[frame]
-    theta = theta_vals[frame]
+def simulate(U=params['U'], t_end=5.0, h=0.01):
+    """
+    Integrates the wing flutter system with adaptive RK45 and samples the plunge and pitch
+    histories every h seconds (animation frames) and at capture_times via dense output.
+    """
+    run_params = dict(params, U=U)
+    t_frames = np.linspace(0, t_end, int(round(t_end / h)) + 1)
+    t_capture = np.array([t for t in capture_times if t <= t_end])
+    t_eval = np.union1d(t_frames, t_capture)
+
+    t_vals, y_vals = rk45_solver(wing_flutter_rhs, (0, t_end), y0, run_params, t_eval=t_eval)
+    frames = np.searchsorted(t_vals, t_frames)
+    capture = np.searchsorted(t_vals, t_capture)
+    return {"t_vals": t_vals[frames], "h_vals": y_vals[frames, 0], "theta_vals": y_vals[frames, 2],
+            "capture_t": t_capture, "capture_h": y_vals[capture, 0],
+            "capture_theta": y_vals[capture, 2]}
+
+
+def airfoil_coords(h, theta):
+    """
+    Returns the chord line endpoints for plunge h and pitch theta (rotation about mid-chord).
+    """
     rot_matrix = np.array([[np.cos(theta), -np.sin(theta)],
                            [np.sin(theta),  np.cos(theta)]])
     coords = np.vstack((x_airfoil, y_base)).T - [0.5, 0]
-    rotated = coords @ rot_matrix.T + [0.5, h]
-    line.set_data(rotated[:, 0], rotated[:, 1])
-    time_text.set_text(f"t = {t_vals[frame]:.2f} s")
-    return line, time_text
+    return coords @ rot_matrix.T + [0.5, h]
 
-# --- Create and Save Animation
-ani = animation.FuncAnimation(fig, update, frames=len(t_vals), interval=30)
-ani.save("../results/flutter_animation.gif", writer=PillowWriter(fps=30))
 
 
+###### ANIMATION ###################################################################################
+def render(result, show=False):
+    """
+    Saves the wing motion animation and the six-frame figure from the result of simulate().
+    """
+    import matplotlib.pyplot as plt
+    import matplotlib.animation as animation
+    from matplotlib.animation import PillowWriter
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    t_vals, h_vals, theta_vals = result["t_vals"], result["h_vals"], result["theta_vals"]
+
+    # === Animation ===
+    # --- Plot Setup
+    fig, ax = plt.subplots(figsize=(8, 4))
+    ax.set_xlim(-0.2, 1.2)
+    ax.set_ylim(-0.5, 0.5)
+    ax.set_aspect('equal')
+    ax.grid(True)
+    line, = ax.plot([], [], 'k-', lw=3)
+    time_text = ax.text(0.02, 0.9, '', transform=ax.transAxes)
 
+    # --- Frame Update
+    def update(frame):
+        rotated = airfoil_coords(h_vals[frame], theta_vals[frame])
+        line.set_data(rotated[:, 0], rotated[:, 1])
+        time_text.set_text(f"t = {t_vals[frame]:.2f} s")
+        return line, time_text
 
-###### SPECIFIC FRAMES #############################################################################
-# --- Times to capture
-capture_times = [0.0, 0.5, 1.0, 1.5, 2.0, 2.5]
-chord = 1.0
-x_airfoil = np.array([0, chord])
-y_base = np.array([0, 0])
+    # --- Create and Save Animation
+    ani = animation.FuncAnimation(fig, update, frames=len(t_vals), interval=30)
+    ani.save(os.path.join(RESULTS_DIR, "flutter_animation.gif"), writer=PillowWriter(fps=30))
 
-# --- Create Figure
-fig, axes = plt.subplots(2, 3, figsize=(12, 6))
-axes = axes.flatten()
+    # === Specific Frames ===
+    # --- Create Figure
+    fig, axes = plt.subplots(2, 3, figsize=(12, 6))
+    axes = axes.flatten()
 
-for i, t_target in enumerate(capture_times):
-    idx = np.argmin(np.abs(t_vals - t_target))
-    h = h_vals[idx]
-    theta = theta_vals[idx]
+    for i, t_target in enumerate(result["capture_t"]):
+        rotated = airfoil_coords(result["capture_h"][i], result["capture_theta"][i])
+
+        ax = axes[i]
+        ax.plot(rotated[:, 0], rotated[:, 1], 'k-', lw=2)
+        ax.set_xlim(-0.2, 1.2)
+        ax.set_ylim(-0.5, 0.5)
+        ax.set_aspect('equal')
+        ax.set_title(f"t = {t_target:.1f} s")
+        ax.grid(True)
+
+    # --- Create and Save Image
+    plt.tight_layout()
+    plt.savefig(os.path.join(RESULTS_DIR, "6_frame_flutter.png"), dpi=300)
+
+    if show:
+        plt.show()
 
-    rot_matrix = np.array([[np.cos(theta), -np.sin(theta)],
-                            [np.sin(theta),  np.cos(theta)]])
-    coords = np.vstack((x_airfoil, y_base)).T - [0.5, 0]
-    rotated = coords @ rot_matrix.T + [0.5, h]
 
-    ax = axes[i]
-    ax.plot(rotated[:, 0], rotated[:, 1], 'k-', lw=2)
-    ax.set_xlim(-0.2, 1.2)
-    ax.set_ylim(-0.5, 0.5)
-    ax.set_aspect('equal')
-    ax.set_title(f"t = {t_target:.1f} s")
-    ax.grid(True)
 
-# --- Create and Save Image
-plt.tight_layout()
-plt.savefig("../results/6_frame_flutter.png", dpi=300)
-plt.show()
\ No newline at end of file
+###### ENTRY POINT #################################################################################
+if __name__ == "__main__":
+    render(simulate(), show=True)
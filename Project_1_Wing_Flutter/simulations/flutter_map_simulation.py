@@ -0,0 +1,74 @@
+import sys                                                                                         #
+import os                                                                                          #
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))                 #
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'results')            #
+                                                                                                   #
+from flutter_sweep import flutter_map, flutter_boundary                                            #
+import numpy as np                                                                                 #
+####################################################################################################
+
+
+###### SIMULATION PARAMETERS #######################################################################
+# --- Shared parameters
+base_params = {
+    'rho': 1.225,
+    'b': 0.5,
+    'm': 100.0,
+    'I_alpha': 20.0,
+    'S_alpha': 30.0,
+    'k_h': 5e4,
+    'k_theta': 2000.0,
+    'CL_alpha': 2 * np.pi,
+    'CM_alpha': -0.1 * 2 * np.pi
+}
+
+# --- Initial Conditions
+y0 = [0.01, 0.0, 0.01, 0.0]
+
+
+
+###### RUN SWEEP ###################################################################################
+def simulate(U_min=1.0, U_max=100.0, n_U=100, S_alpha_min=10.0, S_alpha_max=40.0, n_S_alpha=7,
+             k_theta_min=1000.0, k_theta_max=4000.0, n_k_theta=7, n_workers=0, chunk_size=256):
+    """
+    Maps the RK4 flutter onset speed over an (S_alpha, k_theta) grid; n_workers=0 uses every CPU.
+    """
+    axes = {
+        'S_alpha': np.linspace(S_alpha_min, S_alpha_max, n_S_alpha),
+        'k_theta': np.linspace(k_theta_min, k_theta_max, n_k_theta),
+        'U': np.linspace(U_min, U_max, n_U),
+    }
+    result = flutter_map(base_params, axes, y0, n_workers=n_workers or None, chunk_size=chunk_size)
+    print(f"[flutter_map] {result['computed']} points computed, {result['cached']} from cache")
+
+    return {"S_alpha": axes['S_alpha'], "k_theta": axes['k_theta'], "U_values": axes['U'],
+            "flutter": result['flutter'], "max_theta": result['max_theta'],
+            "flutter_U": flutter_boundary(result, 'U')}
+
+
+
+###### PLOT ########################################################################################
+def render(result, show=False):
+    """
+    Plots the flutter onset speed over the (S_alpha, k_theta) grid from the result of simulate().
+    """
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=(8, 6))
+    mesh = plt.pcolormesh(result["k_theta"], result["S_alpha"], result["flutter_U"], shading='nearest')
+    plt.colorbar(mesh, label='Major Flutter Onset U (m/s)')
+    plt.xlabel('Pitch Stiffness k_θ (N·m/rad)')
+    plt.ylabel('Static Imbalance S_α (kg·m)')
+    plt.title('Flutter Onset Map Using RK4')
+    plt.tight_layout()
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    plt.savefig(os.path.join(RESULTS_DIR, "flutter_map.png"), dpi=300)
+
+    if show:
+        plt.show()
+
+
+
+###### ENTRY POINT #################################################################################
+if __name__ == "__main__":
+    render(simulate(), show=True)
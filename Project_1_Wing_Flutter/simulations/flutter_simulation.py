@@ -1,10 +1,10 @@
 import sys                                                                                         #
 import os                                                                                          #
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))                 #
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'results')            #
                                                                                                    #
 from flutter_model import wing_flutter_rhs, rk45_solver                                            #
 import numpy as np                                                                                 #
-import matplotlib.pyplot as plt                                                                    #
 ####################################################################################################
 
 ###### SIMULATION PARAMETERS #######################################################################
@@ -29,18 +29,38 @@ y0 = [0.01, 0.0, 0.05, 0.0]
 t_span = (0, 10)
 
 ###### RUN SIMULATION ##############################################################################
-# --- Run
-t_vals, y_vals = rk45_solver(wing_flutter_rhs, t_span, y0, params)
-
-# --- Plot
-plt.figure(figsize=(10, 6))
-plt.plot(t_vals, y_vals[:, 0], label='Plunge h(t)')
-plt.plot(t_vals, y_vals[:, 2], label='Pitch θ(t)')
-plt.xlabel('Time (s)')
-plt.ylabel('Displacement')
-plt.title(f'Custom RK45 Wing Flutter Simulation (U = {params['U']} m/s)')
-plt.grid(True)
-plt.legend()
-plt.tight_layout()
-plt.show()
-plt.savefig("../results/flutter_sim.png", dpi=300)
\ No newline at end of file
+def simulate(U=params['U'], t_end=t_span[1]):
+    """
+    Integrates the wing flutter system with the adaptive RK45 solver at freestream velocity U.
+    """
+    run_params = dict(params, U=U)
+    t_vals, y_vals = rk45_solver(wing_flutter_rhs, (t_span[0], t_end), y0, run_params)
+    return {"U": U, "t_vals": t_vals, "y_vals": y_vals}
+
+###### PLOT ########################################################################################
+def render(result, show=False):
+    """
+    Plots h(t) and θ(t) from the result of simulate().
+    """
+    import matplotlib.pyplot as plt
+
+    t_vals, y_vals = result["t_vals"], result["y_vals"]
+
+    plt.figure(figsize=(10, 6))
+    plt.plot(t_vals, y_vals[:, 0], label='Plunge h(t)')
+    plt.plot(t_vals, y_vals[:, 2], label='Pitch θ(t)')
+    plt.xlabel('Time (s)')
+    plt.ylabel('Displacement')
+    plt.title(f'Custom RK45 Wing Flutter Simulation (U = {float(result["U"])} m/s)')
+    plt.grid(True)
+    plt.legend()
+    plt.tight_layout()
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    plt.savefig(os.path.join(RESULTS_DIR, "flutter_sim.png"), dpi=300)
+
+    if show:
+        plt.show()
+
+###### ENTRY POINT #################################################################################
+if __name__ == "__main__":
+    render(simulate(), show=True)
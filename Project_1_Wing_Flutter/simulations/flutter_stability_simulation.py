@@ -0,0 +1,84 @@
+import sys                                                                                         #
+import os                                                                                          #
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))                 #
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'results')            #
+                                                                                                   #
+from flutter_stability import modal_analysis, flutter_speed                                        #
+import numpy as np                                                                                 #
+####################################################################################################
+
+
+###### SIMULATION PARAMETERS #######################################################################
+# --- Shared parameters
+base_params = {
+    'rho': 1.225,
+    'b': 0.5,
+    'm': 100.0,
+    'I_alpha': 20.0,
+    'S_alpha': 30.0,
+    'k_h': 5e4,
+    'k_theta': 2000.0,
+    'CL_alpha': 2 * np.pi,
+    'CM_alpha': -0.1 * 2 * np.pi
+}
+
+
+
+###### RUN ANALYSIS ################################################################################
+def simulate(U_min=1.0, U_max=100.0, n_U=500):
+    """
+    Computes the V-g / V-f data from the eigenvalues of A(U) and the flutter speed by bisection.
+    """
+    # --- Modal data on the plotting grid
+    modes = modal_analysis(base_params, np.linspace(U_min, U_max, n_U))
+
+    # --- Onset of the first mode that goes unstable inside the range
+    flutter_U, info = flutter_speed(base_params, U_min=U_min, U_max=U_max)
+
+    return {"U_values": modes['U'], "frequency": modes['frequency'], "damping": modes['damping'],
+            "growth_rate": modes['growth_rate'],
+            "flutter_U": np.nan if flutter_U is None else flutter_U,
+            "flutter_mode": -1 if info['mode'] is None else info['mode']}
+
+
+
+###### PLOT ########################################################################################
+def render(result, show=False):
+    """
+    Plots the V-g and V-f diagrams from the result of simulate().
+    """
+    import matplotlib.pyplot as plt
+
+    U_values, flutter_U = result["U_values"], float(result["flutter_U"])
+    labels = ['Plunge mode', 'Pitch mode']
+
+    fig, (ax_g, ax_f) = plt.subplots(2, 1, figsize=(10, 8), sharex=True)
+    for k, label in enumerate(labels):
+        ax_g.plot(U_values, result["damping"][:, k], label=label)
+        ax_f.plot(U_values, result["frequency"][:, k], label=label)
+    ax_g.axhline(0.0, color='k', lw=0.8)
+
+    if not np.isnan(flutter_U):
+        for ax in (ax_g, ax_f):
+            ax.axvline(x=flutter_U, linestyle='--', color='red',
+                       label=f'{labels[int(result["flutter_mode"])]} Flutter ≈ {flutter_U:.3f} m/s')
+
+    ax_g.set_ylabel('Damping Ratio ζ')
+    ax_g.set_title('V-g / V-f Diagram from Eigenvalues of A(U)')
+    ax_f.set_xlabel('Freestream Velocity U (m/s)')
+    ax_f.set_ylabel('Frequency (Hz)')
+    for ax in (ax_g, ax_f):
+        ax.grid(True)
+        ax.legend()
+    plt.tight_layout()
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    plt.savefig(os.path.join(RESULTS_DIR, "stability_sim.png"), dpi=300)
+
+    if show:
+        plt.show()
+
+
+
+###### ENTRY POINT #################################################################################
+if __name__ == "__main__":
+    render(simulate(), show=True)
@@ -1,21 +1,30 @@
 import sys                                                                                         #
 import os                                                                                          #
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))                 #
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'results')            #
                                                                                                    #
-from flutter_model import wing_flutter_rhs, rk4_solver                                             #
+from flutter_model import wing_flutter_rhs_batch, batch_params, rk4_solver_batch, amplitude_event  #
+from flutter_sweep import flutter_metrics, search_flutter_onset                                    #
 import numpy as np                                                                                 #
-import matplotlib.pyplot as plt                                                                    #
 ####################################################################################################
 
 
 
 ###### FLUTTER ONSET ###############################################################################
-def detect_flutter(solver):
+def detect_flutter(solver, U_values, base_params, y0):
     """
     Sweeps a range of freestream velocities to detect flutter onset using the fixed-step RK4 solver.
 
+    All velocities are integrated together as one batch (one vectorized RHS call per RK4 stage
+    for the whole sweep), and the amplitude/energy checks are evaluated along the time axis for
+    every U at once. A terminal event stops each velocity once its pitch passes pitch_bound,
+    so divergent runs are not integrated further (their states stay frozen at that point).
+
     Parameters:
-    - solver: reference to rk4_solver
+    - solver: reference to rk4_solver_batch
+    - U_values: freestream velocities to sweep
+    - base_params: parameter dictionary shared by every velocity (U is overwritten)
+    - y0: initial state [h, h_dot, theta, theta_dot]
 
     For each velocity U:
     - Integrates the wing flutter system over time
@@ -23,42 +32,19 @@ def detect_flutter(solver):
     - Calculates system energy to identify unbounded growth (flutter)
 
     Returns:
-    - max_theta_values: list of max |θ(t)| for each U
-    - max_h_values: list of max |h(t)| for each U
-    - energy_growth_flags: list of booleans indicating flutter (True if energy grew significantly)
+    - max_theta_values: array of max |θ(t)| for each U
+    - max_h_values: array of max |h(t)| for each U
+    - energy_growth_flags: boolean array indicating flutter (True if energy grew significantly)
+    - stopped_flags: boolean array, True where the run was stopped at pitch_bound (its maxima
+      are then the values at the stop, i.e. lower bounds of the unbounded growth)
     """
-    max_theta_values = []
-    max_h_values = []
-    energy_growth_flags = []
-
-    for U in U_values:
-        params = base_params.copy()
-        params['U'] = U
-
-        t_vals, y_vals = solver(wing_flutter_rhs, (0, 10), y0, h=0.01, params=params)
-
-        max_theta = np.max(np.abs(y_vals[:, 2]))
-        max_h = np.max(np.abs(y_vals[:, 0]))
+    params = batch_params(base_params, U=U_values)
 
-        m, I, k_h, k_t = params['m'], params['I_alpha'], params['k_h'], params['k_theta']
-        h, h_dot, th, th_dot = y_vals[:, 0], y_vals[:, 1], y_vals[:, 2], y_vals[:, 3]
-        energy = 0.5 * m * h_dot**2 + 0.5 * k_h * h**2 + 0.5 * I * th_dot**2 + 0.5 * k_t * th**2
+    t_vals, y_vals, event_info = solver(wing_flutter_rhs_batch, (0, 10), y0, h=0.01, params=params,
+                                        events=[amplitude_event(2, pitch_bound)])
+    metrics = flutter_metrics(y_vals, params)
 
-        initial = np.mean(energy[:10])
-        mid = np.mean(energy[len(energy)//2 : len(energy)//2 + 10])
-        final = np.mean(energy[-10:])
-
-        is_growing = (
-            final > 1e6 * initial and
-            mid > 1e5 * initial and
-            max_theta > 60
-        )
-
-        max_theta_values.append(max_theta)
-        max_h_values.append(max_h)
-        energy_growth_flags.append(is_growing)
-        
-    return max_theta_values, max_h_values, energy_growth_flags
+    return metrics["max_theta"], metrics["max_h"], metrics["flutter"], event_info["terminated"]
 
 
 
@@ -79,29 +65,79 @@ base_params = {
 # --- Initial Conditions
 y0 = [0.01, 0.0, 0.01, 0.0]
 
-# --- Velocity Values
-U_values = np.linspace(1, 100, 100)
+# --- Growth rate (1/s) that marks major flutter for the boundary search; it reproduces the
+#     energy criterion of detect_flutter to within the 1 m/s spacing of the sweep
+major_flutter_growth = 1.2
+
+# --- Pitch amplitude (rad) at which a run is stopped; beyond the 60 rad of the energy criterion,
+#     so a stopped run is always flagged as flutter
+pitch_bound = 100.0
 
 
 
 ###### RUN SIMULATION ##############################################################################
-# --- Run RK4 solver across all U values
-rk4_theta, rk4_h, rk4_growth = detect_flutter(rk4_solver)
-
-# --- Plot
-plt.figure(figsize=(10, 6))
-plt.plot(U_values, rk4_theta, '--', label='Max θ(t)', alpha=0.7)
-plt.plot(U_values, rk4_h, '-', label='Max h(t)', alpha=0.7)
-
-flutter_U_rk4 = next((U for U, grow in zip(U_values, rk4_growth) if grow), None)
-if flutter_U_rk4:
-    plt.axvline(x=flutter_U_rk4, linestyle='--', color='red', label=f'Major Flutter Onset ≈ {flutter_U_rk4:.1f} m/s')
-
-plt.xlabel('Freestream Velocity U (m/s)')
-plt.ylabel('Max Displacement')
-plt.title('Flutter Detection Using RK4')
-plt.grid(True)
-plt.legend()
-plt.tight_layout()
-plt.show()
-plt.savefig("../results/velocity_sim.png", dpi=300)
\ No newline at end of file
+def simulate(U_min=1.0, U_max=100.0, n_U=100):
+    """
+    Runs the RK4 flutter sweep over n_U velocities and returns the amplitudes and onset speed.
+    """
+    # --- Velocity Values
+    U_values = np.linspace(U_min, U_max, n_U)
+
+    # --- Run RK4 solver across all U values
+    rk4_theta, rk4_h, rk4_growth, rk4_stopped = detect_flutter(rk4_solver_batch, U_values,
+                                                               base_params, y0)
+    flutter_U_rk4 = next((U for U, grow in zip(U_values, rk4_growth) if grow), np.nan)
+
+    # --- Adaptive boundary search on the growth rate (a handful of short integrations)
+    search_U, _ = search_flutter_onset(base_params, y0, threshold=major_flutter_growth,
+                                       U_min=U_min, U_max=U_max)
+
+    return {"U_values": U_values, "max_theta": np.array(rk4_theta), "max_h": np.array(rk4_h),
+            "stopped": np.array(rk4_stopped), "flutter_U": flutter_U_rk4,
+            "search_U": np.nan if search_U is None else search_U}
+
+
+
+###### PLOT ########################################################################################
+def render(result, show=False):
+    """
+    Plots the maximum amplitudes against U from the result of simulate().
+    """
+    import matplotlib.pyplot as plt
+
+    U_values, flutter_U_rk4 = result["U_values"], float(result["flutter_U"])
+
+    plt.figure(figsize=(10, 6))
+    plt.plot(U_values, result["max_theta"], '--', label='Max θ(t)', alpha=0.7)
+    plt.plot(U_values, result["max_h"], '-', label='Max h(t)', alpha=0.7)
+
+    # Runs stopped at the pitch bound: their maxima are the values at the stop, not the growth
+    stopped = result["stopped"]
+    if stopped.any():
+        plt.plot(U_values[stopped], result["max_theta"][stopped], 'x', color='gray',
+                 label=f'Stopped at |θ| = {pitch_bound:g} rad (lower bounds)')
+        plt.plot(U_values[stopped], result["max_h"][stopped], 'x', color='gray')
+
+    if not np.isnan(flutter_U_rk4):
+        plt.axvline(x=flutter_U_rk4, linestyle='--', color='red', label=f'Major Flutter Onset ≈ {flutter_U_rk4:.1f} m/s')
+    if not np.isnan(float(result["search_U"])):
+        plt.axvline(x=float(result["search_U"]), linestyle=':', color='black',
+                    label=f'Growth-Rate Search Onset ≈ {float(result["search_U"]):.2f} m/s')
+
+    plt.xlabel('Freestream Velocity U (m/s)')
+    plt.ylabel('Max Displacement')
+    plt.title('Flutter Detection Using RK4')
+    plt.grid(True)
+    plt.legend()
+    plt.tight_layout()
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    plt.savefig(os.path.join(RESULTS_DIR, "velocity_sim.png"), dpi=300)
+
+    if show:
+        plt.show()
+
+
+
+###### ENTRY POINT #################################################################################
+if __name__ == "__main__":
+    render(simulate(), show=True)
@@ -0,0 +1,33 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flutter_fast import expm_solver
+from flutter_stability import wing_flutter_state_matrix
+
+params = {
+    'rho': 1.225, 'U': 60.0, 'b': 0.5, 'm': 100.0, 'I_alpha': 20.0, 'S_alpha': 30.0,
+    'k_h': 5e4, 'k_theta': 2000.0, 'CL_alpha': 2 * np.pi, 'CM_alpha': -0.1 * 2 * np.pi
+}
+
+def exact_solution(t_values, y0):
+    lam, V = np.linalg.eig(wing_flutter_state_matrix(params))
+    c = np.linalg.solve(V, y0)
+    return np.array([(V @ (np.exp(lam * t) * c)).real for t in t_values])
+
+def test_expm_solver_scalar_params_many_states():
+    Y0 = np.random.default_rng(0).normal(scale=0.01, size=(5, 4))
+
+    for save_every in (1, 3, 0):
+        t_values, Y_values = expm_solver(params, (0, 1.05), Y0, 0.1, save_every=save_every)
+
+        assert Y_values.shape == (len(t_values), 5, 4)
+        for i in range(5):
+            _, y_single = expm_solver(params, (0, 1.05), Y0[i], 0.1, save_every=save_every)
+            np.testing.assert_array_equal(Y_values[:, i], y_single)
+
+            exact = exact_solution(t_values, Y0[i])
+            np.testing.assert_allclose(Y_values[:, i], exact, rtol=0, atol=1e-12 * np.abs(exact).max())
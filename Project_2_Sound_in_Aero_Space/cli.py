@@ -0,0 +1,335 @@
+###### IMPORTS ######################################################################################
+import argparse                                                                                     #
+import glob                                                                                         #
+import hashlib                                                                                      #
+import importlib                                                                                    #
+import inspect                                                                                      #
+import os                                                                                           #
+import subprocess                                                                                   #
+import sys                                                                                          #
+import time                                                                                         #
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))                                      #
+                                                                                                    #
+import numpy as np                                                                                  #
+#####################################################################################################
+
+
+
+### Scenario Registry ###############################################################################
+# The runner core (override parsing, result cache, startup check) is mirrored in                    
+# Project_1_Wing_Flutter/cli.py on purpose: the projects are installed and run                      
+# independently, so neither imports the other. Keep the shared parts in step.                       
+
+SCENARIOS = [                                                                                       
+    "pulse_in_box",                                                                                 
+    "speech_in_box",                                                                                
+    "pulse_in_room",                                                                                
+    "speech_in_room",                                                                               
+    "conversation_in_room",                                                                         
+    "tones_in_room",                                                                                
+    "talker_sweep_in_room",                                                                         
+    "speech_in_cabin_3d",                                                                           
+    "convergence_test",                                                                             
+]                                                                                                   
+
+# Modules that must not be imported before a render is requested                                    
+HEAVY_MODULES = ["matplotlib", "shapely"]                                                           
+
+# Physics code shared by all scenarios; any change here invalidates every cached result             
+MODEL_SOURCES = ["sound_model/*.py", "room_geometry/*.py", "room_geometry/layouts/*"]               
+
+# Cached results live next to the figures; large float arrays are stored as float32                 
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results", ".cache")           
+CACHE_FLOAT32_SIZE = 100_000                                                                        
+
+# Default wall-clock budget for "python cli.py startup" (interpreter + CLI + all scenarios)         
+STARTUP_BUDGET = 0.5                                                                                
+
+
+def load_scenario(name):                                                                            
+    """                                                                                             
+    Imports simulations/<name>.py, which provides simulate(**grid_params) -> dict of arrays         
+    and render(result, show=False).                                                                 
+    """                                                                                             
+    if name not in SCENARIOS:                                                                       
+        raise SystemExit(f"unknown scenario '{name}' (see 'python cli.py list')")                   
+    return importlib.import_module(f"simulations.{name}")                                           
+
+
+def parse_overrides(pairs):                                                                         
+    """                                                                                             
+    Converts ["Nx=301", "T=0.02"] into {"Nx": 301, "T": 0.02} for simulate().                       
+    """                                                                                             
+    overrides = {}                                                                                  
+    for pair in pairs or []:                                                                        
+        key, _, value = pair.partition("=")                                                         
+        number = float(value)                                                                       
+        overrides[key] = int(number) if number.is_integer() and "." not in value else number        
+    return overrides                                                                                
+#####################################################################################################
+
+
+
+### Result Cache ####################################################################################
+def cache_key(name, scenario, overrides):                                                           
+    """                                                                                             
+    Hashes everything that determines the result of simulate(): the scenario name, the full         
+    simulate() arguments (defaults included), the scenario source without render(), and the         
+    shared model/geometry sources. Editing render() keeps the key, so figures can be redrawn        
+    from the cache.                                                                                 
+    """                                                                                             
+    bound = inspect.signature(scenario.simulate).bind(**overrides)                                  
+    bound.apply_defaults()                                                                          
+                                                                                                    
+    source = inspect.getsource(scenario).split("\n")                                                
+    render_lines, start = inspect.getsourcelines(scenario.render)                                   
+    del source[start - 1:start - 1 + len(render_lines)]                                             
+                                                                                                    
+    digest = hashlib.sha256()                                                                       
+    digest.update(name.encode())                                                                    
+    digest.update(repr(sorted(bound.arguments.items())).encode())                                   
+    digest.update("\n".join(line.rstrip() for line in source).encode())                             
+                                                                                                    
+    root = os.path.dirname(os.path.abspath(__file__))                                               
+    for pattern in MODEL_SOURCES:                                                                   
+        for path in sorted(glob.glob(os.path.join(root, pattern))):                                 
+            digest.update(os.path.relpath(path, root).encode())                                     
+            with open(path, "rb") as f:                                                             
+                digest.update(f.read())                                                             
+    return digest.hexdigest()[:16]                                                                  
+
+
+def cache_path(name, key):                                                                          
+    return os.path.join(CACHE_DIR, f"{name}-{key}.npz")                                             
+
+
+def store_result(path, result):                                                                     
+    """                                                                                             
+    Writes a simulate() result as a compressed .npz; float64 arrays of CACHE_FLOAT32_SIZE           
+    elements or more (fields, frames, long trajectories) are stored as float32.                     
+    """                                                                                             
+    arrays = {}                                                                                     
+    for key, value in result.items():                                                               
+        value = np.asarray(value)                                                                   
+        if value.dtype == np.float64 and value.size >= CACHE_FLOAT32_SIZE:                          
+            value = value.astype(np.float32)                                                        
+        arrays[key] = value                                                                         
+    os.makedirs(os.path.dirname(path), exist_ok=True)                                               
+    np.savez_compressed(path, **arrays)                                                             
+
+
+def load_result(path):                                                                              
+    """                                                                                             
+    Reads a stored result back into a dict; 0-d arrays are returned as plain scalars.               
+    """                                                                                             
+    with np.load(path) as data:                                                                     
+        return {key: data[key][()] if data[key].ndim == 0 else data[key] for key in data.files}     
+#####################################################################################################
+
+
+
+### Preview #########################################################################################
+class PreviewStream:                                                                                
+    """                                                                                             
+    run_fdtd hook that writes a pressure image every `every` seconds of simulated time, so a        
+    coarse run can be watched while it is still stepping. matplotlib is imported on creation.       
+    """                                                                                             
+                                                                                                    
+    def __init__(self, directory, every):                                                           
+        import matplotlib                                                                           
+        matplotlib.use("Agg")                                                                       
+        import matplotlib.pyplot as plt                                                             
+                                                                                                    
+        self.plt = plt                                                                              
+        self.directory = directory                                                                  
+        self.every = every                                                                          
+        self.next_t = 0.0                                                                           
+        os.makedirs(directory, exist_ok=True)                                                       
+                                                                                                    
+    def __call__(self, n, t, p_n, p_np1):                                                           
+        if t < self.next_t:                                                                         
+            return                                                                                  
+        self.next_t += self.every                                                                   
+        vmax = np.max(np.abs(p_np1)) or 1.0                                                         
+                                                                                                    
+        fig, ax = self.plt.subplots(figsize=(8, 3.2))                                               
+        ax.imshow(p_np1.T, origin='lower', cmap='viridis', vmin=-vmax, vmax=vmax)                   
+        ax.set_title(f"Preview  t = {t * 1000:.2f} ms  (|p| max {vmax:.3g})")                       
+        ax.set_axis_off()                                                                           
+        path = os.path.join(self.directory, f"t_{t * 1000:06.2f}ms.png")                            
+        fig.savefig(path, dpi=100, bbox_inches='tight')                                             
+        self.plt.close(fig)                                                                         
+        print(f"[preview] {path}", flush=True)                                                      
+
+
+def coarse_overrides(scenario, overrides, factor):                                                  
+    """                                                                                             
+    Returns the simulate() arguments for a grid `factor` times coarser in each direction.           
+    With (N - 1) divisible by factor the coarse nodes coincide with every factor-th fine node;      
+    dt follows from the stability limit of the coarse spacing inside simulate(), and the mask,      
+    sources and capture times are rebuilt from the same physical geometry, positions and T.         
+    """                                                                                             
+    bound = inspect.signature(scenario.simulate).bind(**overrides)                                  
+    bound.apply_defaults()                                                                          
+    coarse = dict(overrides)                                                                        
+    for key in ("Nx", "Ny", "Nz"):                                                                  
+        if key in bound.arguments:                                                                  
+            coarse[key] = max((bound.arguments[key] - 1) // factor + 1, 3)                          
+    return coarse                                                                                   
+#####################################################################################################
+
+
+
+### Commands ########################################################################################
+def cmd_list(args):                                                                                 
+    for name in SCENARIOS:                                                                          
+        print(name)                                                                                 
+
+
+def cmd_run(args):                                                                                  
+    scenario = load_scenario(args.scenario)                                                         
+    overrides = parse_overrides(args.set)                                                           
+    path = cache_path(args.scenario, cache_key(args.scenario, scenario, overrides))                 
+                                                                                                    
+    if not args.no_cache and os.path.exists(path):                                                  
+        result = load_result(path)                                                                  
+        print(f"[{args.scenario}] loaded cached result {os.path.basename(path)}")                   
+    else:                                                                                           
+        t0 = time.perf_counter()                                                                    
+        result = scenario.simulate(**overrides)                                                     
+        print(f"[{args.scenario}] simulated in {time.perf_counter() - t0:.2f} s")                   
+        if not args.no_cache:                                                                       
+            store_result(path, result)                                                              
+                                                                                                    
+    if args.save:                                                                                   
+        np.savez_compressed(args.save, **result)                                                    
+        print(f"[{args.scenario}] saved result arrays to {args.save}")                              
+                                                                                                    
+    if args.render:                                                                                 
+        render_result(args.scenario, scenario, result)                                              
+
+
+def cmd_render(args):                                                                               
+    """                                                                                             
+    Redraws the figures of a previous run from the cache without simulating.                        
+    """                                                                                             
+    scenario = load_scenario(args.scenario)                                                         
+    path = cache_path(args.scenario, cache_key(args.scenario, scenario, parse_overrides(args.set))) 
+    if not os.path.exists(path):                                                                    
+        raise SystemExit(f"no cached result for {args.scenario} with these parameters "             
+                         f"(run 'python cli.py run {args.scenario}' first)")                        
+    render_result(args.scenario, scenario, load_result(path))                                       
+
+
+def cmd_preview(args):                                                                              
+    """                                                                                             
+    Runs the scenario on a coarse grid, streaming images to results/<scenario>/preview/, then       
+    (with --full) runs the requested resolution with the same sources and capture settings.         
+    """                                                                                             
+    scenario = load_scenario(args.scenario)                                                         
+    if "hooks" not in inspect.signature(scenario.simulate).parameters:                              
+        raise SystemExit(f"{args.scenario} does not support preview (simulate() takes no hooks)")   
+                                                                                                    
+    overrides = parse_overrides(args.set)                                                           
+    coarse = coarse_overrides(scenario, overrides, args.factor)                                     
+    directory = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results", args.scenario,  
+                             "preview")                                                             
+    grid = " x ".join(str(coarse[k]) for k in ("Nx", "Ny", "Nz") if k in coarse)                    
+    print(f"[{args.scenario}] preview on {grid} (1/{args.factor} resolution)")                      
+                                                                                                    
+    t0 = time.perf_counter()                                                                        
+    scenario.simulate(**coarse, hooks=[PreviewStream(directory, args.every * 1e-3)])                
+    print(f"[{args.scenario}] preview finished in {time.perf_counter() - t0:.2f} s")                
+                                                                                                    
+    if args.full:                                                                                   
+        cmd_run(args)                                                                               
+    else:                                                                                           
+        full = " ".join(f"--set {pair}" for pair in args.set or [])                                 
+        print(f"full run: python cli.py run {args.scenario} {full}".rstrip())                       
+
+
+def render_result(name, scenario, result):                                                          
+    import matplotlib                                                                               
+    matplotlib.use("Agg")                                                                           
+    t0 = time.perf_counter()                                                                        
+    scenario.render(result, show=False)                                                             
+    print(f"[{name}] rendered in {time.perf_counter() - t0:.2f} s")                                 
+
+
+def cmd_startup(args):                                                                              
+    """                                                                                             
+    Measures the cold start of the compute path in a fresh interpreter: importing this CLI          
+    and every scenario module, without running anything. Fails if it exceeds the budget or          
+    if a plotting/geometry library was imported.                                                    
+    """                                                                                             
+    probe = (                                                                                       
+        "import sys, time; t0 = time.perf_counter(); "                                              
+        f"sys.path.insert(0, {os.path.dirname(os.path.abspath(__file__))!r}); "                     
+        "import cli; [cli.load_scenario(s) for s in cli.SCENARIOS]; "                               
+        "print(time.perf_counter() - t0); "                                                         
+        "print(','.join(m for m in cli.HEAVY_MODULES if m in sys.modules))"                         
+    )                                                                                               
+    t0 = time.perf_counter()                                                                        
+    out = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True, check=True) 
+    wall = time.perf_counter() - t0                                                                 
+    import_time, loaded = out.stdout.split("\n")[:2]                                                
+                                                                                                    
+    print(f"imports: {float(import_time):.3f} s, total with interpreter: {wall:.3f} s "             
+          f"(budget {args.budget:.3f} s)")                                                          
+    if loaded:                                                                                      
+        raise SystemExit(f"startup imported render-only modules: {loaded}")                         
+    if wall > args.budget:                                                                          
+        raise SystemExit("startup budget exceeded")                                                 
+#####################################################################################################
+
+
+
+### Entry Point #####################################################################################
+def main(argv=None):                                                                                
+    parser = argparse.ArgumentParser(description="Headless runner for the sound simulations.")      
+    sub = parser.add_subparsers(dest="command", required=True)                                      
+                                                                                                    
+    sub.add_parser("list", help="list available scenarios").set_defaults(func=cmd_list)             
+                                                                                                    
+    run = sub.add_parser("run", help="run a scenario (compute only unless --render is given)")      
+    run.add_argument("scenario")                                                                    
+    run.add_argument("--set", action="append", metavar="KEY=VALUE",                                 
+                     help="override a simulate() parameter, e.g. --set Nx=301")                     
+    run.add_argument("--save", metavar="PATH.npz", help="write the result arrays to a .npz file")   
+    run.add_argument("--render", action="store_true", help="draw and save the figures")             
+    run.add_argument("--no-cache", action="store_true",                                             
+                     help="always simulate and do not write to results/.cache")                     
+    run.set_defaults(func=cmd_run)                                                                  
+                                                                                                    
+    render = sub.add_parser("render", help="redraw the figures from a cached run")                  
+    render.add_argument("scenario")                                                                 
+    render.add_argument("--set", action="append", metavar="KEY=VALUE",                              
+                        help="simulate() parameters of the cached run")                             
+    render.set_defaults(func=cmd_render)                                                            
+                                                                                                    
+    preview = sub.add_parser("preview", help="stream a coarse run, then optionally the full run")   
+    preview.add_argument("scenario")                                                                
+    preview.add_argument("--set", action="append", metavar="KEY=VALUE",                             
+                         help="simulate() parameters of the full run")                              
+    preview.add_argument("--factor", type=int, default=4,                                           
+                         help="grid coarsening factor per direction (default %(default)s)")         
+    preview.add_argument("--every", type=float, default=2.5, metavar="MS",                          
+                         help="simulated milliseconds between preview images (default %(default)s)")
+    preview.add_argument("--full", action="store_true", help="then run at full resolution")         
+    preview.add_argument("--save", metavar="PATH.npz", help="(--full) write the result arrays")     
+    preview.add_argument("--render", action="store_true", help="(--full) draw and save the figures")
+    preview.add_argument("--no-cache", action="store_true", help="(--full) bypass the result cache")
+    preview.set_defaults(func=cmd_preview)                                                          
+                                                                                                    
+    startup = sub.add_parser("startup", help="measure the compute-path startup time")               
+    startup.add_argument("--budget", type=float, default=STARTUP_BUDGET,                            
+                         help="maximum allowed seconds (default %(default)s)")                      
+    startup.set_defaults(func=cmd_startup)                                                          
+                                                                                                    
+    args = parser.parse_args(argv)                                                                  
+    args.func(args)                                                                                 
+
+
+if __name__ == "__main__":                                                                          
+    main()                                                                                          
+#####################################################################################################
@@ -1,20 +1,30 @@
 ###### IMPORTS ######################################################################################
+import json                                                                                         #
 import numpy as np                                                                                  #
-from shapely.geometry import Point, Polygon                                                         #
 #####################################################################################################
 
 
 
 ### Room Geometry ###################################################################################
+def get_room_vertices():                                                                            
+    """                                                                                             
+    Returns the (x, y) vertices of the outer boundary of the room.                                  
+    The room has an irregular shape with a cutout and non-rectangular structure.                    
+    """                                                                                             
+    return [                                                                                        
+        (1, 0), (15, 0), (15, 1), (14.5, 2), (14.5, 3),                                             
+        (15, 4), (15, 5), (0, 5), (0, 3), (1, 3)                                                    
+    ]                                                                                               
+
+
 def get_room_polygon():                                                                             
     """                                                                                             
     Returns a Shapely Polygon representing the outer boundary of the room.                          
-    The room has an irregular shape with a cutout and non-rectangular structure.                    
+    Shapely is imported here so that mask generation and plotting do not load it.                   
     """                                                                                             
-    return Polygon([                                                                                 
-        (1, 0), (15, 0), (15, 1), (14.5, 2), (14.5, 3),                                               
-        (15, 4), (15, 5), (0, 5), (0, 3), (1, 3)                                                      
-    ])                                                                                               
+    from shapely.geometry import Polygon                                                            
+                                                                                                    
+    return Polygon(get_room_vertices())                                                             
 #####################################################################################################
 
 
@@ -35,44 +45,365 @@ def get_pillars():
 
 
 
+### Geometry Loading ################################################################################
+def get_default_geometry():                                                                         
+    """                                                                                             
+    Returns the built-in room layout as a geometry dictionary.                                      
+    The room polygon and the square pillars are converted to the same format read by                
+    load_room_geometry(), so the default layout and file-driven layouts share one code path.        
+    """                                                                                             
+    return {                                                                                        
+        "room": {                                                                                   
+            "exterior": [list(pt) for pt in get_room_vertices()],                                   
+            "holes": []                                                                             
+        },                                                                                          
+        "obstacles": [                                                                              
+            {"type": "rectangle", "center": [px, py], "width": s, "height": s, "angle": 0.0}        
+            for (px, py, s) in get_pillars()                                                        
+        ]                                                                                           
+    }                                                                                               
+
+
+def load_room_geometry(path):                                                                       
+    """                                                                                             
+    Loads a cabin layout from a JSON file and returns it as a geometry dictionary.                  
+                                                                                                    
+    File layout:                                                                                    
+        {                                                                                           
+          "room":      {"exterior": [[x, y], ...], "holes": [[[x, y], ...], ...], "height": H},     
+          "obstacles": [                                                                            
+            {"type": "polygon",   "exterior": [[x, y], ...], "holes": [...]},                       
+            {"type": "rectangle", "center": [x, y], "width": w, "height": h, "angle": deg},         
+            {"type": "circle",    "center": [x, y], "radius": r}                                    
+          ]                                                                                         
+        }                                                                                           
+                                                                                                    
+    "holes" and "angle" are optional. Holes in the room are excluded from the domain                
+    (e.g. galleys or structural cutouts); obstacles are solid regions inside the room.              
+    For 3D runs, the room may give a ceiling "height" and any obstacle may give a                   
+    "z_range": [z_min, z_max] (e.g. seat backs or overhead bins); obstacles without a               
+    z_range span the full height.                                                                   
+                                                                                                    
+    Parameters:                                                                                     
+        path : str, path to the JSON layout file                                                    
+                                                                                                    
+    Returns:                                                                                        
+        geometry : dict with keys "room" and "obstacles"                                            
+    """                                                                                             
+    with open(path, "r") as f:                                                                      
+        data = json.load(f)                                                                         
+                                                                                                    
+    if "room" not in data or "exterior" not in data["room"]:                                        
+        raise ValueError(f"Layout file '{path}' must define room.exterior")                         
+                                                                                                    
+    geometry = {                                                                                    
+        "room": {                                                                                   
+            "exterior": _as_ring(data["room"]["exterior"]),                                         
+            "holes": [_as_ring(h) for h in data["room"].get("holes", [])]                           
+        },                                                                                          
+        "obstacles": []                                                                             
+    }                                                                                               
+    if "height" in data["room"]:                                                                    
+        geometry["room"]["height"] = float(data["room"]["height"])                                  
+                                                                                                    
+    for obs in data.get("obstacles", []):                                                           
+        kind = obs.get("type")                                                                      
+        if kind == "polygon":                                                                       
+            geometry["obstacles"].append({                                                          
+                "type": "polygon",                                                                  
+                "exterior": _as_ring(obs["exterior"]),                                              
+                "holes": [_as_ring(h) for h in obs.get("holes", [])]                                
+            })                                                                                      
+        elif kind == "rectangle":                                                                   
+            geometry["obstacles"].append({                                                          
+                "type": "rectangle",                                                                
+                "center": [float(v) for v in obs["center"]],                                        
+                "width": float(obs["width"]),                                                       
+                "height": float(obs["height"]),                                                     
+                "angle": float(obs.get("angle", 0.0))                                               
+            })                                                                                      
+        elif kind == "circle":                                                                      
+            geometry["obstacles"].append({                                                          
+                "type": "circle",                                                                   
+                "center": [float(v) for v in obs["center"]],                                        
+                "radius": float(obs["radius"])                                                      
+            })                                                                                      
+        else:                                                                                       
+            raise ValueError(f"Unknown obstacle type '{kind}' in layout file '{path}'")             
+                                                                                                    
+        if "z_range" in obs:                                                                        
+            geometry["obstacles"][-1]["z_range"] = [float(v) for v in obs["z_range"]]               
+                                                                                                    
+    return geometry                                                                                 
+
+
+def _as_ring(points):                                                                               
+    """                                                                                             
+    Converts a list of [x, y] vertices to an (N, 2) float array, dropping a repeated                
+    closing vertex if present.                                                                      
+    """                                                                                             
+    ring = np.asarray(points, dtype=float)                                                          
+    if ring.ndim != 2 or ring.shape[1] != 2 or len(ring) < 3:                                       
+        raise ValueError("Polygon rings need at least three [x, y] vertices")                       
+    if np.allclose(ring[0], ring[-1]):                                                              
+        ring = ring[:-1]                                                                            
+    return ring                                                                                     
+
+
+def _rectangle_ring(obs):                                                                           
+    """                                                                                             
+    Returns the four corners of a (possibly rotated) rectangle obstacle.                            
+    """                                                                                             
+    cx, cy = obs["center"]                                                                          
+    hw, hh = obs["width"] / 2, obs["height"] / 2                                                    
+    a = np.deg2rad(obs.get("angle", 0.0))                                                           
+    corners = np.array([[-hw, -hh], [hw, -hh], [hw, hh], [-hw, hh]])                                
+    rot = np.array([[np.cos(a), -np.sin(a)],                                                        
+                    [np.sin(a),  np.cos(a)]])                                                       
+    return corners @ rot.T + [cx, cy]                                                               
+
+
+def _obstacle_rings(obs, circle_segments=64):                                                       
+    """                                                                                             
+    Returns the boundary rings of an obstacle (circles are approximated by polygons).               
+    Used for plotting and for bounding boxes; rasterization treats circles exactly.                 
+    """                                                                                             
+    if obs["type"] == "polygon":                                                                    
+        rings = [obs["exterior"]] + list(obs.get("holes", []))                                      
+        return [np.asarray(ring, dtype=float) for ring in rings]                                    
+    if obs["type"] == "rectangle":                                                                  
+        return [_rectangle_ring(obs)]                                                               
+    if obs["type"] == "circle":                                                                     
+        phi = np.linspace(0, 2 * np.pi, circle_segments, endpoint=False)                            
+        cx, cy = obs["center"]                                                                      
+        r = obs["radius"]                                                                           
+        return [np.column_stack([cx + r * np.cos(phi), cy + r * np.sin(phi)])]                      
+    raise ValueError(f"Unknown obstacle type '{obs['type']}'")                                      
+#####################################################################################################
+
+
+
+### Scanline Rasterization ##########################################################################
+def _ring_parity(x, y, rings):                                                                      
+    """                                                                                             
+    Even-odd fill of a set of polygon rings on the grid x (axis 0) by y (axis 1).                   
+                                                                                                    
+    Every edge is intersected with all scanlines y_j at once. Each crossing toggles the             
+    cells to its right, so a running sum along x gives the crossing count and its parity            
+    marks the interior. Cost is O(edges * Ny + Nx * Ny) with no Python loop over cells.             
+                                                                                                    
+    Returns:                                                                                        
+        inside   : boolean array, True where the crossing parity is odd                             
+        boundary : boolean array, True for grid points lying on a ring edge                         
+    """                                                                                             
+    Nx, Ny = len(x), len(y)                                                                         
+    if Nx == 0 or Ny == 0:                                                                          
+        return np.zeros((Nx, Ny), dtype=bool), np.zeros((Nx, Ny), dtype=bool)                       
+    tol = 1e-9 * max(x[-1] - x[0], y[-1] - y[0], 1.0)                                               
+    counts = np.zeros((Nx + 1) * Ny, dtype=np.int64)                                                
+    edge_hits = np.zeros((Nx + 1) * Ny, dtype=np.int64)                                             
+                                                                                                    
+    for ring in rings:                                                                              
+        ring = np.asarray(ring, dtype=float)                                                        
+        x0, y0 = ring[:, 0], ring[:, 1]                                                             
+        x1, y1 = np.roll(x0, -1), np.roll(y0, -1)                                                   
+                                                                                                    
+        # Half-open rule: an edge crosses scanline y_j if exactly one end lies below it             
+        below0 = y0[:, None] <= y[None, :]                                                          
+        below1 = y1[:, None] <= y[None, :]                                                          
+        e_idx, j_idx = np.nonzero(below0 != below1)                                                 
+        if len(e_idx) > 0:                                                                          
+            t = (y[j_idx] - y0[e_idx]) / (y1[e_idx] - y0[e_idx])                                    
+            xc = x0[e_idx] + t * (x1[e_idx] - x0[e_idx])                                            
+            i_idx = np.searchsorted(x, xc, side='right')                                            
+            counts += np.bincount(i_idx * Ny + j_idx, minlength=(Nx + 1) * Ny)                      
+                                                                                                    
+            # Crossings that land on a grid point put that point on the boundary                    
+            for k in (i_idx - 1, i_idx):                                                            
+                ok = (k >= 0) & (k < Nx)                                                            
+                on = ok & (np.abs(x[np.clip(k, 0, Nx - 1)] - xc) <= tol)                            
+                edge_hits[k[on] * Ny + j_idx[on]] = 1                                               
+                                                                                                    
+        # Horizontal edges lying on a scanline mark a span of boundary points                       
+        flat = np.abs(y0 - y1) <= tol                                                               
+        e_idx, j_idx = np.nonzero(flat[:, None] & (np.abs(y0[:, None] - y[None, :]) <= tol))        
+        if len(e_idx) > 0:                                                                          
+            lo = np.minimum(x0[e_idx], x1[e_idx]) - tol                                             
+            hi = np.maximum(x0[e_idx], x1[e_idx]) + tol                                             
+            span = np.zeros((Nx + 1, Ny), dtype=np.int64)                                           
+            np.add.at(span, (np.searchsorted(x, lo, side='left'), j_idx), 1)                        
+            np.add.at(span, (np.searchsorted(x, hi, side='right'), j_idx), -1)                      
+            edge_hits += (np.cumsum(span, axis=0) > 0).ravel()                                      
+                                                                                                    
+    inside = (np.cumsum(counts.reshape(Nx + 1, Ny)[:Nx], axis=0) & 1).astype(bool)                  
+    boundary = edge_hits.reshape(Nx + 1, Ny)[:Nx] > 0                                               
+    return inside, boundary                                                                         
+
+
+def _circle_fill(x, y, cx, cy, r):                                                                  
+    """                                                                                             
+    Fills a closed disk on the grid using per-scanline spans written into a difference array.       
+    """                                                                                             
+    Nx, Ny = len(x), len(y)                                                                         
+    dy2 = r**2 - (y - cy)**2                                                                        
+    j_idx = np.nonzero(dy2 >= 0)[0]                                                                 
+    half = np.sqrt(dy2[j_idx])                                                                      
+    i_start = np.searchsorted(x, cx - half, side='left')                                            
+    i_end = np.searchsorted(x, cx + half, side='right')                                             
+                                                                                                    
+    diff = np.zeros((Nx + 1, Ny), dtype=np.int32)                                                   
+    np.add.at(diff, (i_start, j_idx), 1)                                                            
+    np.add.at(diff, (i_end, j_idx), -1)                                                             
+    return np.cumsum(diff, axis=0)[:Nx] > 0                                                         
+
+
+def _bbox_slices(x, y, xmin, xmax, ymin, ymax):                                                     
+    """                                                                                             
+    Returns the index slices of the grid points inside an axis-aligned bounding box.                
+    """                                                                                             
+    i0, i1 = np.searchsorted(x, xmin, side='left'), np.searchsorted(x, xmax, side='right')          
+    j0, j1 = np.searchsorted(y, ymin, side='left'), np.searchsorted(y, ymax, side='right')          
+    return slice(i0, i1), slice(j0, j1)                                                             
+
+
+def _obstacle_footprint(x, y, obs):                                                                 
+    """                                                                                             
+    Rasterizes a single obstacle (walls included) on the sub-grid of its bounding box.              
+                                                                                                    
+    Returns:                                                                                        
+        si, sj : index slices of the bounding box in the full grid                                  
+        solid  : boolean array of shape (len(x[si]), len(y[sj])), True inside the obstacle          
+    """                                                                                             
+    if obs["type"] == "circle":                                                                     
+        cx, cy = obs["center"]                                                                      
+        r = obs["radius"]                                                                           
+        si, sj = _bbox_slices(x, y, cx - r, cx + r, cy - r, cy + r)                                 
+        return si, sj, _circle_fill(x[si], y[sj], cx, cy, r)                                        
+                                                                                                    
+    rings = _obstacle_rings(obs)                                                                    
+    pts = rings[0]                                                                                  
+    si, sj = _bbox_slices(x, y, pts[:, 0].min(), pts[:, 0].max(),                                   
+                          pts[:, 1].min(), pts[:, 1].max())                                         
+    inside, boundary = _ring_parity(x[si], y[sj], rings)                                            
+    return si, sj, inside | boundary                                                                
+
+
+def rasterize_geometry(x, y, geometry):                                                             
+    """                                                                                             
+    Rasterizes a geometry dictionary onto a rectilinear grid.                                       
+                                                                                                    
+    The room (exterior plus holes) is filled with the even-odd rule over the full grid and          
+    points on its walls are excluded. Each obstacle is filled (walls included) on the               
+    sub-grid covering its bounding box only and removed from the domain, so overlapping or          
+    partially outside obstacles are handled correctly.                                              
+                                                                                                    
+    Parameters:                                                                                     
+        x, y     : 1D arrays of grid coordinates along axis 0 and axis 1 (increasing)               
+        geometry : dict as returned by load_room_geometry() or get_default_geometry()               
+                                                                                                    
+    Returns:                                                                                        
+        mask : boolean array of shape (len(x), len(y)), True inside the fluid domain                
+    """                                                                                             
+    x = np.asarray(x, dtype=float)                                                                  
+    y = np.asarray(y, dtype=float)                                                                  
+                                                                                                    
+    room = geometry["room"]                                                                         
+    inside, boundary = _ring_parity(x, y, [room["exterior"]] + list(room.get("holes", [])))         
+    mask = inside & ~boundary                                                                       
+                                                                                                    
+    for obs in geometry.get("obstacles", []):                                                       
+        si, sj, solid = _obstacle_footprint(x, y, obs)                                              
+        mask[si, sj] &= ~solid                                                                      
+                                                                                                    
+    return mask                                                                                     
+#####################################################################################################
+
+
+
 ### Domain Mask Generation ##########################################################################
-def generate_domain_mask_fast(X, Y):                                                                
+def generate_domain_mask_fast(X, Y, geometry=None):                                                 
     """                                                                                             
     Generates a boolean mask array matching the shape of X and Y coordinate grids.                  
-    Returns True for grid points inside the room and not inside any pillar.                         
+    Returns True for grid points inside the room and not inside any obstacle.                       
+                                                                                                    
+    X and Y are expected from np.meshgrid(x, y, indexing='ij'). When no geometry is                 
+    given, the built-in room and pillars from get_default_geometry() are used.                      
     """                                                                                             
-    room = get_room_polygon()                                                                        
-    mask = np.full(X.shape, False, dtype=bool)                                                       
+    if geometry is None:                                                                            
+        geometry = get_default_geometry()                                                           
+    return rasterize_geometry(X[:, 0], Y[0, :], geometry)                                           
+#####################################################################################################
 
-    for i in range(X.shape[0]):                                                                      
-        for j in range(X.shape[1]):                                                                  
-            pt = Point(X[i, j], Y[i, j])                                                              
-            if room.contains(pt):                                                                    
-                mask[i, j] = True                                                                     
 
-    for (px, py, s) in get_pillars():                                                                
-        in_x = (X >= px - s / 2) & (X <= px + s / 2)                                                 
-        in_y = (Y >= py - s / 2) & (Y <= py + s / 2)                                                 
-        mask[in_x & in_y] = False                                                                    
 
-    return mask                                                                                      
+### 3D Domain Mask Generation #######################################################################
+def generate_domain_mask_3d(x, y, z, geometry=None, height=None):                                   
+    """                                                                                             
+    Voxelizes the room geometry into a 3D boolean mask for the 3D FDTD solver.                      
+                                                                                                    
+    The room footprint is extruded between the floor (z = 0) and the ceiling; points on             
+    the floor and ceiling planes are walls. Obstacles are extruded over their optional              
+    "z_range" (full height if absent), so seats or overhead bins only block part of the             
+    cabin height. Each footprint is rasterized once and applied to its z-levels as a slice.         
+                                                                                                    
+    Parameters:                                                                                     
+        x, y, z  : 1D arrays of grid coordinates (increasing)                                       
+        geometry : geometry dictionary (default layout if None)                                     
+        height   : ceiling height; defaults to geometry["room"]["height"] or z[-1]                  
+                                                                                                    
+    Returns:                                                                                        
+        mask : boolean array of shape (len(z), len(x), len(y)), z-major to match the                
+               slab layout used by sound_model.FDTD_solver_3D                                       
+    """                                                                                             
+    if geometry is None:                                                                            
+        geometry = get_default_geometry()                                                           
+    x = np.asarray(x, dtype=float)                                                                  
+    y = np.asarray(y, dtype=float)                                                                  
+    z = np.asarray(z, dtype=float)                                                                  
+    if height is None:                                                                              
+        height = geometry["room"].get("height", z[-1])                                              
+                                                                                                    
+    room = geometry["room"]                                                                         
+    inside, boundary = _ring_parity(x, y, [room["exterior"]] + list(room.get("holes", [])))         
+    footprint = inside & ~boundary                                                                  
+                                                                                                    
+    tol = 1e-9 * max(height, 1.0)                                                                   
+    in_height = (z > tol) & (z < height - tol)                                                      
+    mask = np.zeros((len(z), len(x), len(y)), dtype=bool)                                           
+    mask[in_height] = footprint                                                                     
+                                                                                                    
+    for obs in geometry.get("obstacles", []):                                                       
+        z_min, z_max = obs.get("z_range", [-np.inf, np.inf])                                        
+        k0 = np.searchsorted(z, z_min - tol, side='left')                                           
+        k1 = np.searchsorted(z, z_max + tol, side='right')                                          
+        if k1 <= k0:                                                                                
+            continue                                                                                
+        si, sj, solid = _obstacle_footprint(x, y, obs)                                              
+        mask[k0:k1, si, sj] &= ~solid                                                               
+                                                                                                    
+    return mask                                                                                     
 #####################################################################################################
 
 
 
 ### Plotting Utilities ##############################################################################
-def plot_room_and_pillars(ax):                                                                      
+def plot_room_and_pillars(ax, geometry=None):                                                       
     """                                                                                             
-    Adds outlines of the room and pillars to a matplotlib Axes object.                              
-    Used for plotting wave fields over the room geometry.                                           
+    Adds outlines of the room and obstacles to a matplotlib Axes object.                            
+    Used for plotting wave fields over the room geometry; draws the same geometry                   
+    dictionary that was rasterized for the domain mask (default layout if None).                    
     """                                                                                             
-    room = get_room_polygon()                                                                        
-    x, y = room.exterior.xy                                                                          
-    ax.plot(x, y, color='red', linewidth=2)  # Room boundary                                         
-
-    for (px, py, s) in get_pillars():                                                                
-        half = s / 2                                                                                 
-        rect_x = [px - half, px + half, px + half, px - half, px - half]                             
-        rect_y = [py - half, py - half, py + half, py + half, py - half]                             
-        ax.plot(rect_x, rect_y, color='red', linewidth=2)  # Pillar outline                          
+    if geometry is None:                                                                            
+        geometry = get_default_geometry()                                                           
+                                                                                                    
+    room = geometry["room"]                                                                         
+    for ring in [room["exterior"]] + list(room.get("holes", [])):                                   
+        ring = np.asarray(ring, dtype=float)                                                        
+        closed = np.vstack([ring, ring[:1]])                                                        
+        ax.plot(closed[:, 0], closed[:, 1], color='red', linewidth=2)  # Room boundary              
+                                                                                                    
+    for obs in geometry.get("obstacles", []):                                                       
+        for ring in _obstacle_rings(obs):                                                           
+            closed = np.vstack([ring, ring[:1]])                                                    
+            ax.plot(closed[:, 0], closed[:, 1], color='red', linewidth=2)  # Obstacle outline       
 #####################################################################################################
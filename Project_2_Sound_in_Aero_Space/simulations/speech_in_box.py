@@ -2,155 +2,167 @@
 import sys                                                                                          #
 import os                                                                                           #
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))                  #
-os.makedirs("../results/speech_in_box", exist_ok=True)                                              #
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'results', 'speech_in_box')
                                                                                                     #
 import numpy as np                                                                                  #
-import matplotlib.pyplot as plt                                                                     #
-from matplotlib import animation                                                                    #
-from sound_model.FDTD_solver import fdtd_update                                                     #
-from sound_model.sources import speech_burst                                                        #
-from sound_model.utils import get_tick_labels                                                       #
+from sound_model.FDTD_solver import run_fdtd, stable_time_step                                      #
+from sound_model.sources import speech_burst, burst_end_time                                        #
+from sound_model.termination import ReceiverLevelStop                                               #
+from sound_model.monitors import FrameRecorder, QuantizedFrameRecorder, dequantize                  #
 #####################################################################################################
 
 
 
-### Simulation Parameters ###########################################################################
-# --- Grid and Simulation Parameters ---
-Lx, Ly = 5.0, 5.0
-Nx, Ny = 501, 501
-c = 343.0
-T = 0.050
-CFL = 0.4
-
-dx = Lx / (Nx - 1)
-dy = Ly / (Ny - 1)
-dt = CFL * min(dx, dy) / c
-Nt = int(T / dt)
-
-x = np.linspace(0, Lx, Nx)
-y = np.linspace(0, Ly, Ny)
-X, Y = np.meshgrid(x, y, indexing='ij')
-#####################################################################################################
-
-
-
-### Source Definition ###############################################################################
-# --- Speech Burst Parameters ---
-x0, y0 = 2.5, 2.5
-i_src = np.argmin(np.abs(x - x0))
-j_src = np.argmin(np.abs(y - y0))
-
-burst_params = [
-    {"t0": 0.005, "sigma": 0.002, "f": 300},
-    {"t0": 0.010, "sigma": 0.002, "f": 200},
-    {"t0": 0.015, "sigma": 0.0025, "f": 250}
-]
-#####################################################################################################
-
-
-
-### Initialization ##################################################################################
-p_nm1 = np.zeros((Nx, Ny))
-p_n   = np.zeros((Nx, Ny))
-
-snapshots = []
-frames = []
-
-snapshot_times = np.linspace(1e-5, T - 3e-5, 15)
-snapshot_indices = [int(t / dt) for t in snapshot_times]
-#####################################################################################################
-
-
-
-### Time-Stepping Loop ##############################################################################
-for n in range(Nt):
-    t = n * dt
-    p_np1 = fdtd_update(p_nm1, p_n, dx, dt, c)
-
-    val = speech_burst(t, burst_params)
-    p_np1[i_src, j_src] += val
-    p_nm1[i_src, j_src] += val
-
-    if n in snapshot_indices:
-        snapshots.append(p_np1.copy())
-    if n % 2 == 0:
-        frames.append(p_np1.copy())
-
-    p_nm1, p_n = p_n, p_np1
+### Simulation ######################################################################################
+def simulate(Nx=501, Ny=501, T=0.050, safety=0.95):
+    """
+    Runs a speech burst in a rigid square box and returns the captured fields.
+    """
+    # === Simulation Parameters ===
+    # --- Grid and Simulation Parameters ---
+    Lx, Ly = 5.0, 5.0
+    c = 343.0
+
+    dx = Lx / (Nx - 1)
+    dy = Ly / (Ny - 1)
+    dt = stable_time_step(c, dx, dy, safety=safety)
+    Nt = int(T / dt)
+
+    x = np.linspace(0, Lx, Nx)
+    y = np.linspace(0, Ly, Ny)
+
+    # === Source Definition ===
+    # --- Speech Burst Parameters ---
+    x0, y0 = 2.5, 2.5
+    i_src = np.argmin(np.abs(x - x0))
+    j_src = np.argmin(np.abs(y - y0))
+
+    burst_params = [
+        {"t0": 0.005, "sigma": 0.002, "f": 300},
+        {"t0": 0.010, "sigma": 0.002, "f": 200},
+        {"t0": 0.015, "sigma": 0.0025, "f": 250}
+    ]
+
+    # === Initialization ===
+    p_nm1 = np.zeros((Nx, Ny))
+    p_n   = np.zeros((Nx, Ny))
+
+    snapshot_times = np.linspace(1e-5, T - 3e-5, 15)
+    snapshots = FrameRecorder((Nx, Ny), [int(t / dt) for t in snapshot_times])
+    frames = QuantizedFrameRecorder((Nx, Ny), range(0, Nt, 2), frame_range=(-0.5, 0.5))
+
+    # --- Early Termination (listener quiet for 5 ms after the speech ends) ---
+    i_lst = np.argmin(np.abs(x - 1.0))
+    j_lst = np.argmin(np.abs(y - 2.5))
+    stop_criterion = ReceiverLevelStop([(i_lst, j_lst)], threshold=1e-3, window=int(0.005 / dt),
+                                       t_min=burst_end_time(burst_params))
+
+    # === Time-Stepping Loop ===
+    sources = [(i_src, j_src, lambda t: speech_burst(t, burst_params))]
+    p_nm1, p_n, run_info = run_fdtd(p_nm1, p_n, dx, dt, c, Nt, sources=sources,
+                                    dy=dy, hooks=[snapshots, frames],
+                                    stop_criterion=stop_criterion)
+    print(f"Run ended at t = {run_info['t_end'] * 1000:.2f} ms: {run_info['reason']}")
+
+    return {
+        "x": x, "y": y, "dt": dt,
+        "snapshots": snapshots.frames, "snapshot_times": snapshots.times[:snapshots.count],
+        "frames": frames.codes, "frame_range": np.array(frames.frame_range),
+    }
 #####################################################################################################
 
 
 
-### Plotting Parameters #############################################################################
-vmin, vmax = -0.08, 0.08
-tick_vals, tick_labels = get_tick_labels(vmin, vmax)
-levels = np.linspace(vmin, vmax, 100)
-
-plt.rcParams.update({
-    "font.size": 10,
-    "axes.titlesize": 10,
-    "axes.labelsize": 10,
-    "xtick.labelsize": 9,
-    "ytick.labelsize": 9,
-    "font.family": "serif",
-})
+### Rendering #######################################################################################
+def render(result, show=False):
+    """
+    Draws the snapshot grid and animation from the result of simulate().
+    """
+    import matplotlib.pyplot as plt
+    from matplotlib import animation
+    from sound_model.utils import get_tick_labels
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    X, Y = np.meshgrid(result["x"], result["y"], indexing='ij')
+    snapshots, snapshot_times = result["snapshots"], result["snapshot_times"]
+    frames, frame_range, dt = result["frames"], result["frame_range"], result["dt"]
+
+    # === Plotting Parameters ===
+    vmin, vmax = -0.08, 0.08
+    tick_vals, tick_labels = get_tick_labels(vmin, vmax)
+    levels = np.linspace(vmin, vmax, 100)
+
+    plt.rcParams.update({
+        "font.size": 10,
+        "axes.titlesize": 10,
+        "axes.labelsize": 10,
+        "xtick.labelsize": 9,
+        "ytick.labelsize": 9,
+        "font.family": "serif",
+    })
+
+    # === Snapshot Plot ===
+    fig, axes = plt.subplots(5, 3, figsize=(6.5, 9))
+    cbar_ax = fig.add_axes([0.92, 0.15, 0.015, 0.7])
+
+    for idx, (ax, snap, t) in enumerate(zip(axes.flat, snapshots, snapshot_times)):
+        ctf = ax.contourf(X, Y, snap, levels=levels, cmap='viridis', vmin=vmin, vmax=vmax)
+        ax.set_title(f"t = {t*1000:.2f} ms", pad=4)
+        ax.set_aspect('equal')
+
+        if idx % 3 == 0:
+            ax.set_ylabel("y")
+            ax.set_yticks([0, 1, 2, 3, 4, 5])
+        else:
+            ax.set_yticklabels([])
+
+        if idx // 3 == 4:
+            ax.set_xlabel("x")
+            ax.set_xticks([0, 1, 2, 3, 4, 5])
+        else:
+            ax.set_xticklabels([])
+
+    for i in range(len(snapshots), 15):
+        fig.delaxes(axes.flat[i])
+
+    cbar = fig.colorbar(ctf, cax=cbar_ax)
+    cbar.set_label("Pressure", fontsize=10)
+    cbar.ax.tick_params(labelsize=9)
+    cbar.set_ticks(tick_vals)
+    cbar.set_ticklabels(tick_labels)
+
+    fig.subplots_adjust(left=0.07, right=0.90, bottom=0.08, top=0.94, wspace=0.12, hspace=0.25)
+    plt.savefig(os.path.join(RESULTS_DIR, "snapshots.png"), dpi=300, bbox_inches='tight')
+
+    # === Animation ===
+    fig_anim, ax_anim = plt.subplots(figsize=(6, 5))
+    initial = ax_anim.contourf(X, Y, dequantize(frames[0], frame_range),
+                               levels=levels, cmap='viridis', vmin=vmin, vmax=vmax)
+
+    def update_plot(i):
+        ax_anim.clear()
+        frame = dequantize(frames[i], frame_range)
+        contour = ax_anim.contourf(X, Y, frame, levels=levels, cmap='viridis', vmin=vmin, vmax=vmax)
+        ax_anim.set_title(f"Speech Wave in Box\nTime = {i * 2 * dt * 1000:.2f} ms")
+        ax_anim.set_xlabel("x")
+        ax_anim.set_ylabel("y")
+        ax_anim.set_aspect('equal')
+        return [contour]
+
+    cbar = fig_anim.colorbar(initial, ax=ax_anim, label="Pressure")
+    cbar.set_ticks(tick_vals)
+    cbar.set_ticklabels(tick_labels)
+
+    ani = animation.FuncAnimation(fig_anim, update_plot, frames=len(frames), interval=50)
+    ani.save(os.path.join(RESULTS_DIR, "animation.gif"), writer="pillow", fps=30)
+
+    if show:
+        plt.show()
 #####################################################################################################
 
 
 
-### Snapshot Plot ###################################################################################
-fig, axes = plt.subplots(5, 3, figsize=(6.5, 9))                                                    
-cbar_ax = fig.add_axes([0.92, 0.15, 0.015, 0.7])                                                    
-
-for idx, (ax, snap, t) in enumerate(zip(axes.flat, snapshots, snapshot_times)):                    
-    ctf = ax.contourf(X, Y, snap, levels=levels, cmap='viridis', vmin=vmin, vmax=vmax)             
-    ax.set_title(f"t = {t*1000:.2f} ms", pad=4)                                                     
-    ax.set_aspect('equal')                                                                         
-
-    if idx % 3 == 0:                                                                               
-        ax.set_ylabel("y")                                                                         
-        ax.set_yticks([0, 1, 2, 3, 4, 5])                                                           
-    else:                                                                                           
-        ax.set_yticklabels([])                                                                      
-
-    if idx // 3 == 4:                                                                               
-        ax.set_xlabel("x")                                                                         
-        ax.set_xticks([0, 1, 2, 3, 4, 5])                                                           
-    else:                                                                                           
-        ax.set_xticklabels([])                                                                      
-
-for i in range(len(snapshots), 15):                                                                 
-    fig.delaxes(axes.flat[i])                                                                       
-
-cbar = fig.colorbar(ctf, cax=cbar_ax)                                                               
-cbar.set_label("Pressure", fontsize=10)                                                             
-cbar.ax.tick_params(labelsize=9)                                                                    
-cbar.set_ticks(tick_vals)                                                                           
-cbar.set_ticklabels(tick_labels)                                                                    
-
-fig.subplots_adjust(left=0.07, right=0.90, bottom=0.08, top=0.94, wspace=0.12, hspace=0.25)         
-plt.savefig("../results/speech_in_box/snapshots.png", dpi=300, bbox_inches='tight')                
-#####################################################################################################
-
-
-
-### Animation #######################################################################################
-fig_anim, ax_anim = plt.subplots(figsize=(6, 5))                                                    
-initial = ax_anim.contourf(X, Y, frames[0], levels=levels, cmap='viridis', vmin=vmin, vmax=vmax)   
-
-def update_plot(i):                                                                                 
-    ax_anim.clear()                                                                                 
-    contour = ax_anim.contourf(X, Y, frames[i], levels=levels, cmap='viridis', vmin=vmin, vmax=vmax)
-    ax_anim.set_title(f"Speech Wave in Box\nTime = {i * 2 * dt * 1000:.2f} ms")                     
-    ax_anim.set_xlabel("x")                                                                         
-    ax_anim.set_ylabel("y")                                                                         
-    ax_anim.set_aspect('equal')                                                                     
-    return contour.collections                                                                      
-
-cbar = fig_anim.colorbar(initial, ax=ax_anim, label="Pressure")                                    
-cbar.set_ticks(tick_vals)                                                                          
-cbar.set_ticklabels(tick_labels)                                                                   
-
-ani = animation.FuncAnimation(fig_anim, update_plot, frames=len(frames), interval=50)              
-ani.save("../results/speech_in_box/animation.gif", writer="pillow", fps=30)                        
+### Entry Point #####################################################################################
+if __name__ == "__main__":
+    render(simulate(), show=True)
 #####################################################################################################
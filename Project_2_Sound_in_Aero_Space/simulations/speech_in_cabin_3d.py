@@ -0,0 +1,170 @@
+###### SETUP ########################################################################################
+import sys                                                                                          #
+import os                                                                                           #
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))                  #
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'results', 'speech_in_cabin_3d')
+                                                                                                    #
+import numpy as np                                                                                  #
+from sound_model.FDTD_solver import stable_time_step, check_stability                               #
+from sound_model.FDTD_solver_3D import allocate_fields_3d, fdtd_update_3d, nearest_index_3d, sample_receivers_3d
+from sound_model.sources import speech_burst                                                        #
+from room_geometry.aero_space_geometry import generate_domain_mask_3d                               #
+#####################################################################################################
+
+
+
+### Simulation ######################################################################################
+def simulate(Nx=301, Ny=101, Nz=51, T=0.050, safety=0.95):
+    """
+    Runs a speech burst in the extruded 3D cabin and returns the source-height slices and
+    the receiver signals.
+    """
+    # === Simulation Parameters ===
+    # --- Grid and Simulation Parameters ---
+    Lx, Ly, H = 15.0, 5.0, 2.5
+    c = 343.0
+
+    dx = Lx / (Nx - 1)
+    dt = stable_time_step(c, dx, dx, dx, safety=safety)
+    Nt = int(T / dt)
+
+    x = np.linspace(0, Lx, Nx)
+    y = np.linspace(0, Ly, Ny)
+    z = np.linspace(0, H, Nz)
+    domain_mask = generate_domain_mask_3d(x, y, z, height=H)
+
+    # === Source and Receiver Definition ===
+    # --- Speech Burst Parameters ---
+    src = nearest_index_3d(x, y, z, (12.0, 2.5, 1.2))
+
+    burst_params = [
+        {"t0": 0.005, "sigma": 0.002, "f": 300},
+        {"t0": 0.010, "sigma": 0.002, "f": 200},
+        {"t0": 0.015, "sigma": 0.0025, "f": 250}
+    ]
+
+    # --- Receivers (seated ear height and standing height) ---
+    receiver_points = [(9.0, 2.5, 1.2), (6.0, 2.5, 1.2), (6.0, 2.5, 1.7), (3.0, 1.5, 1.2)]
+    receivers = [nearest_index_3d(x, y, z, pt) for pt in receiver_points]
+
+    # === Initialization ===
+    p_nm1, p_n = allocate_fields_3d(Nz, Nx, Ny)
+    work = np.empty((8, Nx - 2, Ny - 2), dtype=np.float32)
+
+    k_slice = src[0]
+    snapshots = []
+    receiver_traces = np.zeros((Nt, len(receivers)), dtype=np.float32)
+
+    snapshot_times = np.linspace(1e-5, T - 3e-5, 18)
+    snapshot_indices = set(int(t / dt) for t in snapshot_times)
+
+    # === Time-Stepping Loop ===
+    for n in range(Nt):
+        t = n * dt
+        p_np1 = fdtd_update_3d(p_nm1, p_n, dx, dt, c, domain_mask, work=work)
+        p_np1[src] += speech_burst(t, burst_params)
+        if n % 50 == 49:
+            check_stability(p_np1, n, t, limit=1e6)
+
+        receiver_traces[n] = sample_receivers_3d(p_np1, receivers)
+        if n in snapshot_indices:
+            snapshots.append(p_np1[k_slice].copy())
+
+        p_nm1, p_n = p_n, p_np1
+
+    return {
+        "x": x, "y": y, "z_slice": z[k_slice], "dt": dt,
+        "snapshots": np.array(snapshots), "snapshot_times": snapshot_times,
+        "receiver_points": np.array(receiver_points), "receiver_traces": receiver_traces,
+    }
+#####################################################################################################
+
+
+
+### Rendering #######################################################################################
+def render(result, show=False):
+    """
+    Draws the source-height snapshot grid and the receiver signals from the result of simulate().
+    """
+    import matplotlib.pyplot as plt
+    from sound_model.utils import get_tick_labels
+    from room_geometry.aero_space_geometry import plot_room_and_pillars
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    X, Y = np.meshgrid(result["x"], result["y"], indexing='ij')
+    snapshots, snapshot_times = result["snapshots"], result["snapshot_times"]
+    receiver_points, receiver_traces = result["receiver_points"], result["receiver_traces"]
+    dt = result["dt"]
+
+    # === Plotting Parameters ===
+    vmin, vmax = -0.010, 0.010
+    tick_vals, tick_labels = get_tick_labels(vmin, vmax)
+    levels = np.linspace(vmin, vmax, 100)
+
+    plt.rcParams.update({
+        "font.size": 10,
+        "axes.titlesize": 10,
+        "axes.labelsize": 10,
+        "xtick.labelsize": 9,
+        "ytick.labelsize": 9,
+        "font.family": "serif",
+    })
+
+    # === Snapshot Plot (Source Height Slice) ===
+    fig, axes = plt.subplots(6, 3, figsize=(6.5, 9))
+    cbar_ax = fig.add_axes([0.93, 0.15, 0.015, 0.7])
+
+    for idx, (ax, snap, t) in enumerate(zip(axes.flat, snapshots, snapshot_times)):
+        ctf = ax.contourf(X, Y, snap, levels=levels, cmap='viridis', vmin=vmin, vmax=vmax, extend='both')
+        plot_room_and_pillars(ax)
+        ax.set_title(f"t = {t*1000:.2f} ms", pad=4)
+        ax.set_aspect('equal')
+
+        if idx % 3 == 0:
+            ax.set_ylabel("y")
+            ax.set_yticks([0, 1, 2, 3, 4, 5])
+        else:
+            ax.set_yticklabels([])
+
+        if idx // 3 == 5:
+            ax.set_xlabel("x")
+            ax.set_xticks([0, 3, 6, 9, 12, 15])
+        else:
+            ax.set_xticklabels([])
+
+    for i in range(len(snapshots), 18):
+        fig.delaxes(axes.flat[i])
+
+    cbar = fig.colorbar(ctf, cax=cbar_ax)
+    cbar.set_label(f"Pressure (z = {result['z_slice']:.2f} m)")
+    cbar.ax.tick_params(labelsize=9)
+    cbar.set_ticks(tick_vals)
+    cbar.set_ticklabels(tick_labels)
+
+    fig.subplots_adjust(left=0.06, right=0.91, bottom=0.06, top=0.94, wspace=0.1, hspace=0.25)
+    plt.savefig(os.path.join(RESULTS_DIR, "snapshots.png"), dpi=300, bbox_inches='tight')
+
+    # === Receiver Signals ===
+    fig_rx, ax_rx = plt.subplots(figsize=(6.5, 3.5))
+    t_vals = np.arange(len(receiver_traces)) * dt * 1000
+    for trace, pt in zip(receiver_traces.T, receiver_points):
+        ax_rx.plot(t_vals, trace, lw=1, label=f"({pt[0]:.1f}, {pt[1]:.1f}, {pt[2]:.1f}) m")
+
+    ax_rx.set_xlabel("Time (ms)")
+    ax_rx.set_ylabel("Pressure")
+    ax_rx.set_title("Speech Wave in 3D Cabin - Receiver Signals")
+    ax_rx.grid(True)
+    ax_rx.legend(fontsize=8)
+    plt.tight_layout()
+    plt.savefig(os.path.join(RESULTS_DIR, "receivers.png"), dpi=300)
+
+    if show:
+        plt.show()
+#####################################################################################################
+
+
+
+### Entry Point #####################################################################################
+if __name__ == "__main__":
+    render(simulate(), show=True)
+#####################################################################################################
@@ -2,159 +2,191 @@
 import sys                                                                                          #
 import os                                                                                           #
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))                  #
-os.makedirs("../results/speech_in_room", exist_ok=True)                                             #
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'results', 'speech_in_room')
                                                                                                     #
 import numpy as np                                                                                  #
-import matplotlib.pyplot as plt                                                                     #
-from matplotlib import animation                                                                    #
-from sound_model.FDTD_solver import fdtd_update                                                     #
-from sound_model.sources import speech_burst                                                        #
-from sound_model.utils import get_tick_labels                                                       #
-from room_geometry.aero_space_geometry import generate_domain_mask_fast, plot_room_and_pillars      #
+from sound_model.FDTD_solver import run_fdtd, stable_time_step                                      #
+from sound_model.sources import speech_burst, burst_end_time                                        #
+from sound_model.termination import ReceiverLevelStop                                               #
+from sound_model.monitors import FieldStatistics, FrameRecorder, QuantizedFrameRecorder, dequantize #
+from room_geometry.aero_space_geometry import generate_domain_mask_fast                             #
 #####################################################################################################
 
 
 
-### Simulation Parameters ###########################################################################
-# --- Grid and Simulation Parameters ---
-Lx, Ly = 15.0, 5.0
-Nx, Ny = 601, 201
-c = 343.0
-T = 0.050
-CFL = 0.4
-
-dx = Lx / (Nx - 1)
-dy = Ly / (Ny - 1)
-dt = CFL * min(dx, dy) / c
-Nt = int(T / dt)
-
-x = np.linspace(0, Lx, Nx)
-y = np.linspace(0, Ly, Ny)
-X, Y = np.meshgrid(x, y, indexing='ij')
-domain_mask = generate_domain_mask_fast(X, Y)
+### Simulation ######################################################################################
+def simulate(Nx=601, Ny=201, T=0.050, safety=0.95, hooks=()):
+    """
+    Runs a single speech burst in the polygonal room and returns the captured fields.
+    """
+    # === Simulation Parameters ===
+    # --- Grid and Simulation Parameters ---
+    Lx, Ly = 15.0, 5.0
+    c = 343.0
+
+    dx = Lx / (Nx - 1)
+    dy = Ly / (Ny - 1)
+    dt = stable_time_step(c, dx, dy, safety=safety)
+    Nt = int(T / dt)
+
+    x = np.linspace(0, Lx, Nx)
+    y = np.linspace(0, Ly, Ny)
+    X, Y = np.meshgrid(x, y, indexing='ij')
+    domain_mask = generate_domain_mask_fast(X, Y)
+
+    # === Source Definition ===
+    # --- Speech Burst Parameters ---
+    x0, y0 = 12.0, 2.5
+    i_src = np.argmin(np.abs(x - x0))
+    j_src = np.argmin(np.abs(y - y0))
+
+    burst_params = [
+        {"t0": 0.005, "sigma": 0.002, "f": 300},
+        {"t0": 0.010, "sigma": 0.002, "f": 200},
+        {"t0": 0.015, "sigma": 0.0025, "f": 250}
+    ]
+
+    # === Initialization ===
+    p_nm1 = np.zeros((Nx, Ny))
+    p_n   = np.zeros((Nx, Ny))
+
+    snapshot_times = np.linspace(1e-5, T - 3e-5, 18)
+    snapshots = FrameRecorder((Nx, Ny), [int(t / dt) for t in snapshot_times])
+    frames = QuantizedFrameRecorder((Nx, Ny), range(0, Nt, 2), frame_range=(-0.5, 0.5))
+
+    # --- Early Termination (listener quiet for 5 ms after the speech ends) ---
+    i_lst = np.argmin(np.abs(x - 6.0))
+    j_lst = np.argmin(np.abs(y - 2.5))
+    stop_criterion = ReceiverLevelStop([(i_lst, j_lst)], threshold=1e-3, window=int(0.005 / dt),
+                                       t_min=burst_end_time(burst_params))
+
+    # --- Streaming Coverage Statistics (peak, RMS, first arrival) ---
+    stats = FieldStatistics((Nx, Ny), dt, threshold=1e-3, domain_mask=domain_mask)
+
+    # === Time-Stepping Loop ===
+    sources = [(i_src, j_src, lambda t: speech_burst(t, burst_params))]
+    p_nm1, p_n, run_info = run_fdtd(p_nm1, p_n, dx, dt, c, Nt, domain_mask, sources=sources,
+                                    dy=dy, hooks=[snapshots, frames, stats, *hooks],
+                                    stop_criterion=stop_criterion)
+    print(f"Run ended at t = {run_info['t_end'] * 1000:.2f} ms: {run_info['reason']}")
+
+    return {
+        "x": x, "y": y, "dt": dt,
+        "snapshots": snapshots.frames, "snapshot_times": snapshots.times[:snapshots.count],
+        "frames": frames.codes, "frame_range": np.array(frames.frame_range),
+        **{f"coverage_{name}": values for name, values in stats.export().items()},
+    }
 #####################################################################################################
 
 
 
-### Source Definition ###############################################################################
-# --- Speech Burst Parameters ---
-x0, y0 = 12.0, 2.5
-i_src = np.argmin(np.abs(x - x0))
-j_src = np.argmin(np.abs(y - y0))
-
-burst_params = [
-    {"t0": 0.005, "sigma": 0.002, "f": 300},
-    {"t0": 0.010, "sigma": 0.002, "f": 200},
-    {"t0": 0.015, "sigma": 0.0025, "f": 250}
-]
-#####################################################################################################
-
-
-
-### Initialization ##################################################################################
-p_nm1 = np.zeros((Nx, Ny))
-p_n   = np.zeros((Nx, Ny))
-
-snapshots = []
-frames = []
-
-snapshot_times = np.linspace(1e-5, T - 3e-5, 18)
-snapshot_indices = [int(t / dt) for t in snapshot_times]
+### Rendering #######################################################################################
+def render(result, show=False):
+    """
+    Draws the snapshot grid, coverage maps and animation from the result of simulate().
+    """
+    import matplotlib.pyplot as plt
+    from matplotlib import animation
+    from sound_model.utils import get_tick_labels
+    from sound_model.monitors import plot_statistic_map
+    from room_geometry.aero_space_geometry import plot_room_and_pillars
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    X, Y = np.meshgrid(result["x"], result["y"], indexing='ij')
+    snapshots, snapshot_times = result["snapshots"], result["snapshot_times"]
+    frames, frame_range, dt = result["frames"], result["frame_range"], result["dt"]
+
+    # === Plotting Parameters ===
+    vmin, vmax = -0.080, 0.080
+    tick_vals, tick_labels = get_tick_labels(vmin, vmax)
+    levels = np.linspace(vmin, vmax, 100)
+
+    plt.rcParams.update({
+        "font.size": 10,
+        "axes.titlesize": 10,
+        "axes.labelsize": 10,
+        "xtick.labelsize": 9,
+        "ytick.labelsize": 9,
+        "font.family": "serif",
+    })
+
+    # === Snapshot Plot ===
+    fig, axes = plt.subplots(6, 3, figsize=(6.5, 9))
+    cbar_ax = fig.add_axes([0.93, 0.15, 0.015, 0.7])
+
+    for idx, (ax, snap, t) in enumerate(zip(axes.flat, snapshots, snapshot_times)):
+        ctf = ax.contourf(X, Y, snap, levels=levels, cmap='viridis', vmin=vmin, vmax=vmax)
+        plot_room_and_pillars(ax)
+        ax.set_title(f"t = {t*1000:.2f} ms", pad=4)
+        ax.set_aspect('equal')
+
+        if idx % 3 == 0:
+            ax.set_ylabel("y")
+            ax.set_yticks([0, 1, 2, 3, 4, 5])
+        else:
+            ax.set_yticklabels([])
+
+        if idx // 3 == 5:
+            ax.set_xlabel("x")
+            ax.set_xticks([0, 3, 6, 9, 12, 15])
+        else:
+            ax.set_xticklabels([])
+
+    for i in range(len(snapshots), 18):
+        fig.delaxes(axes.flat[i])
+
+    cbar = fig.colorbar(ctf, cax=cbar_ax)
+    cbar.set_label("Pressure")
+    cbar.ax.tick_params(labelsize=9)
+    cbar.set_ticks(tick_vals)
+    cbar.set_ticklabels(tick_labels)
+
+    fig.subplots_adjust(left=0.06, right=0.91, bottom=0.06, top=0.94, wspace=0.1, hspace=0.25)
+    plt.savefig(os.path.join(RESULTS_DIR, "snapshots.png"), dpi=300, bbox_inches='tight')
+
+    # === Coverage Maps ===
+    rms, arrival = result["coverage_rms"], result["coverage_arrival"]
+    level_db = 20 * np.log10(np.maximum(rms, 1e-12) / np.nanmax(rms))
+
+    fig_cov, (ax_lvl, ax_arr) = plt.subplots(2, 1, figsize=(8, 6))
+    plot_statistic_map(ax_lvl, X, Y, np.clip(level_db, -40, 0), "RMS level (dB re max)",
+                       levels=np.linspace(-40, 0, 41))
+    plot_statistic_map(ax_arr, X, Y, arrival * 1000, "First arrival (ms)", cmap='viridis')
+    ax_lvl.set_title("Speech Coverage - RMS Level")
+    ax_arr.set_title("Speech Coverage - First Arrival Time")
+    plt.tight_layout()
+    plt.savefig(os.path.join(RESULTS_DIR, "coverage.png"), dpi=300)
+
+    # === Animation ===
+    fig_anim, ax_anim = plt.subplots(figsize=(10, 4))
+    initial = ax_anim.contourf(X, Y, dequantize(frames[0], frame_range),
+                               levels=levels, cmap='viridis', vmin=vmin, vmax=vmax)
+    plot_room_and_pillars(ax_anim)
+    cbar = fig_anim.colorbar(initial, ax=ax_anim, label="Pressure")
+    cbar.set_ticks(tick_vals)
+    cbar.set_ticklabels(tick_labels)
+
+    def update_plot(i):
+        ax_anim.clear()
+        frame = dequantize(frames[i], frame_range)
+        contour = ax_anim.contourf(X, Y, frame, levels=levels, cmap='viridis', vmin=vmin, vmax=vmax)
+        plot_room_and_pillars(ax_anim)
+        ax_anim.set_title(f"Speech Wave in Room\nTime = {i * 2 * dt * 1000:.2f} ms")
+        ax_anim.set_xlabel("x")
+        ax_anim.set_ylabel("y")
+        ax_anim.set_aspect('equal')
+        return [contour]
+
+    ani = animation.FuncAnimation(fig_anim, update_plot, frames=len(frames), interval=1000 / 30)
+    ani.save(os.path.join(RESULTS_DIR, "animation.gif"), writer="pillow", fps=30)
+
+    if show:
+        plt.show()
 #####################################################################################################
 
 
 
-### Time-Stepping Loop ##############################################################################
-for n in range(Nt):
-    t = n * dt
-    p_np1 = fdtd_update(p_nm1, p_n, dx, dt, c, domain_mask)
-
-    val = speech_burst(t, burst_params)
-    p_np1[i_src, j_src] += val
-    p_nm1[i_src, j_src] += val
-
-    if n in snapshot_indices:
-        snapshots.append(p_np1.copy())
-    if n % 2 == 0:
-        frames.append(p_np1.copy())
-
-    p_nm1, p_n = p_n, p_np1
-#####################################################################################################
-
-
-
-### Plotting Parameters #############################################################################
-vmin, vmax = -0.080, 0.080
-tick_vals, tick_labels = get_tick_labels(vmin, vmax)
-levels = np.linspace(vmin, vmax, 100)
-
-plt.rcParams.update({
-    "font.size": 10,
-    "axes.titlesize": 10,
-    "axes.labelsize": 10,
-    "xtick.labelsize": 9,
-    "ytick.labelsize": 9,
-    "font.family": "serif",
-})
-#####################################################################################################
-
-
-
-### Snapshot Plot ###################################################################################
-fig, axes = plt.subplots(6, 3, figsize=(6.5, 9))                                                    
-cbar_ax = fig.add_axes([0.93, 0.15, 0.015, 0.7])                                                    
-
-for idx, (ax, snap, t) in enumerate(zip(axes.flat, snapshots, snapshot_times)):                    
-    ctf = ax.contourf(X, Y, snap, levels=levels, cmap='viridis', vmin=vmin, vmax=vmax)             
-    plot_room_and_pillars(ax)                                                                      
-    ax.set_title(f"t = {t*1000:.2f} ms", pad=4)                                                     
-    ax.set_aspect('equal')                                                                         
-
-    if idx % 3 == 0:                                                                                
-        ax.set_ylabel("y")                                                                         
-        ax.set_yticks([0, 1, 2, 3, 4, 5])                                                           
-    else:                                                                                           
-        ax.set_yticklabels([])                                                                      
-
-    if idx // 3 == 5:                                                                               
-        ax.set_xlabel("x")                                                                         
-        ax.set_xticks([0, 3, 6, 9, 12, 15])                                                         
-    else:                                                                                           
-        ax.set_xticklabels([])                                                                      
-
-for i in range(len(snapshots), 18):                                                                 
-    fig.delaxes(axes.flat[i])                                                                       
-
-cbar = fig.colorbar(ctf, cax=cbar_ax)                                                               
-cbar.set_label("Pressure")                                                                          
-cbar.ax.tick_params(labelsize=9)                                                                    
-cbar.set_ticks(tick_vals)                                                                           
-cbar.set_ticklabels(tick_labels)                                                                    
-
-fig.subplots_adjust(left=0.06, right=0.91, bottom=0.06, top=0.94, wspace=0.1, hspace=0.25)           
-plt.savefig("../results/speech_in_room/snapshots.png", dpi=300, bbox_inches='tight')               
-#####################################################################################################
-
-
-
-### Animation #######################################################################################
-fig_anim, ax_anim = plt.subplots(figsize=(10, 4))                                                   
-initial = ax_anim.contourf(X, Y, frames[0], levels=levels, cmap='viridis', vmin=vmin, vmax=vmax)   
-plot_room_and_pillars(ax_anim)                                                                     
-cbar = fig_anim.colorbar(initial, ax=ax_anim, label="Pressure")                                    
-cbar.set_ticks(tick_vals)                                                                          
-cbar.set_ticklabels(tick_labels)                                                                   
-
-def update_plot(i):                                                                                 
-    ax_anim.clear()                                                                                 
-    contour = ax_anim.contourf(X, Y, frames[i], levels=levels, cmap='viridis', vmin=vmin, vmax=vmax)
-    plot_room_and_pillars(ax_anim)                                                                  
-    ax_anim.set_title(f"Speech Wave in Room\nTime = {i * 2 * dt * 1000:.2f} ms")                    
-    ax_anim.set_xlabel("x")                                                                         
-    ax_anim.set_ylabel("y")                                                                         
-    ax_anim.set_aspect('equal')                                                                     
-    return contour.collections                                                                      
-
-ani = animation.FuncAnimation(fig_anim, update_plot, frames=len(frames), interval=1000 / 30)        
-ani.save("../results/speech_in_room/animation.gif", writer="pillow", fps=30)                        
+### Entry Point #####################################################################################
+if __name__ == "__main__":
+    render(simulate(), show=True)
 #####################################################################################################
@@ -0,0 +1,115 @@
+###### SETUP ########################################################################################
+import sys                                                                                          #
+import os                                                                                           #
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))                  #
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'results', 'talker_sweep_in_room')
+                                                                                                    #
+import numpy as np                                                                                  #
+from sound_model.FDTD_solver import stable_time_step                                                #
+from sound_model.sources import speech_burst                                                        #
+from sound_model.reciprocity import candidate_cells, reciprocal_impulse_responses, apply_source_signal
+from room_geometry.aero_space_geometry import generate_domain_mask_fast                             #
+#####################################################################################################
+
+
+
+### Simulation ######################################################################################
+def simulate(Nx=601, Ny=201, T=0.050, safety=0.95):
+    """
+    Computes the speech level at a fixed listener seat for a raster of talker positions
+    with one reciprocal simulation.
+    """
+    # === Simulation Parameters ===
+    # --- Grid and Simulation Parameters ---
+    Lx, Ly = 15.0, 5.0
+    c = 343.0
+
+    dx = Lx / (Nx - 1)
+    dy = Ly / (Ny - 1)
+    dt = stable_time_step(c, dx, dy, safety=safety)
+    Nt = int(T / dt)
+
+    x = np.linspace(0, Lx, Nx)
+    y = np.linspace(0, Ly, Ny)
+    X, Y = np.meshgrid(x, y, indexing='ij')
+    domain_mask = generate_domain_mask_fast(X, Y)
+
+    # === Listener and Candidate Talkers ===
+    # --- Fixed Listener Seat ---
+    i_lst = np.argmin(np.abs(x - 6.0))
+    j_lst = np.argmin(np.abs(y - 2.5))
+
+    # --- Candidate Talker Positions (0.25 m raster over the room) ---
+    gx, gy = np.meshgrid(np.arange(0.25, Lx, 0.25), np.arange(0.25, Ly, 0.25), indexing='ij')
+    candidates, keep = candidate_cells(x, y, np.column_stack([gx.ravel(), gy.ravel()]), domain_mask)
+
+    burst_params = [
+        {"t0": 0.005, "sigma": 0.002, "f": 300},
+        {"t0": 0.010, "sigma": 0.002, "f": 200},
+        {"t0": 0.015, "sigma": 0.0025, "f": 250}
+    ]
+
+    # === Reciprocal Simulation (one run from the listener) ===
+    responses = reciprocal_impulse_responses((i_lst, j_lst), candidates, (Nx, Ny), dx, dt, c, Nt,
+                                             domain_mask, dy=dy)
+    received = apply_source_signal(responses, lambda t: speech_burst(t, burst_params), dt)
+
+    rms = np.sqrt(np.mean(received**2, axis=1))
+    print(f"{len(candidates)} talker positions from one run of {Nt} steps")
+
+    return {
+        "talker_x": x[candidates[:, 0]], "talker_y": y[candidates[:, 1]],
+        "listener": np.array([x[i_lst], y[j_lst]]), "rms": rms,
+    }
+#####################################################################################################
+
+
+
+### Rendering #######################################################################################
+def render(result, show=False):
+    """
+    Draws the listener level for every talker position from the result of simulate().
+    """
+    import matplotlib.pyplot as plt
+    from room_geometry.aero_space_geometry import plot_room_and_pillars
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    rms, listener = result["rms"], result["listener"]
+    level_db = 20 * np.log10(rms / rms.max())
+
+    # === Plotting Parameters ===
+    plt.rcParams.update({
+        "font.size": 10,
+        "axes.titlesize": 10,
+        "axes.labelsize": 10,
+        "xtick.labelsize": 9,
+        "ytick.labelsize": 9,
+        "font.family": "serif",
+    })
+
+    # === Listener Level vs. Talker Position ===
+    fig, ax = plt.subplots(figsize=(10, 4))
+    sc = ax.scatter(result["talker_x"], result["talker_y"], c=level_db, s=12, marker='s',
+                    cmap='magma', vmin=-30, vmax=0)
+    plot_room_and_pillars(ax)
+    ax.plot(listener[0], listener[1], marker='*', color='cyan', markersize=14, markeredgecolor='k',
+            label="Listener")
+    ax.set_title("Speech Level at Listener vs. Talker Position")
+    ax.set_xlabel("x")
+    ax.set_ylabel("y")
+    ax.set_aspect('equal')
+    ax.legend(loc='upper left', fontsize=8)
+    fig.colorbar(sc, ax=ax, label="RMS level at listener (dB re max)")
+    plt.tight_layout()
+    plt.savefig(os.path.join(RESULTS_DIR, "listener_level.png"), dpi=300)
+
+    if show:
+        plt.show()
+#####################################################################################################
+
+
+
+### Entry Point #####################################################################################
+if __name__ == "__main__":
+    render(simulate(), show=True)
+#####################################################################################################
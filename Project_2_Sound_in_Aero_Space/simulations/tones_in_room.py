@@ -0,0 +1,123 @@
+###### SETUP ########################################################################################
+import sys                                                                                          #
+import os                                                                                           #
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))                  #
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'results', 'tones_in_room')
+                                                                                                    #
+import numpy as np                                                                                  #
+from sound_model.FDTD_solver import run_fdtd, stable_time_step                                      #
+from sound_model.sources import tone                                                                #
+from sound_model.monitors import RunningDFT                                                         #
+from room_geometry.aero_space_geometry import generate_domain_mask_fast                             #
+#####################################################################################################
+
+
+
+### Simulation ######################################################################################
+def simulate(Nx=601, Ny=201, T=0.100, safety=0.95, hooks=()):
+    """
+    Drives the polygonal room with steady 200/250/300 Hz tones and returns the amplitude
+    and phase maps accumulated by a running DFT.
+    """
+    # === Simulation Parameters ===
+    # --- Grid and Simulation Parameters ---
+    Lx, Ly = 15.0, 5.0
+    c = 343.0
+
+    dx = Lx / (Nx - 1)
+    dy = Ly / (Ny - 1)
+    dt = stable_time_step(c, dx, dy, safety=safety)
+    Nt = int(T / dt)
+
+    x = np.linspace(0, Lx, Nx)
+    y = np.linspace(0, Ly, Ny)
+    X, Y = np.meshgrid(x, y, indexing='ij')
+    domain_mask = generate_domain_mask_fast(X, Y)
+
+    # === Source Definition ===
+    # --- Speech Components as Steady Tones ---
+    x0, y0 = 12.0, 2.5
+    i_src = np.argmin(np.abs(x - x0))
+    j_src = np.argmin(np.abs(y - y0))
+
+    frequencies = [200, 250, 300]
+    t_ramp = 0.010
+
+    # === Initialization ===
+    p_nm1 = np.zeros((Nx, Ny))
+    p_n   = np.zeros((Nx, Ny))
+
+    # --- Running DFT over the last 60 ms (a whole number of periods of all three tones) ---
+    t_window = 0.060
+    dft = RunningDFT((Nx, Ny), frequencies, dt, t_start=Nt * dt - t_window, domain_mask=domain_mask)
+
+    # === Time-Stepping Loop ===
+    sources = [(i_src, j_src, lambda t: tone(t, frequencies, t_ramp=t_ramp))]
+    p_nm1, p_n, run_info = run_fdtd(p_nm1, p_n, dx, dt, c, Nt, domain_mask, sources=sources,
+                                    dy=dy, hooks=[dft, *hooks])
+
+    return {
+        "x": x, "y": y, "frequencies": np.array(frequencies),
+        "amplitude": dft.amplitude(), "phase": dft.phase(),
+    }
+#####################################################################################################
+
+
+
+### Rendering #######################################################################################
+def render(result, show=False):
+    """
+    Draws the level and phase maps for every tone from the result of simulate().
+    """
+    import matplotlib.pyplot as plt
+    from room_geometry.aero_space_geometry import plot_room_and_pillars
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    X, Y = np.meshgrid(result["x"], result["y"], indexing='ij')
+    frequencies, amplitude, phase = result["frequencies"], result["amplitude"], result["phase"]
+
+    # === Plotting Parameters ===
+    level_db = 20 * np.log10(amplitude / np.nanmax(amplitude) + 1e-12)
+    db_levels = np.linspace(-40, 0, 41)
+    phase_levels = np.linspace(-np.pi, np.pi, 37)
+
+    plt.rcParams.update({
+        "font.size": 10,
+        "axes.titlesize": 10,
+        "axes.labelsize": 10,
+        "xtick.labelsize": 9,
+        "ytick.labelsize": 9,
+        "font.family": "serif",
+    })
+
+    # === Amplitude and Phase Maps ===
+    fig, axes = plt.subplots(len(frequencies), 2, figsize=(10, 2.2 * len(frequencies)))
+
+    for row, f in enumerate(frequencies):
+        ax_amp, ax_phase = axes[row]
+        ctf_amp = ax_amp.contourf(X, Y, np.clip(level_db[row], -40, 0), levels=db_levels, cmap='magma')
+        ctf_phase = ax_phase.contourf(X, Y, phase[row], levels=phase_levels, cmap='twilight')
+
+        for ax in (ax_amp, ax_phase):
+            plot_room_and_pillars(ax)
+            ax.set_aspect('equal')
+            ax.set_ylabel("y")
+        ax_amp.set_title(f"{f} Hz - Level (dB re max)", pad=4)
+        ax_phase.set_title(f"{f} Hz - Phase (rad)", pad=4)
+
+    axes[-1, 0].set_xlabel("x")
+    axes[-1, 1].set_xlabel("x")
+    fig.colorbar(ctf_amp, ax=axes[:, 0], label="Level (dB)", shrink=0.8)
+    fig.colorbar(ctf_phase, ax=axes[:, 1], label="Phase (rad)", shrink=0.8)
+    plt.savefig(os.path.join(RESULTS_DIR, "frequency_maps.png"), dpi=300, bbox_inches='tight')
+
+    if show:
+        plt.show()
+#####################################################################################################
+
+
+
+### Entry Point #####################################################################################
+if __name__ == "__main__":
+    render(simulate(), show=True)
+#####################################################################################################
@@ -4,21 +4,81 @@ import numpy as np
 
 
 
+### Time Step Selection #############################################################################
+# Largest eigenvalue (times h^2) of the 1D second-difference stencil of each spatial order          
+STENCIL_EIGENVALUE_BOUND = {2: 4.0, 4: 16.0 / 3.0}                                                  
+
+
+class InstabilityError(FloatingPointError):                                                         
+    """                                                                                             
+    Raised when the pressure field grows without bound during time stepping.                        
+    """                                                                                             
+
+
+def stable_time_step(c, dx, dy=None, dz=None, safety=0.95, order=2):                                
+    """                                                                                             
+    Returns the largest stable leapfrog time step for the given grid, times a safety factor.        
+                                                                                                    
+    The explicit leapfrog scheme is stable while (c*dt)^2 * lambda_max <= 4, where lambda_max       
+    is the largest eigenvalue of the discrete Laplacian. For a tensor-product stencil it is         
+    the sum of the 1D bounds, so                                                                    
+                                                                                                    
+        dt_max = 2 / (c * sqrt(sum_d K_order / h_d^2))                                              
+                                                                                                    
+    which for the 5-point stencil (K = 4) is the familiar 1 / (c * sqrt(1/dx^2 + 1/dy^2)),          
+    i.e. CFL = 1/sqrt(2) on a square 2D grid and 1/sqrt(3) on a cubic 3D grid.                      
+                                                                                                    
+    Parameters:                                                                                     
+        c      : wave speed                                                                         
+        dx     : grid spacing in x                                                                  
+        dy, dz : grid spacings in y and z (dy defaults to dx, dz=None means a 2D grid)              
+        safety : fraction of dt_max to use (< 1 keeps round-off growth bounded)                     
+        order  : spatial order of the Laplacian stencil (2 or 4)                                    
+                                                                                                    
+    Returns:                                                                                        
+        dt : time step size                                                                         
+    """                                                                                             
+    if order not in STENCIL_EIGENVALUE_BOUND:                                                       
+        raise ValueError(f"unsupported stencil order {order} (use 2 or 4)")                         
+    if not 0 < safety <= 1:                                                                         
+        raise ValueError(f"safety must be in (0, 1], got {safety}")                                 
+                                                                                                    
+    spacings = [dx, dx if dy is None else dy] + ([] if dz is None else [dz])                        
+    lam_max = sum(STENCIL_EIGENVALUE_BOUND[order] / h**2 for h in spacings)                         
+    return safety * 2.0 / (c * np.sqrt(lam_max))                                                    
+
+
+def check_stability(p, n, t, limit):                                                                
+    """                                                                                             
+    Raises InstabilityError if max |p| exceeds limit or the field contains NaN/inf.                 
+    """                                                                                             
+    peak = np.max(np.abs(p))                                                                        
+    if not peak <= limit:                                                                           
+        raise InstabilityError(                                                                     
+            f"pressure field blew up at step {n} (t = {t * 1000:.3f} ms): max |p| = {peak:.3g} "    
+            f"exceeds {limit:.3g}; reduce dt (see stable_time_step)")                               
+#####################################################################################################
+
+
+
 ### FDTD Update Function ###########################################################################
-def fdtd_update(p_nm1, p_n, dx, dt, c, domain_mask=None):                                           
+def fdtd_update(p_nm1, p_n, dx, dt, c, domain_mask=None, dy=None):                                  
     """                                                                                             
     Performs a single FDTD update step for the 2D scalar wave equation.                             
                                                                                                     
     Discretized update:                                                                             
-        p_np1[i,j] = 2*p_n[i,j] - p_nm1[i,j] + (c*dt/dx)^2 * Laplacian[p_n]                         
+        p_np1[i,j] = 2*p_n[i,j] - p_nm1[i,j] + (c*dt)^2 * Laplacian[p_n]                            
+                                                                                                    
+    with Laplacian = d2x/dx^2 + d2y/dy^2.                                                           
                                                                                                     
     Parameters:                                                                                     
         p_nm1 : ndarray, pressure field at time step n-1                                            
         p_n   : ndarray, pressure field at time step n                                              
-        dx    : spatial grid size (assumed square grid)                                             
+        dx    : spatial grid size in x                                                              
         dt    : time step size                                                                      
         c     : wave speed                                                                          
         domain_mask : optional boolean array (True = valid region)                                  
+        dy    : spatial grid size in y (defaults to dx)                                             
                                                                                                     
     Returns:                                                                                        
         p_np1 : ndarray, pressure field at next time step (n+1)                                     
@@ -27,14 +87,21 @@ def fdtd_update(p_nm1, p_n, dx, dt, c, domain_mask=None):
     p_np1 = np.zeros_like(p_n)                                                                       
 
     # --- Central Difference Laplacian -------------------------------------------------------------
-    p_np1[1:-1, 1:-1] = (                                                                            
-        2 * p_n[1:-1, 1:-1] - p_nm1[1:-1, 1:-1] +                                                     
-        (c * dt / dx)**2 * (                                                                         
-            p_n[2:, 1:-1] + p_n[:-2, 1:-1] +                                                          
-            p_n[1:-1, 2:] + p_n[1:-1, :-2] -                                                          
-            4 * p_n[1:-1, 1:-1]                                                                       
+    if dy is None or dy == dx:                                                                      
+        p_np1[1:-1, 1:-1] = (                                                                       
+            2 * p_n[1:-1, 1:-1] - p_nm1[1:-1, 1:-1] +                                               
+            (c * dt / dx)**2 * (                                                                    
+                p_n[2:, 1:-1] + p_n[:-2, 1:-1] +                                                    
+                p_n[1:-1, 2:] + p_n[1:-1, :-2] -                                                    
+                4 * p_n[1:-1, 1:-1]                                                                 
+            )                                                                                       
         )                                                                                            
-    )                                                                                                
+    else:                                                                                           
+        p_np1[1:-1, 1:-1] = (                                                                       
+            2 * p_n[1:-1, 1:-1] - p_nm1[1:-1, 1:-1] +                                               
+            (c * dt / dx)**2 * (p_n[2:, 1:-1] + p_n[:-2, 1:-1] - 2 * p_n[1:-1, 1:-1]) +             
+            (c * dt / dy)**2 * (p_n[1:-1, 2:] + p_n[1:-1, :-2] - 2 * p_n[1:-1, 1:-1])               
+        )                                                                                           
 
     # --- Dirichlet Boundary Conditions ------------------------------------------------------------
     p_np1[0, :] = p_np1[-1, :] = 0                                                                    
@@ -46,3 +113,60 @@ def fdtd_update(p_nm1, p_n, dx, dt, c, domain_mask=None):
 
     return p_np1                                                                                      
 #####################################################################################################
+
+
+
+### Time-Stepping Driver ############################################################################
+def run_fdtd(p_nm1, p_n, dx, dt, c, Nt, domain_mask=None, sources=None, hooks=None,                 
+             stop_criterion=None, dy=None, blowup_limit=1e6, check_every=50):                       
+    """                                                                                             
+    Runs up to Nt FDTD steps with point sources, per-step hooks and an optional stopping rule.      
+                                                                                                    
+    Each step n (time t = n*dt) computes p_np1 with fdtd_update(), adds every source value          
+    signal(t) at its grid point, then calls the hooks and the stopping criterion with the           
+    previous and new fields. Every check_every steps the new field is checked for blow-up           
+    (NaN/inf or max |p| > blowup_limit), which raises InstabilityError instead of silently          
+    producing garbage when dt is too large for the grid.                                            
+                                                                                                    
+    Parameters:                                                                                     
+        p_nm1, p_n     : ndarray, initial pressure fields at steps -1 and 0                         
+        dx, dt, c      : grid size in x, time step and wave speed (see stable_time_step)            
+        Nt             : maximum number of time steps                                               
+        domain_mask    : optional boolean array (True = valid region)                               
+        sources        : list of (i, j, signal) with signal(t) -> float                             
+        hooks          : list of callables hook(n, t, p_n, p_np1), e.g. snapshot capture            
+        stop_criterion : callable(n, t, p_n, p_np1) returning None to continue or a string          
+                         describing why the run should end (see sound_model.termination)            
+        dy             : grid size in y (defaults to dx)                                            
+        blowup_limit   : largest admissible |p|; None disables the stability check                  
+        check_every    : steps between stability checks                                             
+                                                                                                    
+    Returns:                                                                                        
+        p_nm1, p_n : ndarray, the last two pressure fields                                          
+        info       : dict with "steps" (steps taken), "t_end" and "reason" (why it ended)           
+    """                                                                                             
+    sources = sources or []                                                                         
+    hooks = hooks or []                                                                             
+    reason = f"completed all {Nt} steps"                                                            
+    steps = 0                                                                                       
+                                                                                                    
+    for n in range(Nt):                                                                             
+        t = n * dt                                                                                  
+        p_np1 = fdtd_update(p_nm1, p_n, dx, dt, c, domain_mask, dy)                                 
+        for (i, j, signal) in sources:                                                              
+            p_np1[i, j] += signal(t)                                                                
+        if blowup_limit is not None and n % check_every == check_every - 1:                         
+            check_stability(p_np1, n, t, blowup_limit)                                              
+                                                                                                    
+        for hook in hooks:                                                                          
+            hook(n, t, p_n, p_np1)                                                                  
+        steps = n + 1                                                                               
+                                                                                                    
+        stop = stop_criterion(n, t, p_n, p_np1) if stop_criterion is not None else None             
+        p_nm1, p_n = p_n, p_np1                                                                     
+        if stop:                                                                                    
+            reason = stop                                                                           
+            break                                                                                   
+                                                                                                    
+    return p_nm1, p_n, {"steps": steps, "t_end": steps * dt, "reason": reason}                      
+#####################################################################################################
@@ -0,0 +1,109 @@
+###### IMPORTS ######################################################################################
+import numpy as np                                                                                  #
+#####################################################################################################
+
+
+
+### Field Allocation ################################################################################
+def allocate_fields_3d(Nz, Nx, Ny, dtype=np.float32):                                               
+    """                                                                                             
+    Allocates the two pressure fields used by the 3D leapfrog scheme.                               
+                                                                                                    
+    Fields are stored z-major, shape (Nz, Nx, Ny): each z-slab is a contiguous stack of             
+    (Nx, Ny) planes laid out exactly like the 2D model. Only two time levels are kept               
+    because fdtd_update_3d() overwrites p_nm1 with p_np1 in place.                                  
+                                                                                                    
+    Returns:                                                                                        
+        p_nm1, p_n : zero-initialized arrays of shape (Nz, Nx, Ny)                                  
+    """                                                                                             
+    return np.zeros((Nz, Nx, Ny), dtype=dtype), np.zeros((Nz, Nx, Ny), dtype=dtype)                 
+#####################################################################################################
+
+
+
+### 3D FDTD Update Function #########################################################################
+def fdtd_update_3d(p_nm1, p_n, dx, dt, c, domain_mask=None, slab_size=8, work=None):                
+    """                                                                                             
+    Performs a single FDTD update step for the 3D scalar wave equation (7-point stencil).           
+                                                                                                    
+    Discretized update:                                                                             
+        p_np1[k,i,j] = 2*p_n[k,i,j] - p_nm1[k,i,j] + (c*dt/dx)^2 * Laplacian[p_n]                   
+                                                                                                    
+    The update is streamed in z-slabs of slab_size planes: the Laplacian of one slab is             
+    accumulated in a small work buffer and written back before moving on, so temporary              
+    memory is O(slab_size * Nx * Ny) instead of several full 3D arrays. The result                  
+    overwrites p_nm1 in place (each cell of p_nm1 is only read by its own update).                  
+                                                                                                    
+    Parameters:                                                                                     
+        p_nm1       : ndarray (Nz, Nx, Ny), pressure at step n-1; overwritten with step n+1         
+        p_n         : ndarray (Nz, Nx, Ny), pressure at step n                                      
+        dx          : spatial grid size (assumed cubic cells)                                       
+        dt          : time step size                                                                
+        c           : wave speed                                                                    
+        domain_mask : optional boolean array (True = valid region), either 3D (Nz, Nx, Ny)          
+                      or 2D (Nx, Ny), which is then applied to every z-level                        
+        slab_size   : number of z-planes updated per slab                                           
+        work        : optional preallocated buffer of shape (>= slab_size, Nx-2, Ny-2)              
+                                                                                                    
+    Returns:                                                                                        
+        p_np1 : ndarray, pressure field at next time step (n+1), the same object as p_nm1           
+    """                                                                                             
+    Nz, Nx, Ny = p_n.shape                                                                          
+    coef = p_n.dtype.type((c * dt / dx)**2)                                                         
+    if work is None or work.shape[0] < slab_size:                                                   
+        work = np.empty((slab_size, Nx - 2, Ny - 2), dtype=p_n.dtype)                               
+                                                                                                    
+    # --- Slab-Streamed 7-Point Laplacian ----------------------------------------------------------
+    for k0 in range(1, Nz - 1, slab_size):                                                          
+        k1 = min(k0 + slab_size, Nz - 1)                                                            
+        lap = work[:k1 - k0]                                                                        
+        center = p_n[k0:k1, 1:-1, 1:-1]                                                             
+                                                                                                    
+        np.multiply(center, -6, out=lap)                                                            
+        lap += p_n[k0 - 1:k1 - 1, 1:-1, 1:-1]                                                       
+        lap += p_n[k0 + 1:k1 + 1, 1:-1, 1:-1]                                                       
+        lap += p_n[k0:k1, 2:, 1:-1]                                                                 
+        lap += p_n[k0:k1, :-2, 1:-1]                                                                
+        lap += p_n[k0:k1, 1:-1, 2:]                                                                 
+        lap += p_n[k0:k1, 1:-1, :-2]                                                                
+        lap *= coef                                                                                 
+        lap += center                                                                               
+        lap += center                                                                               
+                                                                                                    
+        out = p_nm1[k0:k1, 1:-1, 1:-1]                                                              
+        np.subtract(lap, out, out=out)                                                              
+                                                                                                    
+        # --- Apply Domain Mask (if provided) ------------------------------------------------------
+        if domain_mask is not None:                                                                 
+            slab_mask = domain_mask[k0:k1] if domain_mask.ndim == 3 else domain_mask                
+            p_nm1[k0:k1] *= slab_mask                                                               
+                                                                                                    
+    # --- Dirichlet Boundary Conditions ------------------------------------------------------------
+    p_nm1[0] = p_nm1[-1] = 0                                                                        
+    p_nm1[:, 0, :] = p_nm1[:, -1, :] = 0                                                            
+    p_nm1[:, :, 0] = p_nm1[:, :, -1] = 0                                                            
+                                                                                                    
+    return p_nm1                                                                                    
+#####################################################################################################
+
+
+
+### Sources and Receivers ###########################################################################
+def nearest_index_3d(x, y, z, point):                                                               
+    """                                                                                             
+    Returns the (k, i, j) index of the grid point closest to point = (x0, y0, z0),                  
+    in the z-major order used by the 3D fields.                                                     
+    """                                                                                             
+    x0, y0, z0 = point                                                                              
+    return (int(np.argmin(np.abs(z - z0))),                                                         
+            int(np.argmin(np.abs(x - x0))),                                                         
+            int(np.argmin(np.abs(y - y0))))                                                         
+
+
+def sample_receivers_3d(p, receiver_indices):                                                       
+    """                                                                                             
+    Returns the pressure at a list of (k, i, j) receiver indices with a single gather.              
+    """                                                                                             
+    k, i, j = np.asarray(receiver_indices).T                                                        
+    return p[k, i, j]                                                                               
+#####################################################################################################
@@ -0,0 +1,346 @@
+###### IMPORTS ######################################################################################
+import zlib                                                                                         #
+                                                                                                    #
+import numpy as np                                                                                  #
+#####################################################################################################
+
+
+
+### Frame Recorder ##################################################################################
+class FrameRecorder:                                                                                
+    """                                                                                             
+    Stores copies of p_np1 at selected steps in one preallocated array.                             
+                                                                                                    
+    Replaces the "frames.append(p_np1.copy())" capture hooks: the frames are written into a         
+    (n_steps, Nx, Ny) array created with np.zeros (pages are only committed once written),          
+    so no list of arrays has to be stacked at the end. Pass an instance as a hook to                
+    run_fdtd().                                                                                     
+                                                                                                    
+    Parameters:                                                                                     
+        shape : grid shape (Nx, Ny) of the pressure field                                           
+        steps : step indices n at which p_np1 is stored                                             
+        dtype : storage type of the frames                                                          
+    """                                                                                             
+                                                                                                    
+    def __init__(self, shape, steps, dtype=np.float64):                                             
+        self.steps = sorted(set(int(n) for n in steps))                                             
+        self.slot = {n: k for k, n in enumerate(self.steps)}                                        
+        self.buffer = np.zeros((len(self.steps),) + tuple(shape), dtype=dtype)                      
+        self.times = np.zeros(len(self.steps))                                                      
+        self.count = 0                                                                              
+                                                                                                    
+    def __call__(self, n, t, p_n, p_np1):                                                           
+        k = self.slot.get(n)                                                                        
+        if k is not None:                                                                           
+            self.buffer[k] = p_np1                                                                  
+            self.times[k] = t                                                                       
+            self.count = k + 1                                                                      
+                                                                                                    
+    @property                                                                                       
+    def frames(self):                                                                               
+        """                                                                                         
+        Returns the frames recorded so far, shape (count, Nx, Ny).                                  
+        """                                                                                         
+        return self.buffer[:self.count]                                                             
+#####################################################################################################
+
+
+
+### Quantized Frame Recorder ########################################################################
+class QuantizedFrameRecorder:                                                                       
+    """                                                                                             
+    Stores p_np1 at selected steps as integer codes on a fixed [vmin, vmax] scale.                  
+                                                                                                    
+    Animation frames only need the resolution of the color map, so each captured frame is           
+    clipped to frame_range and rounded to one of the 2^8 (uint8) or 2^16 (int16) levels             
+    spanning it: 8x (uint8) or 4x (int16) less memory than float64 frames. With int16 and a         
+    range a few times wider than the color scale the quantization step stays far below one          
+    contour level. Pass an instance as a hook to run_fdtd(); renderers read frames through          
+    dequantize().                                                                                   
+                                                                                                    
+    With compress_chunk=k the codes are additionally kept as zlib-compressed blocks of k frames     
+    (only one block is held uncompressed), which shrinks the mostly quiet early/late frames of      
+    a run much further. frame(k) decodes a single frame in either mode.                             
+                                                                                                    
+    Parameters:                                                                                     
+        shape          : grid shape (Nx, Ny) of the pressure field                                  
+        steps          : step indices n at which p_np1 is stored                                    
+        frame_range    : (vmin, vmax) of the quantization scale; values outside are clipped         
+        dtype          : np.uint8 or np.int16                                                       
+        compress_chunk : optional number of frames per compressed block                             
+    """                                                                                             
+                                                                                                    
+    def __init__(self, shape, steps, frame_range, dtype=np.int16, compress_chunk=None):             
+        self.steps = sorted(set(int(n) for n in steps))                                             
+        self.slot = {n: k for k, n in enumerate(self.steps)}                                        
+        self.shape = tuple(shape)                                                                   
+        self.frame_range = (float(frame_range[0]), float(frame_range[1]))                           
+        self.dtype = np.dtype(dtype)                                                                
+        self.compress_chunk = compress_chunk                                                        
+        self.times = np.zeros(len(self.steps))                                                      
+        self.count = 0                                                                              
+                                                                                                    
+        rows = compress_chunk if compress_chunk else len(self.steps)                                
+        self.buffer = np.zeros((rows,) + self.shape, dtype=self.dtype)                              
+        self.blocks = []                                                                            
+        self.work = np.empty(self.shape, dtype=np.float32)                                          
+                                                                                                    
+    def __call__(self, n, t, p_n, p_np1):                                                           
+        k = self.slot.get(n)                                                                        
+        if k is None:                                                                               
+            return                                                                                  
+        row = k % self.compress_chunk if self.compress_chunk else k                                 
+        self.buffer[row] = quantize(p_np1, self.frame_range, self.dtype, work=self.work)            
+        self.times[k] = t                                                                           
+        self.count = k + 1                                                                          
+        if self.compress_chunk and row == self.compress_chunk - 1:                                  
+            self.blocks.append(zlib.compress(self.buffer.tobytes(), 1))                             
+                                                                                                    
+    def _block(self, b):                                                                            
+        if b < len(self.blocks):                                                                    
+            data = np.frombuffer(zlib.decompress(self.blocks[b]), dtype=self.dtype)                 
+            return data.reshape((self.compress_chunk,) + self.shape)                                
+        return self.buffer                                                                          
+                                                                                                    
+    def frame(self, k):                                                                             
+        """                                                                                         
+        Returns frame k as float32 pressure values.                                                 
+        """                                                                                         
+        if self.compress_chunk:                                                                     
+            codes = self._block(k // self.compress_chunk)[k % self.compress_chunk]                  
+        else:                                                                                       
+            codes = self.buffer[k]                                                                  
+        return dequantize(codes, self.frame_range)                                                  
+                                                                                                    
+    @property                                                                                       
+    def codes(self):                                                                                
+        """                                                                                         
+        Returns the integer codes of the frames recorded so far, shape (count, Nx, Ny).             
+        """                                                                                         
+        if not self.compress_chunk:                                                                 
+            return self.buffer[:self.count]                                                         
+        n_blocks = -(-self.count // self.compress_chunk)                                            
+        blocks = [self._block(b) for b in range(n_blocks)]                                          
+        return np.concatenate(blocks)[:self.count] if blocks else self.buffer[:0]                   
+                                                                                                    
+    @property                                                                                       
+    def nbytes(self):                                                                               
+        """                                                                                         
+        Returns the memory held by the stored frames in bytes.                                      
+        """                                                                                         
+        return self.buffer.nbytes + sum(len(block) for block in self.blocks)                        
+
+
+def quantize(values, frame_range, dtype, work=None):                                                
+    """                                                                                             
+    Maps values on [vmin, vmax] to the full integer range of dtype (clipping outside values).       
+    """                                                                                             
+    vmin, vmax = frame_range                                                                        
+    info = np.iinfo(dtype)                                                                          
+    if work is None:                                                                                
+        work = np.empty(np.shape(values), dtype=np.float32)                                         
+    np.clip(values, vmin, vmax, out=work, casting='same_kind')                                      
+    work -= vmin                                                                                    
+    work *= (info.max - info.min) / (vmax - vmin)                                                   
+    np.rint(work, out=work)                                                                         
+    work += info.min                                                                                
+    return work.astype(dtype)                                                                       
+
+
+def dequantize(codes, frame_range):                                                                 
+    """                                                                                             
+    Converts integer codes from quantize() back to float32 values on [vmin, vmax].                  
+    """                                                                                             
+    vmin, vmax = frame_range                                                                        
+    info = np.iinfo(codes.dtype)                                                                    
+    scale = (vmax - vmin) / (info.max - info.min)                                                   
+    return (codes.astype(np.float32) - info.min) * np.float32(scale) + np.float32(vmin)             
+#####################################################################################################
+
+
+
+### Running DFT Frequency Maps ######################################################################
+class RunningDFT:                                                                                   
+    """                                                                                             
+    Accumulates complex pressure maps at a few frequencies while the solver runs.                   
+                                                                                                    
+    Every step adds one term of the discrete Fourier transform of the new field,                    
+                                                                                                    
+        P_k[i,j] += p_np1[i,j] * exp(-1j * 2*pi*f_k * t_np1)                                        
+                                                                                                    
+    i.e. one complex multiply-add per frequency per cell, so frequency response maps are            
+    available at the end of a run without storing any frames. Pass an instance as a hook            
+    to run_fdtd() (or call it from a custom loop with the same arguments).                          
+                                                                                                    
+    Parameters:                                                                                     
+        shape       : grid shape (Nx, Ny) of the pressure field                                     
+        frequencies : list of frequencies in Hz                                                     
+        dt          : time step size                                                                
+        t_start     : only accumulate fields with t >= t_start, e.g. after the source ramp          
+                      so that the maps describe the steady state                                    
+        domain_mask : optional boolean array; cells outside it are NaN in the output maps           
+    """                                                                                             
+                                                                                                    
+    def __init__(self, shape, frequencies, dt, t_start=0.0, domain_mask=None):                      
+        self.frequencies = np.asarray(frequencies, dtype=float)                                     
+        self.omega = 2 * np.pi * self.frequencies                                                   
+        self.dt = dt                                                                                
+        self.t_start = t_start                                                                      
+        self.domain_mask = domain_mask                                                              
+        self.acc = np.zeros((len(self.frequencies),) + tuple(shape), dtype=complex)                 
+        self.work = np.empty(tuple(shape), dtype=complex)                                           
+        self.count = 0                                                                              
+                                                                                                    
+    def __call__(self, n, t, p_n, p_np1):                                                           
+        t_np1 = t + self.dt                                                                         
+        if t_np1 < self.t_start:                                                                    
+            return                                                                                  
+        phasors = np.exp(-1j * self.omega * t_np1)                                                  
+        for acc, w in zip(self.acc, phasors):                                                       
+            np.multiply(p_np1, w, out=self.work)                                                    
+            acc += self.work                                                                        
+        self.count += 1                                                                             
+                                                                                                    
+    def _masked(self, maps):                                                                        
+        if self.domain_mask is not None:                                                            
+            maps = np.where(self.domain_mask, maps, np.nan)                                         
+        return maps                                                                                 
+                                                                                                    
+    def spectrum(self):                                                                             
+        """                                                                                         
+        Returns the Fourier transform estimate sum(p * exp(-i w t)) * dt for each frequency,        
+        shape (n_freq, Nx, Ny). Suited to transient sources such as speech bursts.                  
+        """                                                                                         
+        return self._masked(self.acc * self.dt)                                                     
+                                                                                                    
+    def amplitude(self):                                                                            
+        """                                                                                         
+        Returns the steady-state pressure amplitude maps, 2 * |P_k| / N over the N accumulated      
+        steps, shape (n_freq, Nx, Ny). Exact for a tone of frequency f_k when the window            
+        spans a whole number of periods.                                                            
+        """                                                                                         
+        return self._masked(2 * np.abs(self.acc) / max(self.count, 1))                              
+                                                                                                    
+    def phase(self):                                                                                
+        """                                                                                         
+        Returns the phase maps angle(P_k) in radians, shape (n_freq, Nx, Ny).                       
+        """                                                                                         
+        return self._masked(np.angle(self.acc))                                                     
+#####################################################################################################
+
+
+
+### Streaming Field Statistics ######################################################################
+class FieldStatistics:                                                                              
+    """                                                                                             
+    Tracks peak pressure, RMS pressure and first-arrival time at every cell during a run.           
+                                                                                                    
+    The maps are updated in place each step (an absolute value, a square and two running            
+    reductions into preallocated arrays), so coverage maps are available at the end of a            
+    run without storing any frames. Pass an instance as a hook to run_fdtd().                       
+                                                                                                    
+    Parameters:                                                                                     
+        shape       : grid shape (Nx, Ny) of the pressure field                                     
+        dt          : time step size                                                                
+        threshold   : absolute pressure level that counts as the sound having arrived               
+        domain_mask : optional boolean array; cells outside it are NaN in the output maps           
+    """                                                                                             
+                                                                                                    
+    def __init__(self, shape, dt, threshold=1e-3, domain_mask=None):                                
+        self.dt = dt                                                                                
+        self.threshold = threshold                                                                  
+        self.domain_mask = domain_mask                                                              
+        self.peak = np.zeros(shape)                                                                 
+        self.sum_sq = np.zeros(shape)                                                               
+        self.arrival = np.full(shape, np.inf)                                                       
+        self.work = np.empty(shape)                                                                 
+        self.peak_max = 0.0                                                                         
+        self.count = 0                                                                              
+                                                                                                    
+    def __call__(self, n, t, p_n, p_np1):                                                           
+        np.abs(p_np1, out=self.work)                                                                
+        np.maximum(self.peak, self.work, out=self.peak)                                             
+        # Running maximum of the peak map; it stops being updated once the threshold is reached     
+        if self.peak_max < self.threshold:                                                          
+            self.peak_max = max(self.peak_max, self.work.max())                                     
+        np.multiply(self.work, self.work, out=self.work)                                            
+        self.sum_sq += self.work                                                                    
+        self.count += 1                                                                             
+                                                                                                    
+        # --- First Arrival (cells whose peak just crossed the threshold) ------------------------- 
+        if self.peak_max >= self.threshold:                                                         
+            new = (self.peak >= self.threshold) & np.isinf(self.arrival)                            
+            self.arrival[new] = t + self.dt                                                         
+                                                                                                    
+    def _masked(self, values):                                                                      
+        if self.domain_mask is not None:                                                            
+            values = np.where(self.domain_mask, values, np.nan)                                     
+        return values                                                                               
+                                                                                                    
+    def rms(self):                                                                                  
+        """                                                                                         
+        Returns the RMS pressure map sqrt(mean(p^2)) over the accumulated steps.                    
+        """                                                                                         
+        return self._masked(np.sqrt(self.sum_sq / max(self.count, 1)))                              
+                                                                                                    
+    def level_db(self, p_ref=None):                                                                 
+        """                                                                                         
+        Returns the RMS sound level 20*log10(rms / p_ref) in dB (p_ref defaults to the              
+        largest RMS value, so the loudest cell is 0 dB).                                            
+        """                                                                                         
+        rms = self.rms()                                                                            
+        if p_ref is None:                                                                           
+            p_ref = np.nanmax(rms)                                                                  
+        return 20 * np.log10(np.maximum(rms, 1e-12 * p_ref) / p_ref)                                
+                                                                                                    
+    def arrival_time(self):                                                                         
+        """                                                                                         
+        Returns the first-arrival time map (NaN where the threshold was never reached).             
+        """                                                                                         
+        arrival = np.where(np.isinf(self.arrival), np.nan, self.arrival)                            
+        return self._masked(arrival)                                                                
+                                                                                                    
+    def export(self, path=None, dtype=np.float32):                                                  
+        """                                                                                         
+        Returns the peak, rms and arrival maps as a dict of compact (float32) arrays and,           
+        if path is given, also writes them to a compressed .npz file.                               
+        """                                                                                         
+        maps = {                                                                                    
+            "peak": self._masked(self.peak).astype(dtype),                                          
+            "rms": self.rms().astype(dtype),                                                        
+            "arrival": self.arrival_time().astype(dtype),                                           
+        }                                                                                           
+        if path is not None:                                                                        
+            np.savez_compressed(path, threshold=self.threshold, steps=self.count, **maps)           
+        return maps                                                                                 
+#####################################################################################################
+
+
+
+### Statistics Heatmap ##############################################################################
+def plot_statistic_map(ax, X, Y, values, label, cmap='magma', levels=50, geometry=None):            
+    """                                                                                             
+    Draws a filled heatmap of a statistics map with the room outline and pillars on top.            
+                                                                                                    
+    Parameters:                                                                                     
+        ax       : matplotlib axis                                                                  
+        X, Y     : 2D meshgrid arrays                                                               
+        values   : map to draw, e.g. FieldStatistics.level_db() or .arrival_time() * 1000           
+        label    : colorbar label                                                                   
+        cmap     : colormap name                                                                    
+        levels   : number of contour levels or explicit level list                                  
+        geometry : optional room geometry dict (default layout if None)                             
+                                                                                                    
+    Returns:                                                                                        
+        ctf : the contour set (for further colorbar styling)                                        
+    """                                                                                             
+    from room_geometry.aero_space_geometry import plot_room_and_pillars                             
+                                                                                                    
+    ctf = ax.contourf(X, Y, values, levels=levels, cmap=cmap)                                       
+    plot_room_and_pillars(ax, geometry)                                                             
+    ax.set_aspect('equal')                                                                          
+    ax.set_xlabel("x")                                                                              
+    ax.set_ylabel("y")                                                                              
+    ax.figure.colorbar(ctf, ax=ax, label=label)                                                     
+    return ctf                                                                                      
+#####################################################################################################
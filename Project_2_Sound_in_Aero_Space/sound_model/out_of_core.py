@@ -0,0 +1,221 @@
+###### IMPORTS ######################################################################################
+import os                                                                                           #
+import numpy as np                                                                                  #
+from sound_model.FDTD_solver import check_stability                                                 #
+#####################################################################################################
+
+
+
+### Memory-Mapped Field Storage #####################################################################
+def create_field_memmaps(directory, Nx, Ny, dtype=np.float32):                                      
+    """                                                                                             
+    Creates the two disk-backed pressure fields used by the out-of-core scheme.                     
+                                                                                                    
+    The files p_a.dat and p_b.dat are created (zero-filled) in directory. Only two time             
+    levels are needed because fdtd_update_tiled() overwrites p_nm1 with p_np1 in place.             
+                                                                                                    
+    Parameters:                                                                                     
+        directory : folder for the field files (created if missing)                                 
+        Nx, Ny    : grid size                                                                       
+        dtype     : storage precision (float32 halves disk traffic compared to float64)             
+                                                                                                    
+    Returns:                                                                                        
+        p_nm1, p_n : np.memmap arrays of shape (Nx, Ny)                                             
+    """                                                                                             
+    os.makedirs(directory, exist_ok=True)                                                           
+    fields = []                                                                                     
+    for name in ("p_a.dat", "p_b.dat"):                                                             
+        fields.append(np.memmap(os.path.join(directory, name), dtype=dtype, mode='w+',              
+                                shape=(Nx, Ny)))                                                    
+    return fields[0], fields[1]                                                                     
+
+
+def tile_rows_for_budget(Ny, itemsize=4, max_tile_bytes=64 * 2**20):                                
+    """                                                                                             
+    Returns the number of grid rows per tile so that the arrays touched by one tile                 
+    (two field slices, the mask slice and the temporaries) stay within max_tile_bytes.              
+    """                                                                                             
+    per_row = Ny * (6 * itemsize + 1)                                                               
+    return max(1, int(max_tile_bytes // per_row))                                                   
+
+
+def fill_memmap_tiled(field, x, y, fn, tile_rows=256):                                              
+    """                                                                                             
+    Fills a (memory-mapped) 2D array tile by tile from a function of the coordinates.               
+                                                                                                    
+    Parameters:                                                                                     
+        field     : ndarray or np.memmap of shape (len(x), len(y))                                  
+        x, y      : 1D grid coordinates                                                             
+        fn        : callable fn(X_tile, Y_tile) -> values, with X_tile, Y_tile from                 
+                    np.meshgrid(x[i0:i1], y, indexing='ij'), e.g. a Gaussian pulse                  
+        tile_rows : number of rows generated at once                                                
+                                                                                                    
+    Returns:                                                                                        
+        field : the filled array                                                                    
+    """                                                                                             
+    for i0 in range(0, len(x), tile_rows):                                                          
+        i1 = min(i0 + tile_rows, len(x))                                                            
+        X_tile, Y_tile = np.meshgrid(x[i0:i1], y, indexing='ij')                                    
+        field[i0:i1] = fn(X_tile, Y_tile)                                                           
+    return field                                                                                    
+
+
+def create_mask_memmap(path, x, y, mask_fn, tile_rows=256):                                         
+    """                                                                                             
+    Builds a disk-backed domain mask tile by tile, e.g. with                                        
+    mask_fn = lambda xs, ys: rasterize_geometry(xs, ys, geometry).                                  
+                                                                                                    
+    Parameters:                                                                                     
+        path      : file name of the boolean mask                                                   
+        x, y      : 1D grid coordinates                                                             
+        mask_fn   : callable mask_fn(x_tile, y) -> boolean array (len(x_tile), len(y))              
+        tile_rows : number of rows rasterized at once                                               
+                                                                                                    
+    Returns:                                                                                        
+        mask : boolean np.memmap of shape (len(x), len(y))                                          
+    """                                                                                             
+    mask = np.memmap(path, dtype=bool, mode='w+', shape=(len(x), len(y)))                           
+    for i0 in range(0, len(x), tile_rows):                                                          
+        i1 = min(i0 + tile_rows, len(x))                                                            
+        mask[i0:i1] = mask_fn(x[i0:i1], y)                                                          
+    return mask                                                                                     
+
+
+def field_peak_tiled(field, tile_rows=256):                                                         
+    """                                                                                             
+    Returns max |field| of a (memory-mapped) 2D array, reduced tile by tile so that no              
+    full-grid temporary is created. NaN anywhere in the field makes the result NaN.                 
+    """                                                                                             
+    peaks = [np.max(np.abs(field[i0:i0 + tile_rows])) for i0 in range(0, field.shape[0], tile_rows)]
+    return np.max(peaks)                                                                            
+#####################################################################################################
+
+
+
+### Tiled FDTD Update Function ######################################################################
+def fdtd_update_tiled(p_nm1, p_n, dx, dt, c, domain_mask=None, tile_rows=256, dy=None):             
+    """                                                                                             
+    Performs a single FDTD update step by sweeping blocks of full grid rows.                        
+                                                                                                    
+    Discretized update:                                                                             
+        p_np1[i,j] = 2*p_n[i,j] - p_nm1[i,j] + (c*dt)^2 * Laplacian[p_n]                            
+                                                                                                    
+    with Laplacian = d2x/dx^2 + d2y/dy^2, as in sound_model.FDTD_solver.fdtd_update.                
+                                                                                                    
+    Each tile of tile_rows rows is read once from p_n together with a one-row halo above            
+    and below, updated in memory and written back. Rows are contiguous in the C-ordered             
+    files, so the sweep reads and writes the memory maps sequentially page by page. The             
+    result overwrites p_nm1 in place (each cell of p_nm1 is only read by its own update).           
+                                                                                                    
+    Parameters:                                                                                     
+        p_nm1       : ndarray or np.memmap, pressure at step n-1; overwritten with step n+1         
+        p_n         : ndarray or np.memmap, pressure at step n                                      
+        dx          : spatial grid size in x                                                        
+        dt          : time step size                                                                
+        c           : wave speed                                                                    
+        domain_mask : optional boolean array or np.memmap (True = valid region)                     
+        tile_rows   : number of rows per tile (see tile_rows_for_budget)                            
+        dy          : spatial grid size in y (defaults to dx)                                       
+                                                                                                    
+    Returns:                                                                                        
+        p_np1 : pressure field at next time step (n+1), the same object as p_nm1                    
+    """                                                                                             
+    Nx, Ny = p_n.shape                                                                              
+    coef_x = (c * dt / dx)**2                                                                       
+    coef_y = coef_x if dy is None else (c * dt / dy)**2                                             
+                                                                                                    
+    for i0 in range(1, Nx - 1, tile_rows):                                                          
+        i1 = min(i0 + tile_rows, Nx - 1)                                                            
+                                                                                                    
+        # --- Tile with One-Row Halo ---------------------------------------------------------------
+        block = np.asarray(p_n[i0 - 1:i1 + 1])                                                      
+        center = block[1:-1]                                                                        
+                                                                                                    
+        # --- Central Difference Laplacian ---------------------------------------------------------
+        if coef_y == coef_x:                                                                        
+            new = (                                                                                 
+                2 * center[:, 1:-1] - p_nm1[i0:i1, 1:-1] +                                          
+                coef_x * (                                                                          
+                    block[2:, 1:-1] + block[:-2, 1:-1] +                                            
+                    center[:, 2:] + center[:, :-2] -                                                
+                    4 * center[:, 1:-1]                                                             
+                )                                                                                   
+            )                                                                                       
+        else:                                                                                       
+            new = (                                                                                 
+                2 * center[:, 1:-1] - p_nm1[i0:i1, 1:-1] +                                          
+                coef_x * (block[2:, 1:-1] + block[:-2, 1:-1] - 2 * center[:, 1:-1]) +               
+                coef_y * (center[:, 2:] + center[:, :-2] - 2 * center[:, 1:-1])                     
+            )                                                                                       
+                                                                                                    
+        # --- Apply Domain Mask (if provided) ------------------------------------------------------
+        if domain_mask is not None:                                                                 
+            new *= domain_mask[i0:i1, 1:-1]                                                         
+                                                                                                    
+        p_nm1[i0:i1, 1:-1] = new                                                                    
+        p_nm1[i0:i1, 0] = p_nm1[i0:i1, -1] = 0                                                      
+                                                                                                    
+    # --- Dirichlet Boundary Conditions ------------------------------------------------------------
+    p_nm1[0, :] = p_nm1[-1, :] = 0                                                                  
+                                                                                                    
+    return p_nm1                                                                                    
+#####################################################################################################
+
+
+
+### Out-of-Core Time-Stepping Driver ################################################################
+def run_fdtd_out_of_core(p_nm1, p_n, dx, dt, c, Nt, domain_mask=None, sources=None, hooks=None,     
+                         stop_criterion=None, tile_rows=None, dy=None, blowup_limit=1e6,            
+                         check_every=50):                                                           
+    """                                                                                             
+    Runs up to Nt FDTD steps on disk-backed fields, mirroring sound_model.FDTD_solver.run_fdtd.     
+                                                                                                    
+    Parameters:                                                                                     
+        p_nm1, p_n     : np.memmap (or ndarray) initial fields, e.g. from create_field_memmaps      
+        dx, dt, c      : grid size in x, time step and wave speed (see stable_time_step)            
+        Nt             : maximum number of time steps                                               
+        domain_mask    : optional boolean array or np.memmap (True = valid region)                  
+        sources        : list of (i, j, signal) with signal(t) -> float                             
+        hooks          : list of callables hook(n, t, p_n, p_np1)                                   
+        stop_criterion : callable(n, t, p_n, p_np1) returning None or a reason string               
+        tile_rows      : rows per tile (default from tile_rows_for_budget)                          
+        dy             : grid size in y (defaults to dx)                                            
+        blowup_limit   : largest admissible |p|; None disables the stability check                  
+        check_every    : steps between stability checks (each one reads the whole field             
+                         once, tile by tile, see field_peak_tiled)                                  
+                                                                                                    
+    Returns:                                                                                        
+        p_nm1, p_n : the last two pressure fields (the same two memory maps, swapped)               
+        info       : dict with "steps", "t_end" and "reason"                                        
+    """                                                                                             
+    sources = sources or []                                                                         
+    hooks = hooks or []                                                                             
+    if tile_rows is None:                                                                           
+        tile_rows = tile_rows_for_budget(p_n.shape[1], p_n.dtype.itemsize)                          
+    reason = f"completed all {Nt} steps"                                                            
+    steps = 0                                                                                       
+                                                                                                    
+    for n in range(Nt):                                                                             
+        t = n * dt                                                                                  
+        p_np1 = fdtd_update_tiled(p_nm1, p_n, dx, dt, c, domain_mask, tile_rows, dy)                
+        for (i, j, signal) in sources:                                                              
+            p_np1[i, j] += signal(t)                                                                
+        if blowup_limit is not None and n % check_every == check_every - 1:                         
+            check_stability(field_peak_tiled(p_np1, tile_rows), n, t, blowup_limit)                 
+                                                                                                    
+        for hook in hooks:                                                                          
+            hook(n, t, p_n, p_np1)                                                                  
+        steps = n + 1                                                                               
+                                                                                                    
+        stop = stop_criterion(n, t, p_n, p_np1) if stop_criterion is not None else None             
+        p_nm1, p_n = p_n, p_np1                                                                     
+        if stop:                                                                                    
+            reason = stop                                                                           
+            break                                                                                   
+                                                                                                    
+    for field in (p_nm1, p_n):                                                                      
+        if isinstance(field, np.memmap):                                                            
+            field.flush()                                                                           
+                                                                                                    
+    return p_nm1, p_n, {"steps": steps, "t_end": steps * dt, "reason": reason}                      
+#####################################################################################################
@@ -0,0 +1,223 @@
+###### IMPORTS ######################################################################################
+import multiprocessing as mp                                                                        #
+from multiprocessing import shared_memory                                                           #
+import numpy as np                                                                                  #
+#####################################################################################################
+
+
+
+### Load-Balanced Partitioning ######################################################################
+def partition_rows(domain_mask, n_workers):                                                         
+    """                                                                                             
+    Splits the interior grid rows into contiguous blocks with balanced fluid cell counts.           
+                                                                                                    
+    Rows are assigned by the cumulative number of True cells in domain_mask, so a worker            
+    owning rows that cross pillars or cutouts gets more rows than one owning open space.            
+                                                                                                    
+    Parameters:                                                                                     
+        domain_mask : boolean array (Nx, Ny), True = valid region                                   
+        n_workers   : number of subdomains                                                          
+                                                                                                    
+    Returns:                                                                                        
+        bounds : list of (i0, i1) global row ranges covering rows 1 .. Nx-2                         
+    """                                                                                             
+    Nx = domain_mask.shape[0]                                                                       
+    n_workers = max(1, min(n_workers, Nx - 2))                                                      
+    # Fluid cells per row, plus one so fully masked rows still count for their stencil cost         
+    work = np.count_nonzero(domain_mask[1:-1], axis=1).astype(float) + 1.0                          
+    cumulative = np.cumsum(work)                                                                    
+    targets = cumulative[-1] * np.arange(1, n_workers) / n_workers                                  
+    cuts = np.searchsorted(cumulative, targets) + 1                                                 
+                                                                                                    
+    edges = [1]                                                                                     
+    for cut in cuts:                                                                                
+        edges.append(int(min(max(cut, edges[-1] + 1), Nx - 1 - (n_workers - len(edges)))))          
+    edges.append(Nx - 1)                                                                            
+    return [(edges[k], edges[k + 1]) for k in range(n_workers)]                                     
+#####################################################################################################
+
+
+
+### Worker Process ##################################################################################
+def _attach(name, shape):                                                                           
+    """                                                                                             
+    Attaches to a worker's shared memory block holding two (rows + 2, Ny) field levels.             
+    """                                                                                             
+    shm = shared_memory.SharedMemory(name=name)                                                     
+    return shm, np.ndarray(shape, dtype=np.float64, buffer=shm.buf)                                 
+
+
+def _fdtd_worker(rank, bounds, names, Ny, coefs, dt, Nt, mask_local, sources, capture_steps,        
+                 frames_name, frames_shape, barrier):                                               
+    """                                                                                             
+    Advances one subdomain for Nt steps with a barrier-synchronized halo exchange.                  
+                                                                                                    
+    Each step writes p_np1 over the p_nm1 level of the worker's own rows, injects the sources       
+    it owns, waits at the barrier, then copies the neighbours' edge rows of p_np1 into its          
+    halo rows, or zeroes them where they are the global boundary rows. A single barrier per         
+    step is enough: neighbours read the level that was just written, while the next step only       
+    writes the other level.                                                                         
+    """                                                                                             
+    i0, i1 = bounds[rank]                                                                           
+    rows = i1 - i0                                                                                  
+    blocks = []                                                                                     
+    try:                                                                                            
+        shm, fields = _attach(names[rank], (2, rows + 2, Ny))                                       
+        blocks.append(shm)                                                                          
+        upper = lower = None                                                                        
+        if rank > 0:                                                                                
+            j0, j1 = bounds[rank - 1]                                                               
+            shm_up, upper = _attach(names[rank - 1], (2, j1 - j0 + 2, Ny))                          
+            blocks.append(shm_up)                                                                   
+        if rank < len(bounds) - 1:                                                                  
+            j0, j1 = bounds[rank + 1]                                                               
+            shm_lo, lower = _attach(names[rank + 1], (2, j1 - j0 + 2, Ny))                          
+            blocks.append(shm_lo)                                                                   
+        frames = None                                                                               
+        if frames_name is not None:                                                                 
+            shm_fr = shared_memory.SharedMemory(name=frames_name)                                   
+            blocks.append(shm_fr)                                                                   
+            frames = np.ndarray(frames_shape, dtype=np.float64, buffer=shm_fr.buf)                  
+                                                                                                    
+        coef_x, coef_y = coefs                                                                      
+        own_sources = [(i - i0 + 1, j, signal) for (i, j, signal) in sources if i0 <= i < i1]       
+        capture_slot = {n: k for k, n in enumerate(capture_steps)}                                  
+        nm1, cur = 0, 1                                                                             
+                                                                                                    
+        for n in range(Nt):                                                                         
+            p_nm1, p_n = fields[nm1], fields[cur]                                                   
+                                                                                                    
+            # --- Central Difference Laplacian (own rows) ------------------------------------------
+            if coef_y == coef_x:                                                                    
+                new = (                                                                             
+                    2 * p_n[1:-1, 1:-1] - p_nm1[1:-1, 1:-1] +                                       
+                    coef_x * (                                                                      
+                        p_n[2:, 1:-1] + p_n[:-2, 1:-1] +                                            
+                        p_n[1:-1, 2:] + p_n[1:-1, :-2] -                                            
+                        4 * p_n[1:-1, 1:-1]                                                         
+                    )                                                                               
+                )                                                                                   
+            else:                                                                                   
+                new = (                                                                             
+                    2 * p_n[1:-1, 1:-1] - p_nm1[1:-1, 1:-1] +                                       
+                    coef_x * (p_n[2:, 1:-1] + p_n[:-2, 1:-1] - 2 * p_n[1:-1, 1:-1]) +               
+                    coef_y * (p_n[1:-1, 2:] + p_n[1:-1, :-2] - 2 * p_n[1:-1, 1:-1])                 
+                )                                                                                   
+            if mask_local is not None:                                                              
+                new *= mask_local[:, 1:-1]                                                          
+            p_nm1[1:-1, 1:-1] = new                                                                 
+            p_nm1[1:-1, 0] = p_nm1[1:-1, -1] = 0                                                    
+                                                                                                    
+            t = n * dt                                                                              
+            for (li, j, signal) in own_sources:                                                     
+                p_nm1[li, j] += signal(t)                                                           
+            if frames is not None and n in capture_slot:                                            
+                frames[capture_slot[n], i0:i1] = p_nm1[1:-1]                                        
+                                                                                                    
+            # --- Halo Exchange --------------------------------------------------------------------
+            barrier.wait()                                                                          
+            # Rows 0 and Nx-1 are Dirichlet boundaries: zero on every written level, as in run_fdtd 
+            p_nm1[0] = upper[nm1][-2] if upper is not None else 0                                   
+            p_nm1[-1] = lower[nm1][1] if lower is not None else 0                                   
+                                                                                                    
+            nm1, cur = cur, nm1                                                                     
+    except Exception:                                                                               
+        barrier.abort()                                                                             
+        raise                                                                                       
+    finally:                                                                                        
+        for shm in blocks:                                                                          
+            shm.close()                                                                             
+#####################################################################################################
+
+
+
+### Parallel Time-Stepping Driver ###################################################################
+def run_fdtd_parallel(p_nm1, p_n, dx, dt, c, Nt, domain_mask=None, sources=None, n_workers=None,    
+                      capture_steps=None, dy=None):                                                 
+    """                                                                                             
+    Runs Nt FDTD steps with the grid split across worker processes.                                 
+                                                                                                    
+    Each worker owns a block of rows (chosen by partition_rows so that fluid cells are              
+    balanced) stored in its own multiprocessing.shared_memory block with one halo row on            
+    each side. Workers update their rows, inject their own sources and exchange halo rows           
+    after a barrier every step, so no step work runs in the parent process or under a               
+    shared GIL. Results match run_fdtd() exactly.                                                   
+                                                                                                    
+    Parameters:                                                                                     
+        p_nm1, p_n    : ndarray, initial pressure fields at steps -1 and 0                          
+        dx, dt, c     : grid size in x, time step and wave speed                                    
+        Nt            : number of time steps                                                        
+        domain_mask   : optional boolean array (True = valid region)                                
+        sources       : list of (i, j, signal); signal must be picklable, e.g.                      
+                        functools.partial(speech_burst, burst_list=bursts)                          
+        n_workers     : number of processes (default: all CPU cores)                                
+        capture_steps : optional list of step indices n at which p_np1 is stored                    
+        dy            : grid size in y (defaults to dx)                                             
+                                                                                                    
+    Returns:                                                                                        
+        p_nm1, p_n : ndarray, the last two pressure fields                                          
+        frames     : ndarray (len(capture_steps), Nx, Ny) of captured fields, or None               
+    """                                                                                             
+    Nx, Ny = p_n.shape                                                                              
+    sources = sources or []                                                                         
+    capture_steps = list(capture_steps or [])                                                       
+    if domain_mask is None:                                                                         
+        domain_mask = np.ones((Nx, Ny), dtype=bool)                                                 
+    bounds = partition_rows(domain_mask, n_workers or mp.cpu_count())                               
+    coef_x = (c * dt / dx)**2                                                                       
+    coefs = (coef_x, coef_x if dy is None else (c * dt / dy)**2)                                    
+                                                                                                    
+    blocks = []                                                                                     
+    try:                                                                                            
+        # --- Scatter Initial Fields into Shared Memory --------------------------------------------
+        names = []                                                                                  
+        for (i0, i1) in bounds:                                                                     
+            shape = (2, i1 - i0 + 2, Ny)                                                            
+            shm = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)) * 8)             
+            blocks.append(shm)                                                                      
+            names.append(shm.name)                                                                  
+            fields = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)                            
+            fields[0] = p_nm1[i0 - 1:i1 + 1]                                                        
+            fields[1] = p_n[i0 - 1:i1 + 1]                                                          
+                                                                                                    
+        frames_name, frames_shape = None, None                                                      
+        if capture_steps:                                                                           
+            frames_shape = (len(capture_steps), Nx, Ny)                                             
+            shm = shared_memory.SharedMemory(create=True, size=int(np.prod(frames_shape)) * 8)      
+            blocks.append(shm)                                                                      
+            frames_name = shm.name                                                                  
+            np.ndarray(frames_shape, dtype=np.float64, buffer=shm.buf)[:] = 0                       
+                                                                                                    
+        # --- Launch Workers -----------------------------------------------------------------------
+        barrier = mp.Barrier(len(bounds))                                                           
+        workers = [                                                                                 
+            mp.Process(target=_fdtd_worker,                                                         
+                       args=(rank, bounds, names, Ny, coefs, dt, Nt, domain_mask[i0:i1],            
+                             sources, capture_steps, frames_name, frames_shape, barrier))           
+            for rank, (i0, i1) in enumerate(bounds)                                                 
+        ]                                                                                           
+        for w in workers:                                                                           
+            w.start()                                                                               
+        for w in workers:                                                                           
+            w.join()                                                                                
+        if any(w.exitcode != 0 for w in workers):                                                   
+            raise RuntimeError("An FDTD worker process failed; see its traceback above")            
+                                                                                                    
+        # --- Gather Results -----------------------------------------------------------------------
+        latest, previous = 1 - Nt % 2, Nt % 2                                                       
+        out_n = np.zeros((Nx, Ny))                                                                  
+        out_nm1 = np.zeros((Nx, Ny))                                                                
+        for (i0, i1), shm in zip(bounds, blocks):                                                   
+            fields = np.ndarray((2, i1 - i0 + 2, Ny), dtype=np.float64, buffer=shm.buf)             
+            out_n[i0:i1] = fields[latest][1:-1]                                                     
+            out_nm1[i0:i1] = fields[previous][1:-1]                                                 
+        frames = None                                                                               
+        if frames_name is not None:                                                                 
+            frames = np.ndarray(frames_shape, dtype=np.float64, buffer=blocks[-1].buf).copy()       
+    finally:                                                                                        
+        for shm in blocks:                                                                          
+            shm.close()                                                                             
+            shm.unlink()                                                                            
+                                                                                                    
+    return out_nm1, out_n, frames                                                                   
+#####################################################################################################
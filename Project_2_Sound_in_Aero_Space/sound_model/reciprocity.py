@@ -0,0 +1,122 @@
+###### IMPORTS ######################################################################################
+import numpy as np                                                                                  #
+from sound_model.FDTD_solver import run_fdtd                                                        #
+#####################################################################################################
+
+
+
+### Vectorized Probe Recorder #######################################################################
+class ProbeRecorder:                                                                                
+    """                                                                                             
+    Records the pressure time history at many grid cells with one gather per step.                  
+                                                                                                    
+    The probe cells are converted to flat indices once, and every step np.take() copies             
+    p_np1 at all of them straight into row n of a preallocated (Nt, n_probes) buffer.               
+    Pass an instance as a hook to run_fdtd().                                                       
+                                                                                                    
+    Parameters:                                                                                     
+        probes : list or array of (i, j) grid indices                                               
+        shape  : grid shape (Nx, Ny) of the pressure field                                          
+        Nt     : maximum number of time steps to record                                             
+        dtype  : storage type of the recorded histories                                             
+    """                                                                                             
+                                                                                                    
+    def __init__(self, probes, shape, Nt, dtype=np.float64):                                        
+        probes = np.asarray(probes, dtype=int).reshape(-1, 2)                                       
+        self.flat = np.ravel_multi_index((probes[:, 0], probes[:, 1]), shape)                       
+        self.history = np.zeros((Nt, len(self.flat)), dtype=dtype)                                  
+        self.steps = 0                                                                              
+                                                                                                    
+    def __call__(self, n, t, p_n, p_np1):                                                           
+        np.take(p_np1, self.flat, out=self.history[n])                                              
+        self.steps = n + 1                                                                          
+                                                                                                    
+    def traces(self):                                                                               
+        """                                                                                         
+        Returns the recorded histories, shape (n_probes, steps).                                    
+        """                                                                                         
+        return self.history[:self.steps].T                                                          
+#####################################################################################################
+
+
+
+### Candidate Source Cells ##########################################################################
+def candidate_cells(x, y, points, domain_mask=None):                                                
+    """                                                                                             
+    Maps candidate talker positions to their nearest grid cells and drops the ones that fall        
+    outside the fluid region.                                                                       
+                                                                                                    
+    Parameters:                                                                                     
+        x, y        : 1D grid coordinates                                                           
+        points      : array of (x0, y0) positions                                                   
+        domain_mask : optional boolean array (True = valid region)                                  
+                                                                                                    
+    Returns:                                                                                        
+        cells : int array (n, 2) of (i, j) indices                                                  
+        keep  : boolean array marking which input points were kept                                  
+    """                                                                                             
+    points = np.asarray(points, dtype=float).reshape(-1, 2)                                         
+    i = np.abs(x[None, :] - points[:, :1]).argmin(axis=1)                                           
+    j = np.abs(y[None, :] - points[:, 1:]).argmin(axis=1)                                           
+    keep = np.ones(len(points), dtype=bool) if domain_mask is None else domain_mask[i, j]           
+    return np.stack([i[keep], j[keep]], axis=1), keep                                               
+#####################################################################################################
+
+
+
+### Reciprocal Impulse Responses ####################################################################
+def reciprocal_impulse_responses(listener, candidates, shape, dx, dt, c, Nt, domain_mask=None,      
+                                 stop_criterion=None, dy=None):                                     
+    """                                                                                             
+    Computes the impulse response from every candidate source cell to one listener cell             
+    with a single simulation.                                                                       
+                                                                                                    
+    The masked leapfrog scheme is symmetric in source and receiver (the stencil is the              
+    same at every fluid cell and walls simply hold p = 0), so the response recorded at a            
+    candidate cell from a unit impulse injected at the listener equals the response at the          
+    listener from the same impulse injected at that candidate. One run from the listener            
+    therefore replaces one run per talker position.                                                 
+                                                                                                    
+    Parameters:                                                                                     
+        listener       : (i, j) grid index of the listener seat                                     
+        candidates     : array of (i, j) candidate source cells                                     
+        shape          : grid shape (Nx, Ny)                                                        
+        dx, dt, c      : grid size, time step and wave speed                                        
+        Nt             : number of time steps (length of each impulse response)                     
+        domain_mask    : optional boolean array (True = valid region)                               
+        stop_criterion : optional stopping rule passed on to run_fdtd()                             
+        dy             : grid size in y (defaults to dx)                                            
+                                                                                                    
+    Returns:                                                                                        
+        responses : ndarray (n_candidates, steps); responses[k, m] is the listener pressure         
+                    at step m for a unit source value injected at candidate k at step 0             
+    """                                                                                             
+    Nx, Ny = shape                                                                                  
+    recorder = ProbeRecorder(candidates, shape, Nt)                                                 
+    impulse = lambda t: 1.0 if t < 0.5 * dt else 0.0                                                
+    run_fdtd(np.zeros((Nx, Ny)), np.zeros((Nx, Ny)), dx, dt, c, Nt, domain_mask,                    
+             sources=[(listener[0], listener[1], impulse)], hooks=[recorder],                       
+             stop_criterion=stop_criterion, dy=dy)                                                  
+    return recorder.traces()                                                                        
+
+
+def apply_source_signal(responses, signal, dt):                                                     
+    """                                                                                             
+    Returns the listener pressure for every candidate talker emitting the same signal,              
+    by convolving each impulse response with the sampled source signal (FFT-based).                 
+                                                                                                    
+    Parameters:                                                                                     
+        responses : ndarray (n_candidates, Nt) from reciprocal_impulse_responses()                  
+        signal    : callable signal(t), e.g. lambda t: speech_burst(t, bursts)                      
+        dt        : time step size                                                                  
+                                                                                                    
+    Returns:                                                                                        
+        ndarray (n_candidates, Nt) of listener pressure histories, identical to running             
+        run_fdtd() once per candidate with source signal(t) and recording the listener              
+    """                                                                                             
+    Nt = responses.shape[1]                                                                         
+    samples = np.array([signal(n * dt) for n in range(Nt)])                                         
+    n_fft = 1 << int(np.ceil(np.log2(2 * Nt)))                                                      
+    spectrum = np.fft.rfft(responses, n_fft, axis=1) * np.fft.rfft(samples, n_fft)                  
+    return np.fft.irfft(spectrum, n_fft, axis=1)[:, :Nt]                                            
+#####################################################################################################
@@ -0,0 +1,148 @@
+###### IMPORTS ######################################################################################
+import multiprocessing as mp                                                                        #
+import os                                                                                           #
+import queue                                                                                        #
+import time                                                                                         #
+import numpy as np                                                                                  #
+#####################################################################################################
+
+
+
+### Render Worker Process ###########################################################################
+def _render_worker(tasks, done, render_frame):                                                      
+    """                                                                                             
+    Takes (k, t, frame, path) items off the task queue and draws each one with render_frame         
+    until it receives None. Reports (k, path, seconds) for every written image.                     
+    """                                                                                             
+    import matplotlib                                                                               
+    matplotlib.use("Agg")                                                                           
+                                                                                                    
+    while True:                                                                                     
+        item = tasks.get()                                                                          
+        if item is None:                                                                            
+            break                                                                                   
+        k, t, frame, path = item                                                                    
+        t0 = time.perf_counter()                                                                    
+        render_frame(path, t, frame)                                                                
+        done.put((k, path, time.perf_counter() - t0))                                               
+#####################################################################################################
+
+
+
+### Producer / Consumer Frame Pipeline ##############################################################
+class FramePipeline:                                                                                
+    """                                                                                             
+    Renders captured frames in worker processes while the time loop keeps stepping.                 
+                                                                                                    
+    Used as a run_fdtd hook, every `every` seconds of simulated time the current field is           
+    copied (as float32) into a bounded multiprocessing queue, and n_workers processes draw          
+    the queued frames to numbered PNGs with render_frame(path, t, frame). The queue bound           
+    gives back-pressure: if rendering falls behind, the stepper blocks on put() instead of          
+    piling up frames in memory. close() drains the queue and, if gif_path is given, joins           
+    the PNGs into an animated GIF, so the wall time of a run is close to                            
+    max(compute, render) rather than their sum when a spare core is available.                      
+                                                                                                    
+    If the run fails, call abort() to stop the workers without waiting for their frames.            
+    The workers are daemon processes, so an unhandled error cannot leave the interpreter            
+    waiting on them at exit, and a put() or close() that finds a worker crashed raises              
+    instead of waiting for frames that will never be rendered.                                      
+                                                                                                    
+    Parameters:                                                                                     
+        render_frame : picklable callable(path, t, frame) writing one image, e.g.                   
+                       functools.partial(draw_frame, x=x, y=y)                                      
+        directory    : folder for the frame PNGs                                                    
+        every        : simulated seconds between captured frames                                    
+        n_workers    : number of render processes                                                   
+        queue_size   : maximum number of frames waiting to be rendered                              
+        gif_path     : optional output path of the animation assembled in close()                   
+        fps          : frame rate of the GIF                                                        
+    """                                                                                             
+                                                                                                    
+    def __init__(self, render_frame, directory, every, n_workers=1, queue_size=8, gif_path=None,    
+                 fps=30):                                                                           
+        self.directory = directory                                                                  
+        self.every = every                                                                          
+        self.gif_path = gif_path                                                                    
+        self.fps = fps                                                                              
+        self.next_t = 0.0                                                                           
+        self.count = 0                                                                              
+        self.blocked = 0.0                                                                          
+        os.makedirs(directory, exist_ok=True)                                                       
+                                                                                                    
+        self.tasks = mp.Queue(maxsize=queue_size)                                                   
+        self.done = mp.Queue()                                                                      
+        self.workers = [mp.Process(target=_render_worker, args=(self.tasks, self.done, render_frame),
+                                   daemon=True)                                                     
+                        for _ in range(n_workers)]                                                  
+        for w in self.workers:                                                                      
+            w.start()                                                                               
+                                                                                                    
+    def __call__(self, n, t, p_n, p_np1):                                                           
+        if t < self.next_t:                                                                         
+            return                                                                                  
+        self.next_t += self.every                                                                   
+        path = os.path.join(self.directory, f"frame_{self.count:05d}.png")                          
+        t0 = time.perf_counter()                                                                    
+        self._put((self.count, t, p_np1.astype(np.float32), path))                                  
+        self.blocked += time.perf_counter() - t0                                                    
+        self.count += 1                                                                             
+                                                                                                    
+    def _put(self, item):                                                                           
+        while True:                                                                                 
+            try:                                                                                    
+                self.tasks.put(item, timeout=1.0)                                                   
+                return                                                                              
+            except queue.Full:                                                                      
+                self._check_workers("frames can no longer be queued")                               
+                                                                                                    
+    def _check_workers(self, consequence):                                                          
+        """                                                                                      
+        Raises once any worker has died: the frame it held is lost, so waiting cannot finish.       
+        """                                                                                      
+        if any(w.exitcode not in (None, 0) for w in self.workers):                                  
+            raise RuntimeError(f"A render worker process failed; {consequence}")                    
+                                                                                                    
+    def abort(self):                                                                                
+        """                                                                                         
+        Terminates the workers without rendering the queued frames, for runs that failed.           
+        """                                                                                         
+        for w in self.workers:                                                                      
+            if w.is_alive():                                                                        
+                w.terminate()                                                                       
+        for w in self.workers:                                                                      
+            w.join()                                                                                
+        self.tasks.cancel_join_thread()                                                             
+                                                                                                    
+    def close(self):                                                                                
+        """                                                                                         
+        Waits for all queued frames, stops the workers and writes the GIF.                          
+                                                                                                    
+        Returns:                                                                                    
+            paths : list of the frame PNG paths in capture order                                    
+            info  : dict with "frames", "render_time" (summed over workers) and "blocked"           
+                    (seconds the stepper waited on a full queue)                                    
+        """                                                                                         
+        results = []                                                                                
+        while len(results) < self.count:                                                            
+            try:                                                                                    
+                results.append(self.done.get(timeout=1.0))                                          
+            except queue.Empty:                                                                     
+                self._check_workers("not all frames will be rendered")                              
+        for _ in self.workers:                                                                      
+            self.tasks.put(None)                                                                    
+        for w in self.workers:                                                                      
+            w.join()                                                                                
+        if any(w.exitcode != 0 for w in self.workers):                                              
+            raise RuntimeError("A render worker process failed; see its traceback above")           
+                                                                                                    
+        paths = [path for _, path, _ in sorted(results)]                                            
+        if self.gif_path and paths:                                                                 
+            from PIL import Image                                                                   
+                                                                                                    
+            images = [Image.open(path) for path in paths]                                           
+            images[0].save(self.gif_path, save_all=True, append_images=images[1:],                  
+                           duration=1000 / self.fps, loop=0)                                        
+        info = {"frames": len(paths), "render_time": sum(s for _, _, s in results),                 
+                "blocked": self.blocked}                                                            
+        return paths, info                                                                          
+#####################################################################################################
@@ -44,3 +44,40 @@ def speech_burst(t, burst_list, amplitude=0.05):
         for b in burst_list                                                                           
     )                                                                                                
 #####################################################################################################
+
+
+
+### Burst Timing Helper #############################################################################
+def burst_end_time(burst_list, n_sigma=5.0):                                                        
+    """                                                                                             
+    Returns the time after which a speech burst source is effectively silent.                       
+                                                                                                    
+    Parameters:                                                                                     
+        burst_list : list of dicts with keys {"t0", "sigma", "f"}                                   
+        n_sigma    : number of Gaussian widths after each burst center                              
+                                                                                                    
+    Returns:                                                                                        
+        float : max(t0 + n_sigma * sigma) over all bursts                                           
+    """                                                                                             
+    return max(b["t0"] + n_sigma * b["sigma"] for b in burst_list)                                  
+#####################################################################################################
+
+
+
+### Continuous Tone Source ##########################################################################
+def tone(t, frequencies, amplitude=0.05, t_ramp=0.0):                                               
+    """                                                                                             
+    Returns a sum of steady sine tones, faded in with a raised-cosine ramp.                         
+                                                                                                    
+    Parameters:                                                                                     
+        t           : float, current time                                                           
+        frequencies : list of tone frequencies in Hz                                                
+        amplitude   : pressure amplitude of each tone                                               
+        t_ramp      : duration of the fade-in (avoids a broadband click at t = 0)                   
+                                                                                                    
+    Returns:                                                                                        
+        float : summed pressure of all tones at time t                                              
+    """                                                                                             
+    ramp = 0.5 * (1 - np.cos(np.pi * t / t_ramp)) if t < t_ramp else 1.0                            
+    return ramp * sum(amplitude * np.sin(2 * np.pi * f * t) for f in frequencies)                   
+#####################################################################################################
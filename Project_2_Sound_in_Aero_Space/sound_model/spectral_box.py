@@ -0,0 +1,139 @@
+###### IMPORTS ######################################################################################
+import numpy as np                                                                                  #
+from scipy.fft import dstn                                                                          #
+#####################################################################################################
+
+
+
+### Box Eigenmodes ##################################################################################
+def box_mode_frequencies(Nx, Ny, dx, dt, c, scheme="discrete"):                                     
+    """                                                                                             
+    Returns the phase advance per time step theta[k, l] of every sine mode of a Dirichlet box.      
+                                                                                                    
+    The interior of an Nx x Ny grid (walls at the outer rows and columns) is spanned by the         
+    modes sin(k*pi*i/(Nx-1)) * sin(l*pi*j/(Ny-1)), k = 1..Nx-2, l = 1..Ny-2, which are also         
+    the eigenvectors of the 5-point Laplacian.                                                      
+                                                                                                    
+    Parameters:                                                                                     
+        Nx, Ny : grid size including the wall nodes                                                 
+        dx     : grid size (square cells)                                                           
+        dt     : time step size                                                                     
+        c      : wave speed                                                                         
+        scheme : "discrete"   - leapfrog dispersion, cos(theta) = 1 - (c*dt)^2 * lam / 2 with       
+                                the 5-point Laplacian eigenvalue lam (reproduces fdtd_update)       
+                 "continuous" - exact wave equation, theta = c*dt*pi*sqrt((k/Lx)^2 + (l/Ly)^2)      
+                                                                                                    
+    Returns:                                                                                        
+        theta : ndarray (Nx-2, Ny-2)                                                                
+    """                                                                                             
+    k = np.arange(1, Nx - 1)[:, None]                                                               
+    l = np.arange(1, Ny - 1)[None, :]                                                               
+    if scheme == "discrete":                                                                        
+        lam = (4 / dx**2) * (np.sin(np.pi * k / (2 * (Nx - 1)))**2 +                                
+                             np.sin(np.pi * l / (2 * (Ny - 1)))**2)                                 
+        cos_theta = 1 - 0.5 * (c * dt)**2 * lam                                                     
+        if np.any(np.abs(cos_theta) > 1):                                                           
+            raise ValueError("time step violates the leapfrog stability limit for this grid")       
+        return np.arccos(cos_theta)                                                                 
+    if scheme == "continuous":                                                                      
+        Lx, Ly = (Nx - 1) * dx, (Ny - 1) * dx                                                       
+        return c * dt * np.pi * np.sqrt((k / Lx)**2 + (l / Ly)**2)                                  
+    raise ValueError(f"unknown scheme '{scheme}' (use 'discrete' or 'continuous')")                 
+
+
+def _point_mode_weights(i, j, Nx, Ny):                                                              
+    """                                                                                             
+    Returns the orthonormal DST-I coefficients of a unit value at grid cell (i, j).                 
+    """                                                                                             
+    k = np.arange(1, Nx - 1)[:, None]                                                               
+    l = np.arange(1, Ny - 1)[None, :]                                                               
+    return (np.sqrt(2 / (Nx - 1)) * np.sin(np.pi * k * i / (Nx - 1)) *                              
+            np.sqrt(2 / (Ny - 1)) * np.sin(np.pi * l * j / (Ny - 1)))                               
+#####################################################################################################
+
+
+
+### Spectral Box Solver #############################################################################
+class SpectralBoxSolver:                                                                            
+    """                                                                                             
+    Evaluates the pressure in a rectangular Dirichlet box at any time, without time stepping.       
+                                                                                                    
+    The initial fields are projected onto the box modes with an orthonormal type-I discrete         
+    sine transform (scipy.fft.dstn). Each mode then evolves independently,                          
+                                                                                                    
+        a_k(tau) = a_k(0) cos(tau*theta_k) + B_k sin(tau*theta_k),    tau = t / dt                  
+                                                                                                    
+    and point sources add a Duhamel sum over their samples signal(m*dt), injected the same          
+    way as in run_fdtd(). The field at time t is the inverse transform of a_k(t/dt).                
+                                                                                                    
+    With scheme="discrete" the result equals run_fdtd() on the same box to round-off, at            
+    the cost of one transform per requested time; with scheme="continuous" it is the exact          
+    wave equation solution for the grid-resolved initial data, a reference for measuring            
+    the FDTD error.                                                                                 
+                                                                                                    
+    Parameters:                                                                                     
+        p_nm1, p_n : ndarray (Nx, Ny), fields at steps -1 and 0 (walls must be zero)                
+        dx, dt, c  : grid size, time step and wave speed                                            
+        sources    : list of (i, j, signal) with signal(t) -> float                                 
+        scheme     : "discrete" or "continuous" (see box_mode_frequencies)                          
+        f_max      : optional frequency cutoff in Hz for the source sums; modes above it            
+                     are not driven by the sources (the initial field keeps every mode)             
+    """                                                                                             
+                                                                                                    
+    def __init__(self, p_nm1, p_n, dx, dt, c, sources=None, scheme="discrete", f_max=None):         
+        self.Nx, self.Ny = p_n.shape                                                                
+        self.dt = dt                                                                                
+        self.scheme = scheme                                                                        
+        self.theta = box_mode_frequencies(self.Nx, self.Ny, dx, dt, c, scheme)                      
+                                                                                                    
+        # --- Project Initial Fields onto the Box Modes --------------------------------------------
+        self.a0 = dstn(p_n[1:-1, 1:-1], type=1, norm='ortho')                                       
+        a_prev = dstn(p_nm1[1:-1, 1:-1], type=1, norm='ortho')                                      
+        self.b0 = (self.a0 * np.cos(self.theta) - a_prev) / np.sin(self.theta)                      
+                                                                                                    
+        # --- Source Mode Weights (restricted to the driven modes) ---------------------------------
+        if f_max is None:                                                                           
+            self.driven = np.ones(self.theta.shape, dtype=bool)                                     
+        else:                                                                                       
+            self.driven = self.theta <= 2 * np.pi * f_max * dt                                      
+        gain = np.sin(self.theta) if scheme == "discrete" else self.theta                           
+        self.sources = []                                                                           
+        for (i, j, signal) in sources or []:                                                        
+            weights = _point_mode_weights(i, j, self.Nx, self.Ny)[self.driven]                      
+            self.sources.append((weights / gain[self.driven], signal))                              
+                                                                                                    
+    def modal_amplitudes(self, t, chunk=4096):                                                      
+        """                                                                                         
+        Returns the mode amplitudes a_k at time t, shape (Nx-2, Ny-2).                              
+        """                                                                                         
+        tau = t / self.dt                                                                           
+        a = self.a0 * np.cos(tau * self.theta) + self.b0 * np.sin(tau * self.theta)                 
+                                                                                                    
+        # --- Duhamel Sum: sample m lands at step m+1 and rings as sin((tau - m)*theta) --------------
+        m = np.arange(0, int(np.floor(tau + 1e-9)))                                                 
+        if self.sources and len(m):                                                                 
+            theta = self.theta[self.driven]                                                         
+            forced = np.zeros(theta.shape)                                                          
+            for weights, signal in self.sources:                                                    
+                samples = np.array([signal(mk * self.dt) for mk in m])                              
+                for k0 in range(0, len(theta), chunk):                                              
+                    phase = np.outer(theta[k0:k0 + chunk], tau - m)                                 
+                    forced[k0:k0 + chunk] += weights[k0:k0 + chunk] * (np.sin(phase) @ samples)     
+            a[self.driven] += forced                                                                
+        return a                                                                                    
+                                                                                                    
+    def field(self, t):                                                                             
+        """                                                                                         
+        Returns the pressure field at time t, shape (Nx, Ny). For t = n*dt this is the field        
+        run_fdtd() holds after n steps.                                                             
+        """                                                                                         
+        p = np.zeros((self.Nx, self.Ny))                                                            
+        p[1:-1, 1:-1] = dstn(self.modal_amplitudes(t), type=1, norm='ortho')                        
+        return p                                                                                    
+                                                                                                    
+    def field_at_step(self, n):                                                                     
+        """                                                                                         
+        Returns the pressure field after n time steps, shape (Nx, Ny).                              
+        """                                                                                         
+        return self.field(n * self.dt)                                                              
+#####################################################################################################
@@ -0,0 +1,116 @@
+###### IMPORTS ######################################################################################
+import numpy as np                                                                                  #
+#####################################################################################################
+
+
+
+### Discrete Field Energy ###########################################################################
+def field_energy(p_n, p_np1, dx, dt, c, dy=None):                                                   
+    """                                                                                             
+    Returns the discrete acoustic energy of the leapfrog scheme between steps n and n+1.            
+                                                                                                    
+        E = 1/2 * sum[ ((p_np1 - p_n) / (c*dt))^2 + grad(p_n) . grad(p_np1) ] * dx*dy               
+                                                                                                    
+    For the undamped scheme with rigid (p = 0) walls this quantity is conserved once the            
+    sources are off, so it is mainly useful relative to its peak value.                             
+                                                                                                    
+    Parameters:                                                                                     
+        p_n, p_np1 : ndarray, pressure fields at consecutive time steps                             
+        dx, dt, c  : grid size in x, time step and wave speed                                       
+        dy         : grid size in y (defaults to dx)                                                
+                                                                                                    
+    Returns:                                                                                        
+        float : total field energy                                                                  
+    """                                                                                             
+    dy = dx if dy is None else dy                                                                   
+    kinetic = np.sum((p_np1 - p_n)**2) / (c * dt)**2                                                
+    grad_x = np.sum(np.diff(p_n, axis=0) * np.diff(p_np1, axis=0)) / dx**2                          
+    grad_y = np.sum(np.diff(p_n, axis=1) * np.diff(p_np1, axis=1)) / dy**2                          
+    return 0.5 * (kinetic + grad_x + grad_y) * dx * dy                                              
+#####################################################################################################
+
+
+
+### Energy-Based Stopping Criterion #################################################################
+class EnergyStop:                                                                                   
+    """                                                                                             
+    Stops a run once the total field energy has stayed below a fraction of its peak for a           
+    number of consecutive checks.                                                                   
+                                                                                                    
+    Parameters:                                                                                     
+        dx, dt, c   : grid size in x, time step and wave speed                                      
+        ratio       : stop when energy < ratio * peak energy                                        
+        window      : number of consecutive checks that must satisfy the condition                  
+        t_min       : never stop before this time (e.g. the end of the sources)                     
+        check_every : evaluate the energy every check_every steps (it costs a few passes            
+                      over the field)                                                               
+        dy          : grid size in y (defaults to dx)                                               
+    """                                                                                             
+                                                                                                    
+    def __init__(self, dx, dt, c, ratio=1e-3, window=10, t_min=0.0, check_every=10, dy=None):       
+        self.dx, self.dy, self.dt, self.c = dx, dy, dt, c                                           
+        self.ratio = ratio                                                                          
+        self.window = window                                                                        
+        self.t_min = t_min                                                                          
+        self.check_every = check_every                                                              
+        self.peak = 0.0                                                                             
+        self.quiet = 0                                                                              
+                                                                                                    
+    def __call__(self, n, t, p_n, p_np1):                                                           
+        if n % self.check_every != 0:                                                               
+            return None                                                                             
+                                                                                                    
+        energy = field_energy(p_n, p_np1, self.dx, self.dt, self.c, self.dy)                        
+        self.peak = max(self.peak, energy)                                                          
+        if self.peak > 0 and energy < self.ratio * self.peak:                                       
+            self.quiet += 1                                                                         
+        else:                                                                                       
+            self.quiet = 0                                                                          
+                                                                                                    
+        if t >= self.t_min and self.quiet >= self.window:                                           
+            return (f"field energy below {self.ratio:g} x peak for "                                
+                    f"{self.window * self.check_every} steps")                                      
+        return None                                                                                 
+#####################################################################################################
+
+
+
+### Receiver-Based Stopping Criterion ###############################################################
+class ReceiverLevelStop:                                                                            
+    """                                                                                             
+    Stops a run once every receiver has stayed below a pressure threshold for a window of           
+    consecutive steps, i.e. the sound has decayed or moved away from the listeners.                 
+                                                                                                    
+    Parameters:                                                                                     
+        receivers       : list of (i, j) grid indices                                               
+        threshold       : absolute pressure level treated as silence                                
+        window          : number of consecutive quiet steps required                                
+        t_min           : never stop before this time (e.g. the end of the sources)                 
+        require_arrival : if True, only stop after the signal has reached the receivers             
+                          (exceeded the threshold at least once)                                    
+    """                                                                                             
+                                                                                                    
+    def __init__(self, receivers, threshold, window, t_min=0.0, require_arrival=True):              
+        self.rx_i, self.rx_j = np.asarray(receivers, dtype=int).reshape(-1, 2).T                    
+        self.threshold = threshold                                                                  
+        self.window = window                                                                        
+        self.t_min = t_min                                                                          
+        self.require_arrival = require_arrival                                                      
+        self.arrived = False                                                                        
+        self.quiet = 0                                                                              
+                                                                                                    
+    def __call__(self, n, t, p_n, p_np1):                                                           
+        level = np.max(np.abs(p_np1[self.rx_i, self.rx_j]))                                         
+        if level >= self.threshold:                                                                 
+            self.arrived = True                                                                     
+            self.quiet = 0                                                                          
+        else:                                                                                       
+            self.quiet += 1                                                                         
+                                                                                                    
+        if self.require_arrival and not self.arrived:                                               
+            return None                                                                             
+        if t >= self.t_min and self.quiet >= self.window:                                           
+            return (f"receiver level below {self.threshold:g} for "                                 
+                    f"{self.window} steps")                                                         
+        return None                                                                                 
+#####################################################################################################
@@ -0,0 +1,24 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sound_model.FDTD_solver import run_fdtd, stable_time_step
+from sound_model.parallel import run_fdtd_parallel
+
+def test_parallel_matches_serial_with_nonzero_boundary():
+    rng = np.random.default_rng(1)
+    Nx, Ny, dx, c, Nt = 61, 33, 0.05, 343.0, 40
+    p_nm1, p_n = rng.normal(size=(2, Nx, Ny))
+    mask = rng.random((Nx, Ny)) > 0.1
+
+    for dy in (None, 0.08):
+        dt = stable_time_step(c, dx, dy)
+        serial = run_fdtd(p_nm1.copy(), p_n.copy(), dx, dt, c, Nt, mask, dy=dy, blowup_limit=None)
+        for n_workers in (1, 3):
+            parallel = run_fdtd_parallel(p_nm1.copy(), p_n.copy(), dx, dt, c, Nt, mask,
+                                         n_workers=n_workers, dy=dy)
+            np.testing.assert_array_equal(parallel[0], serial[0])
+            np.testing.assert_array_equal(parallel[1], serial[1])